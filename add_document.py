@@ -3,11 +3,15 @@
 
 from __future__ import annotations
 
-import os, re, shutil, argparse, datetime, math, json, hashlib
-from dataclasses import dataclass
+import os, re, shutil, argparse, datetime, hashlib, asyncio, uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Tuple, Optional, Dict, Iterable
 
+import faiss
+import numpy as np
 from dotenv import load_dotenv
 
 # LangChain
@@ -15,13 +19,14 @@ from langchain_community.document_loaders import PDFMinerLoader, NotebookLoader,
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 try:
     from langchain.schema import Document as LCDocument
 except Exception:
     from langchain_core.documents import Document as LCDocument  # fallback
 
 # 프로젝트 유틸(JSONL 저장/로드)
-from utils import load_docs_from_jsonl, save_docs_to_jsonl
+from utils import load_docs_from_jsonl, save_docs_to_jsonl, json_loads
 
 load_dotenv()
 
@@ -51,6 +56,24 @@ BACKUP_BASE = BASE / "backup"
 
 SUPPORTED_EXTS = {".pdf", ".txt", ".ipynb", ".json", ".jsonl"}
 
+# 임베딩 요청 단위(OpenAI는 요청당 최대 2048 입력) / 동시 요청 수
+EMBED_TEXTS_PER_REQUEST = 512
+EMBED_CONCURRENCY = 4
+
+# FAISS 인덱스 종류(CLI --index-type)
+#   flat    = 정확 검색(IndexFlatL2)
+#   hnsw    = 근사 그래프 검색(IndexHNSWFlat)
+#   sq_fp16 = 벡터를 float16으로 저장(IndexScalarQuantizer QT_fp16, 메모리 1/2)
+#   sq8     = 벡터를 8bit로 저장(IndexScalarQuantizer QT_8bit, 메모리 1/4, 학습 필요)
+#   ivf     = 역색인 클러스터 검색(IndexIVFFlat, 학습 필요 — GPU가 있으면 GPU에서 학습)
+INDEX_TYPES = ("flat", "hnsw", "sq_fp16", "sq8", "ivf")
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+IVF_MAX_NLIST = 4096
+IVF_NPROBE = 32
+IVF_MAX_TRAIN = 200_000
+
 
 @dataclass
 class Overrides:
@@ -59,18 +82,32 @@ class Overrides:
     program: Optional[str] = None        # e.g., UG
     cohort: Optional[str] = None         # e.g., 2022 or Cohort_2022
     http_base: str = DEFAULT_HTTP_URI_BASE
+    index_type: str = "flat"             # 새로 만드는 FAISS 인덱스 종류(INDEX_TYPES)
+    # program/cohort 오버라이드의 정규형(main에서 1회 계산, 청크마다 재정규화하지 않음)
+    program_norm: Optional[str] = None
+    cohort_norm: Optional[str] = None
 
 
 # 전역 컨텍스트(각 함수에서 접근)
 CTX = Overrides()
 
 
+def _init_ctx(ctx_dict: dict) -> None:
+    """ProcessPool 워커 초기화: 부모 프로세스의 CTX 오버라이드를 복원"""
+    for k, v in ctx_dict.items():
+        setattr(CTX, k, v)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # 정규화/스키마 유틸
 # ─────────────────────────────────────────────────────────────────────────────
+_DIGITS_RE = re.compile(r"(\d+)")
+_COHORT_RE = re.compile(r"Cohort_(20\d{2})")
+_WS_TRANS = str.maketrans({"\x0c": " ", "\n": " "})
+_MULTISPACE = re.compile(r"\s{2,}")
+
 def _norm_spaces(s: str) -> str:
-    s = (s or "").replace("\x0c", " ").replace("\n", " ")
-    return re.sub(r"\s{2,}", " ", s).strip()
+    return _MULTISPACE.sub(" ", (s or "").translate(_WS_TRANS)).strip()
 
 def _make_source_prefix(filename: str) -> str:
     return f"Source : {filename}\n" if filename else ""
@@ -89,7 +126,7 @@ def _norm_cohort(v: Optional[str]) -> Optional[str]:
     if len(s) == 4 and s.startswith("20"):
         return f"Cohort_{s}"
     # 이미 Cohort_YYYY 라면 그대로 둘 수도 있지만, 일관성을 위해 변환만 허용
-    m = re.fullmatch(r"Cohort_(20\d{2})", str(v))
+    m = _COHORT_RE.fullmatch(str(v))
     if m:
         return f"Cohort_{m.group(1)}"
     return None
@@ -103,13 +140,13 @@ def _to_int(x) -> Optional[int]:
 def _parse_article_clause(md: dict) -> Tuple[Optional[int], Optional[int]]:
     a = md.get("articleNumber") or md.get("article_number") or md.get("articleNo") or md.get("article")
     if isinstance(a, str):
-        m = re.search(r"(\d+)", a)
+        m = _DIGITS_RE.search(a)
         a = m.group(1) if m else a
     a = _to_int(a)
 
     c = md.get("clauseNumber") or md.get("clause_no") or md.get("clause")
     if isinstance(c, str):
-        m = re.search(r"(\d+)", c)
+        m = _DIGITS_RE.search(c)
         c = m.group(1) if m else c
     c = _to_int(c)
 
@@ -119,8 +156,8 @@ def _infer_content_type(md: dict, page_content: str) -> str:
     ct = (md.get("content_type") or md.get("contentType") or "").strip().lower()
     if ct == "table":
         return "table"
-    # 간단한 마크다운 테이블 감지
-    if page_content and page_content.count("|") >= 4 and "\n| ---" in page_content:
+    # 간단한 마크다운 테이블 감지: 구분선이 없으면 파이프 개수는 셀 필요 없음
+    if page_content and "\n| ---" in page_content and page_content.count("|") >= 4:
         return "table"
     return "text"
 
@@ -132,19 +169,21 @@ def _build_http_uris(code: str, vdate: str, art: Optional[int], cl: Optional[int
     clause_uri = f"{article_uri}-cl{cl}" if cl is not None else None
     return article_uri, clause_uri
 
-def _compute_md5_from_text(text: str) -> str:
-    return hashlib.md5((text or "").encode("utf-8")).hexdigest()
+def _compute_fingerprint(text: str) -> str:
+    # 보안 용도가 아닌 내용 지문. 스키마(md5 필드)·다른 도구(process_pdf/upgrade_tables)와
+    # 값을 맞추기 위해 알고리즘은 MD5 유지
+    return hashlib.md5((text or "").encode("utf-8"), usedforsecurity=False).hexdigest()
 
-def _attach_uri_and_schema(meta: dict, page_content: str) -> dict:
+def _attach_uri_and_schema(m: dict, page_content: str) -> dict:
     """
     스키마 필수 필드 보강 + 오버라이드 적용 + URN/HTTP URI 동시 부여
+    (복사 없이 m을 제자리에서 수정하고 그대로 반환)
     """
-    m = dict(meta or {})
 
     # 0) 소스/지문
     if m.get("sourceFile") is None:
         m["sourceFile"] = m.get("filename") or None
-    m["md5"] = _compute_md5_from_text(page_content)
+    m["md5"] = _compute_fingerprint(page_content)
 
     # 1) 스키마 기본
     m.setdefault("schema_version", SCHEMA_VERSION)
@@ -175,10 +214,9 @@ def _attach_uri_and_schema(meta: dict, page_content: str) -> dict:
             m["page"] = page
 
     # 5) program/cohort 오버라이드 우선 → 정규화
-    program = CTX.program or m.get("program")
-    cohort  = CTX.cohort  or m.get("cohort") or m.get("year") or m.get("student_year")
-    m["program"] = _norm_program(program)
-    m["cohort"]  = _norm_cohort(cohort)
+    m["program"] = CTX.program_norm if CTX.program else _norm_program(m.get("program"))
+    m["cohort"]  = CTX.cohort_norm if CTX.cohort else _norm_cohort(
+        m.get("cohort") or m.get("year") or m.get("student_year"))
 
     # 6) contentType
     m["contentType"] = _infer_content_type(m, page_content)
@@ -221,6 +259,9 @@ def _attach_uri_and_schema(meta: dict, page_content: str) -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # 로더
 # ─────────────────────────────────────────────────────────────────────────────
+# 파일마다 새로 만들지 않도록 모듈 단위로 1회 생성(프로세스 풀 워커도 임포트 시 1회)
+_SPLITTER = RecursiveCharacterTextSplitter(chunk_size=2048, chunk_overlap=256)
+
 def _as_document(page_content: str, metadata: Optional[dict] = None) -> LCDocument:
     return LCDocument(page_content=page_content, metadata=metadata or {})
 
@@ -236,15 +277,13 @@ def _load_pdf_txt_ipynb(path: Path) -> List[LCDocument]:
     else:
         return []
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=2048, chunk_overlap=256)
-    splits = splitter.split_documents(docs)
+    splits = _SPLITTER.split_documents(docs)
 
     for d in splits:
-        meta = dict(d.metadata or {})
-        meta["filename"] = path.name
+        # split_documents가 청크마다 메타를 복사하므로 제자리 수정해도 안전
+        d.metadata["filename"] = path.name
         d.page_content = _make_source_prefix(path.name) + (d.page_content or "")
-        meta = _attach_uri_and_schema(meta, d.page_content)
-        d.metadata = meta
+        _attach_uri_and_schema(d.metadata, d.page_content)
     return splits
 
 def _coerce_json_obj_to_doc(obj: dict, default_fname: str) -> Optional[LCDocument]:
@@ -259,37 +298,50 @@ def _coerce_json_obj_to_doc(obj: dict, default_fname: str) -> Optional[LCDocumen
     filename  = md.get("filename") or (f"{doc_title}.pdf" if doc_title else default_fname)
     page_content = _make_source_prefix(filename) + _norm_spaces(str(text))
 
-    meta = dict(md)
-    meta["filename"] = filename
-    meta = _attach_uri_and_schema(meta, page_content)
-    return _as_document(page_content, meta)
+    # obj는 로더 내부에서만 쓰이므로 md를 복사하지 않고 그대로 보강
+    md["filename"] = filename
+    return _as_document(page_content, _attach_uri_and_schema(md, page_content))
+
+def _peek_first_byte(fh) -> bytes:
+    """공백을 건너뛴 첫 바이트를 확인하고 파일 포인터는 처음으로 되돌린다"""
+    while True:
+        b = fh.read(1)
+        if not b or not b.isspace():
+            break
+    fh.seek(0)
+    return b
 
 def _load_json_chunk(path: Path) -> List[LCDocument]:
     docs: List[LCDocument] = []
     try:
-        raw = path.read_text(encoding="utf-8").strip()
+        fh = path.open("rb")
     except Exception:
         return docs
 
-    # JSONL 스타일?
-    if "\n" in raw and not raw.lstrip().startswith(("{", "[")):
-        for line in raw.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-                d = _coerce_json_obj_to_doc(obj, default_fname=path.name)
-                if d: docs.append(d)
-            except Exception:
-                continue
-        return docs
-
-    # JSON (obj or array)
-    try:
-        data = json.loads(raw) if raw else {}
-    except Exception:
-        return docs
+    with fh:
+        first = _peek_first_byte(fh)
+        if not first:
+            return docs
+
+        # JSONL 스타일? → 한 줄씩 스트리밍 파싱(파일 전체를 메모리에 올리지 않음)
+        if path.suffix.lower() == ".jsonl" or first not in (b"{", b"["):
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json_loads(line)
+                    d = _coerce_json_obj_to_doc(obj, default_fname=path.name)
+                    if d: docs.append(d)
+                except Exception:
+                    continue
+            return docs
+
+        # JSON (obj or array)
+        try:
+            data = json_loads(fh.read())
+        except Exception:
+            return docs
 
     if isinstance(data, dict) and ("text" in data or "page_content" in data):
         d = _coerce_json_obj_to_doc(data, default_fname=path.name)
@@ -314,26 +366,190 @@ def _load_path_as_documents(path: Path) -> List[LCDocument]:
 # ─────────────────────────────────────────────────────────────────────────────
 # 수집/임베딩
 # ─────────────────────────────────────────────────────────────────────────────
-def _gather_files(root: Path) -> List[Path]:
-    if not root.exists():
-        return []
-    return [p for p in root.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED_EXTS]
+def _same_device(a: Path, b: Path) -> bool:
+    try:
+        return a.stat().st_dev == b.stat().st_dev
+    except OSError:
+        return False
+
+def _move_file(src: Path, dst: Path, same_dev: bool) -> None:
+    """같은 파일시스템이면 os.replace(단일 rename), 아니면 shutil.move(복사+삭제)"""
+    if same_dev:
+        try:
+            os.replace(src, dst)
+            return
+        except OSError:
+            pass  # 하위 디렉터리가 다른 마운트인 경우 등 → 일반 이동으로 폴백
+    shutil.move(str(src), str(dst))
 
-def _build_index_in_batches(splits: List[LCDocument], emb, docs_per_batch: int = 32) -> Optional[FAISS]:
-    total = len(splits)
-    if total == 0:
+def _gather_files(root: Path) -> List[Path]:
+    # os.scandir: 디렉터리당 1회 호출로 타입 정보까지 얻음 → 확장자가 맞는 항목만 Path 생성
+    out: List[Path] = []
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif os.path.splitext(e.name)[1].lower() in SUPPORTED_EXTS and e.is_file(follow_symlinks=False):
+                    out.append(Path(e.path))
+    return out
+
+@lru_cache(maxsize=1)
+def _get_emb() -> OpenAIEmbeddings:
+    # 카테고리/병합 단계 전체에서 하나의 클라이언트(HTTP 커넥션 풀)를 재사용
+    return OpenAIEmbeddings(model="text-embedding-3-large", max_retries=6, timeout=60)
+
+def _make_faiss_index(dim: int, n: int):
+    if CTX.index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH  # write_index로 함께 저장됨
+        return index
+    if CTX.index_type == "sq_fp16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+    if CTX.index_type == "sq8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    if CTX.index_type == "ivf":
+        # 클러스터당 최소 39개 학습 벡터(faiss 권장) 기준으로 nlist 상한 조정
+        nlist = max(1, min(IVF_MAX_NLIST, n // 39))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist, faiss.METRIC_L2)
+        index.nprobe = min(IVF_NPROBE, nlist)  # write_index로 함께 저장됨
+        return index
+    return faiss.IndexFlatL2(dim)
+
+def _train_and_add(index, arr: np.ndarray):
+    """
+    학습이 필요한 인덱스는 최대 IVF_MAX_TRAIN개 표본으로 학습 후 추가.
+    faiss-gpu가 설치돼 있고 GPU가 보이면 학습/추가를 GPU에서 수행하고 CPU 인덱스로 되돌린다.
+    """
+    if index.is_trained:
+        index.add(arr)
+        return index
+
+    sample = arr
+    if len(arr) > IVF_MAX_TRAIN:
+        rng = np.random.default_rng(0)
+        sample = arr[rng.choice(len(arr), IVF_MAX_TRAIN, replace=False)]
+
+    if getattr(faiss, "get_num_gpus", lambda: 0)() > 0:
+        res = faiss.StandardGpuResources()
+        gpu_index = faiss.index_cpu_to_gpu(res, 0, index)
+        gpu_index.train(sample)
+        gpu_index.add(arr)
+        return faiss.index_gpu_to_cpu(gpu_index)
+
+    index.train(sample)
+    index.add(arr)
+    return index
+
+def _build_index(splits: List[LCDocument], vecs: List[List[float]], emb) -> Optional[FAISS]:
+    if not splits:
         return None
-    vs_local = None
-    num_batches = math.ceil(total / docs_per_batch)
-    for bi in range(num_batches):
-        start, end = bi * docs_per_batch, min((bi + 1) * docs_per_batch, total)
-        batch = splits[start:end]
-        print(f"   → 인덱스 배치 {bi+1}/{num_batches} (문서 {len(batch)}개)")
-        if vs_local is None:
-            vs_local = FAISS.from_documents(batch, embedding=emb)
-        else:
-            vs_local.add_documents(batch)
-    return vs_local
+    arr = np.asarray(vecs, dtype="float32")
+    index = _train_and_add(_make_faiss_index(arr.shape[1], len(arr)), arr)
+
+    ids = [str(uuid.uuid4()) for _ in splits]
+    docstore = InMemoryDocstore({
+        _id: LCDocument(page_content=d.page_content, metadata=d.metadata) for _id, d in zip(ids, splits)
+    })
+    return FAISS(embedding_function=emb, index=index, docstore=docstore,
+                 index_to_docstore_id=dict(enumerate(ids)))
+
+def _merge_into(dst: FAISS, src: FAISS) -> None:
+    """
+    src의 벡터/문서를 dst에 추가. faiss의 merge_from은 Flat 계열끼리만 되므로
+    벡터를 복원(reconstruct)해 다시 add하는 방식으로 인덱스 종류와 무관하게 병합한다.
+    """
+    n = src.index.ntotal
+    if n == 0:
+        return
+    try:
+        vecs = src.index.reconstruct_n(0, n)
+    except RuntimeError:
+        # IVF 계열은 direct map이 있어야 복원 가능
+        faiss.extract_index_ivf(src.index).make_direct_map()
+        vecs = src.index.reconstruct_n(0, n)
+    ids = [src.index_to_docstore_id[i] for i in range(n)]
+    docs = [src.docstore.search(_id) for _id in ids]
+    dst.add_embeddings(
+        list(zip([d.page_content for d in docs], vecs)),
+        metadatas=[d.metadata for d in docs],
+        ids=ids,
+    )
+
+async def _load_and_embed(files: List[Path], root: Path, emb, category_slug: str,
+                          cohort: Optional[str]) -> Tuple[List[LCDocument], List[List[float]]]:
+    """
+    파싱(프로세스 풀)과 임베딩(네트워크)을 겹쳐서 수행하는 생산자-소비자 파이프라인.
+      - 파일별 로딩 결과를 정렬된 파일 순서대로 받아 청크를 누적
+      - 누적 청크가 EMBED_TEXTS_PER_REQUEST개 모이면 즉시 임베딩 요청을 띄움(동시 EMBED_CONCURRENCY개)
+      - 같은 md5(내용 지문)의 청크는 한 번만 임베딩하고 벡터를 공유
+      - 반환되는 벡터 순서는 청크 순서와 동일
+    """
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(EMBED_CONCURRENCY)
+    cohort_norm = _norm_cohort(cohort)
+
+    all_splits: List[LCDocument] = []
+    unique_idx: Dict[str, int] = {}   # md5 → 고유 텍스트 순번
+    order: List[int] = []             # 청크별 고유 텍스트 순번
+    pending: List[str] = []
+    embed_tasks: List[asyncio.Task] = []
+
+    async def _embed(batch: List[str]) -> List[List[float]]:
+        async with sem:
+            return await emb.aembed_documents(batch)
+
+    def _flush(force: bool = False) -> None:
+        while len(pending) >= EMBED_TEXTS_PER_REQUEST or (force and pending):
+            batch = pending[:EMBED_TEXTS_PER_REQUEST]
+            del pending[:EMBED_TEXTS_PER_REQUEST]
+            print(f"   → 임베딩 요청 {len(embed_tasks) + 1} (문서 {len(batch)}개)")
+            embed_tasks.append(asyncio.create_task(_embed(batch)))
+
+    # 파싱/분할은 CPU 바운드 → 파일 단위로 프로세스 풀에 분산
+    # (워커는 CTX를 initializer로 복원)
+    workers = max(1, min(len(files), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_ctx, initargs=(asdict(CTX),)) as ex:
+        futures = [loop.run_in_executor(ex, _load_path_as_documents, f) for f in files]
+
+        for i, (f, fut) in enumerate(zip(files, futures), 1):
+            rel = f.relative_to(root) if str(f).startswith(str(root)) else f.name
+            try:
+                docs = await fut
+            except Exception as e:
+                print(f"[{i}/{len(files)}] 로딩 실패: {rel} ({e})")
+                continue
+            print(f"[{i}/{len(files)}] 로딩/분할: {rel}")
+            if not docs:
+                print("   → 건너뜀(로더가 문서를 만들지 못함)")
+                continue
+            # 카테고리/코호트 메타 주입(스키마 보강은 로더에서 이미 1회 수행됨)
+            for d in docs:
+                d.metadata["category"] = category_slug
+                if cohort:
+                    d.metadata["cohort"] = cohort_norm
+            print(f"   → 청크 수: {len(docs)}")
+            all_splits.extend(docs)
+            for d in docs:
+                h = d.metadata.get("md5") or _compute_fingerprint(d.page_content)
+                if h not in unique_idx:  # 처음 본 내용만 임베딩 대기열로
+                    unique_idx[h] = len(unique_idx)
+                    pending.append(d.page_content)
+                order.append(unique_idx[h])
+            _flush()
+
+    _flush(force=True)
+    parts = await asyncio.gather(*embed_tasks)
+    unique_vecs = [v for part in parts for v in part]
+    if len(unique_vecs) < len(order):
+        print(f"   → 중복 청크 {len(order) - len(unique_vecs)}개는 임베딩 재사용")
+    return all_splits, [unique_vecs[i] for i in order]
 
 def _process_category(category_slug: str, cohort: Optional[str], source_dir: Optional[Path]) -> Tuple[List[LCDocument], Optional[FAISS]]:
     """
@@ -341,7 +557,7 @@ def _process_category(category_slug: str, cohort: Optional[str], source_dir: Opt
       - source_dir가 주어지면 그 경로에서 직접 수집
       - 아니면 기본 todo_documents/<category>[/<cohort>]
     """
-    emb = OpenAIEmbeddings(model="text-embedding-3-large")
+    emb = _get_emb()
 
     if source_dir:
         root = source_dir
@@ -359,39 +575,25 @@ def _process_category(category_slug: str, cohort: Optional[str], source_dir: Opt
         print(f"[{label}] 처리할 파일이 없습니다: {label_suffix}")
         return [], None
 
-    all_splits: List[LCDocument] = []
-    for i, f in enumerate(sorted(files), 1):
-        rel = f.relative_to(root) if str(f).startswith(str(root)) else f.name
-        print(f"[{i}/{len(files)}] 로딩/분할: {rel}")
+    files = sorted(files)
+    all_splits, vecs = asyncio.run(_load_and_embed(files, root, emb, category_slug, cohort))
+
+    # 파일 이동은 파이프라인 종료 후 메인 프로세스에서 직렬로 수행
+    # source_dir로 주어진 경우에도 past_documents로 이동(중복 인덱싱 방지)
+    same_dev = _same_device(root, past_dir)
+    for f in files:
         try:
-            docs = _load_path_as_documents(f)
-            # 카테고리/코호트 메타 주입 + 오버라이드 재보정
-            for d in docs:
-                meta = dict(d.metadata or {})
-                meta["category"] = category_slug
-                if cohort:
-                    meta["cohort"] = cohort
-                meta = _attach_uri_and_schema(meta, d.page_content)
-                d.metadata = meta
-            if docs:
-                print(f"   → 청크 수: {len(docs)}")
-                all_splits.extend(docs)
-            else:
-                print("   → 건너뜀(로더가 문서를 만들지 못함)")
-        finally:
-            # source_dir로 주어진 경우에도 past_documents로 이동(중복 인덱싱 방지)
-            try:
-                target = past_dir / f.name
-                if f.resolve() != target.resolve():
-                    shutil.move(str(f), str(target))
-            except Exception as e:
-                print(f"   → 이동 실패: {e}")
+            target = past_dir / f.name
+            if f.resolve() != target.resolve():
+                _move_file(f, target, same_dev)
+        except Exception as e:
+            print(f"   → 이동 실패({f.name}): {e}")
 
     if not all_splits:
         print(f"[{CATEGORIES[category_slug]}] 생성된 청크가 없습니다. 인덱스를 저장하지 않습니다.")
         return [], None
 
-    vs_new = _build_index_in_batches(all_splits, emb, docs_per_batch=32)
+    vs_new = _build_index(all_splits, vecs, emb)
     return all_splits, vs_new
 
 
@@ -414,17 +616,18 @@ def _merge_and_save(category_slug: str, docs: List[LCDocument], vectorstore: Opt
     # 기존 인덱스 → 병합 후 백업
     if index_faiss.exists() and index_pkl.exists():
         print("기존 인덱스 발견 → 병합 후 백업")
-        emb = OpenAIEmbeddings(model="text-embedding-3-large")
+        emb = _get_emb()
         past_vs = FAISS.load_local(str(faiss_dir), embeddings=emb, allow_dangerous_deserialization=True)
         if vectorstore is None:
             vectorstore = past_vs
         else:
-            vectorstore.merge_from(past_vs)
+            _merge_into(vectorstore, past_vs)
 
         bdir = BACKUP_BASE / category_slug / (cohort if cohort else "all") / ts
         bdir.mkdir(parents=True, exist_ok=True)
-        shutil.move(str(index_faiss), str(bdir / "index.faiss"))
-        shutil.move(str(index_pkl),   str(bdir / "index.pkl"))
+        same_dev = _same_device(faiss_dir, bdir)
+        _move_file(index_faiss, bdir / "index.faiss", same_dev)
+        _move_file(index_pkl,   bdir / "index.pkl",   same_dev)
 
     if vectorstore is None:
         print("저장할 벡터스토어가 없습니다. 저장을 건너뜁니다.")
@@ -444,7 +647,7 @@ def _merge_and_save(category_slug: str, docs: List[LCDocument], vectorstore: Opt
         merged_docs.extend(past_docs)
         bdir = BACKUP_BASE / category_slug / (cohort if cohort else "all") / ts
         bdir.mkdir(parents=True, exist_ok=True)
-        shutil.move(str(doc_jsonl), str(bdir / "doc.jsonl"))
+        _move_file(doc_jsonl, bdir / "doc.jsonl", _same_device(docs_dir, bdir))
 
     save_docs_to_jsonl(merged_docs, str(doc_jsonl))
     print(f"문서 메타 저장: {doc_jsonl}")
@@ -471,6 +674,10 @@ def main():
     parser.add_argument("--version", dest="version_date", help="versionDate(YYYY-MM-DD) 오버라이드")
     parser.add_argument("--program", help="program 오버라이드(UG/MS/PHD/IME_MS/IME_PHD)")
 
+    # FAISS 인덱스 종류
+    parser.add_argument("--index-type", dest="index_type", choices=INDEX_TYPES, default="flat",
+                        help="새 인덱스 종류: flat(정확, 기본) / hnsw(근사 그래프 검색) / sq_fp16·sq8(스칼라 양자화로 메모리 절감) / ivf(역색인, 대규모 코퍼스용)")
+
     # HTTP URI 베이스 네임스페이스
     parser.add_argument("--http-base", dest="http_base", default=DEFAULT_HTTP_URI_BASE,
                         help=f"HTTP 영구 URI 네임스페이스 (기본: {DEFAULT_HTTP_URI_BASE})")
@@ -483,6 +690,9 @@ def main():
     CTX.program       = args.program or None
     CTX.cohort        = args.cohort or None
     CTX.http_base     = args.http_base or DEFAULT_HTTP_URI_BASE
+    CTX.index_type    = args.index_type
+    CTX.program_norm  = _norm_program(CTX.program)
+    CTX.cohort_norm   = _norm_cohort(CTX.cohort)
 
     # 대상 카테고리들
     targets = list(CATEGORIES.keys()) if args.all else [args.category]
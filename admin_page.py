@@ -8,20 +8,51 @@ import io
 import json
 import os
 import re
-import tempfile
 import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
 from zoneinfo import ZoneInfo
 
+import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
 
+import numpy as np
+import pandas as pd  # streamlit의 필수 의존성
+
+try:
+    import orjson  # 선택: 설치돼 있으면 JSON 디코드/인코드 가속
+    _json_loads = orjson.loads  # orjson.JSONDecodeError는 json.JSONDecodeError의 하위 클래스
+
+    def _json_dumps_pretty(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps_pretty(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
 try:
-    import pandas as pd
-except Exception:
-    pd = None
+    import ijson  # 선택: 거대한 JSON 배열을 항목 단위로 증분 파싱
+except ImportError:
+    ijson = None
 
 KST = ZoneInfo("Asia/Seoul")
+_PY311 = sys.version_info >= (3, 11)
+
+_WS_RE = re.compile(r"\s+")
+_SRC_LINE_RE = re.compile(r"^\s*Source\s*:?", re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def _src_prefix_re(fn: str) -> re.Pattern:
+    # 예) "Source : XXX.pdf ..." 또는 "Source: XXX.pdf ..."
+    return re.compile(rf'^\s*Source\s*:?\s*{re.escape(fn)}\s*:?\s*', re.IGNORECASE)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Config (paths & secrets)
@@ -31,8 +62,10 @@ JSON_PATH = st.secrets.get("json_path", JSON_PATH_DEFAULT)
 
 GH_PAT = st.secrets.get("gh_pat")  # Fine-grained token
 GH_REPO = st.secrets.get("private_repo")  # e.g. "khu-aimslab/secret-logs"
-GH_PATH = st.secrets.get("private_path")  # e.g. "shrink_langsmith_json.json"
+GH_PATH = st.secrets.get("private_path")  # e.g. "shrink_langsmith_json.json" 또는 경로 리스트
+GH_PATHS: Tuple[str, ...] = (GH_PATH,) if isinstance(GH_PATH, str) else tuple(GH_PATH or ())
 GH_REF = st.secrets.get("private_ref", "")  # optional branch/tag/commit
+GH_TRANSPORT = st.secrets.get("private_transport", "api")  # "api" | "git" (api.github.com 차단 환경)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Auth
@@ -69,7 +102,10 @@ def _topbar(source_label: str):
     with mid:
         if st.button("🔄 Refresh (ignore cache)"):
             _fetch_private_json.clear()
+            _build_downloads.clear()
             _load_local_items.clear()
+            _private_rows.clear()
+            _local_rows.clear()
             st.rerun()
     with right:
         st.button("Log out", on_click=_logout)
@@ -80,14 +116,14 @@ def _topbar(source_label: str):
 def _safe_parse_dt(x: Any) -> Optional[datetime]:
     if not x:
         return None
-    s = str(x).strip().replace("Z", "+00:00")
+    s = (x if isinstance(x, str) else str(x)).strip()
+    if not _PY311 and "Z" in s:  # 3.11+ fromisoformat은 'Z'를 직접 처리
+        s = s.replace("Z", "+00:00")
     try:
         dt = datetime.fromisoformat(s)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt
-    except Exception:
+    except ValueError:
         return None
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
     
 def _basename_like(s: Any) -> str:
     """
@@ -96,15 +132,16 @@ def _basename_like(s: Any) -> str:
     """
     if not s:
         return ""
+    return _basename_of(s if isinstance(s, str) else str(s))
+
+@lru_cache(maxsize=2048)  # RAG 출력에서 같은 source가 반복됨
+def _basename_of(s: str) -> str:
+    t = s.strip().strip('"').strip("'")
     try:
-        t = str(s).strip().strip('"').strip("'")
-        # 쿼리스트립
-        t = t.split("?", 1)[0].split("#", 1)[0]
-        # 경로 베이스네임
-        t = t.split("/")[-1].split("\\")[-1]
-        return t
-    except Exception:
-        return str(s)
+        t = urlsplit(t).path or t  # 쿼리/프래그먼트 제거
+    except ValueError:
+        return s
+    return t.rsplit("/", 1)[-1].rsplit("\\", 1)[-1]
     
 def _format_contexts(ctxs: Any, max_items: int = 5) -> str:
     if not isinstance(ctxs, list) or not ctxs:
@@ -117,11 +154,10 @@ def _format_contexts(ctxs: Any, max_items: int = 5) -> str:
 
         # 1) "Source : 파일명" 접두사 제거
         if fn:
-            # 예) "Source : XXX.pdf ..." 또는 "Source: XXX.pdf ..."
-            sn = re.sub(rf'^\s*Source\s*:?\s*{re.escape(fn)}\s*:?\s*', '', sn, flags=re.IGNORECASE)
+            sn = _src_prefix_re(fn).sub('', sn)
 
         # 2) 과도한 공백 정리
-        sn = re.sub(r'\s+', ' ', sn).strip()
+        sn = _WS_RE.sub(' ', sn).strip()
 
         head = fn if fn else "문서"
         if pg:
@@ -130,101 +166,95 @@ def _format_contexts(ctxs: Any, max_items: int = 5) -> str:
     return "\n".join(parts)
 
 def _extract_contexts_from_outputs(run: Dict[str, Any], topk: int = 5) -> List[Dict[str, Any]]:
+    # 수집 + 중복 제거 + topk를 한 번에 (topk개 모이면 즉시 종료)
     outs = _as_dict(run.get("outputs"))
-    out = []
-    def harvest(seq):
-        for d in (seq or []):
+    seen, uniq = set(), []
+    for k in ("context", "documents", "source_documents"):
+        seq = outs.get(k)
+        if not isinstance(seq, list):
+            continue
+        for d in seq:
+            if len(uniq) >= topk:
+                return uniq
             try:
                 if isinstance(d, dict):
                     meta = _as_dict(d.get("metadata"))
-                    fname = meta.get("filename") or _basename_like(meta.get("source"))
+                    fname = meta.get("filename") or _basename_like(meta.get("source")) or ""
                     page  = meta.get("page") or meta.get("page_number") or ""
                     text  = d.get("page_content") or d.get("content") or ""
                 else:
                     fname, page, text = "", "", str(d)
-                if text:
-                    out.append({"filename": (fname or ""), "page": page, "snippet": text})
+                if not text:
+                    continue
+                key = (fname, page, text[:120])
+                if key in seen:
+                    continue
+                seen.add(key)
             except Exception:
                 continue
-    for k in ("context", "documents", "source_documents"):
-        v = outs.get(k)
-        if isinstance(v, list) and v:
-            harvest(v)
-    # dedup & topk
-    seen, uniq = set(), []
-    for x in out:
-        key = (x.get("filename",""), x.get("page",""), x.get("snippet","")[:120])
-        if key in seen: 
-            continue
-        seen.add(key); uniq.append(x)
-    return uniq[:topk]
+            uniq.append({"filename": fname, "page": page, "snippet": text})
+    return uniq
 
-def _to_rows_from_runs(reps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _to_rows_from_runs(reps: List[Tuple[Extracted, Dict[str, Any]]]) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
-    for r in reps:
-        ts = _safe_parse_dt(r.get("start_time")) or _safe_parse_dt(r.get("end_time"))
+    for e, r in reps:
+        ts = e.start or e.end
         if ts:
             ts = ts.astimezone(KST)
         sid = _extract_member_id(r)
-        q = _normalize_text(_extract_question(r))
-        a = _strip_source_lines(_extract_answer(r))
-
-        # 🔹 추가: outputs에서 참고문서 뽑기
-        ctxs = _extract_contexts_from_outputs(r, topk=5)
-        ctx_str = _format_contexts(ctxs, max_items=5)
+        q = _normalize_text(e.q)
+        a = _strip_source_lines(e.a)
 
         rows.append({
             "ts": ts,
-            "시각(KST)": ts.strftime("%Y-%m-%d %H:%M:%S") if ts else "",
             "ID": sid,
-            "질문": _clip(q, 500),
-            "답변": _clip(a, 800),
-            "참고문서": ctx_str,      # 표 표시
             "_q_full": q,
             "_a_full": a,
-            "_contexts": ctxs,        # 다운로드용
+            "_contexts": _extract_contexts_from_outputs(r, topk=5),  # outputs에서 참고문서 뽑기
         })
-    ...
+    return rows
 
 
 def _as_dict(x: Any) -> Dict[str, Any]:
     return x if isinstance(x, dict) else {}
 
 def _dig(d: Dict[str, Any], *keys) -> Any:
-    cur = d
+    # 로그는 JSON 디코드 결과라 정확히 dict: type 비교가 isinstance보다 빠름
     for k in keys:
-        if not isinstance(cur, dict):
+        if type(d) is not dict:
             return None
-        cur = cur.get(k)
-    return cur
+        d = d.get(k)
+        if d is None:
+            return None
+    return d
 
 def _clip(s: Any, n: int) -> str:
-    try:
-        if isinstance(s, str):
-            t = s
-        elif isinstance(s, (dict, list)):
+    if isinstance(s, str):
+        t = s
+    elif isinstance(s, (dict, list)):
+        try:
             t = json.dumps(s, ensure_ascii=False)
-        else:
+        except (TypeError, ValueError):
             t = str(s)
-    except Exception:
+    else:
         t = str(s)
     return (t[: n - 1] + "…") if len(t) > n else t
 
 def _normalize_text(s: str) -> str:
     s = (s or "").strip()
-    s = re.sub(r"\s+", " ", s)
+    s = _WS_RE.sub(" ", s)
     return s
 
 def _strip_source_lines(ans: str) -> str:
     if not isinstance(ans, str):
         return ans
-    lines = [ln for ln in ans.splitlines() if not re.match(r"^\s*Source\s*:?", ln, flags=re.I)]
+    lines = [ln for ln in ans.splitlines() if not _SRC_LINE_RE.match(ln)]
     return "\n".join(lines).strip()
 
 def _answers_like_source_only(ans: str) -> bool:
     if not isinstance(ans, str) or not ans.strip():
         return True
-    return bool(re.match(r"^\s*Source\s*:?", ans.strip(), flags=re.I))
+    return bool(_SRC_LINE_RE.match(ans.strip()))
 
 def _get_depth(run: Dict[str, Any]) -> int:
     md = _dig(run, "extra", "metadata") or {}
@@ -236,53 +266,133 @@ def _get_depth(run: Dict[str, Any]) -> int:
 # ─────────────────────────────────────────────────────────────────────────────
 # Private GitHub fetch (cached)
 # ─────────────────────────────────────────────────────────────────────────────
-@st.cache_data(show_spinner=False)
-def _fetch_private_json(pat: str, repo: str, path: str, ref: str = "") -> List[Any]:
+GH_API = "https://api.github.com"
+
+def _unwrap_items(data: Any) -> List[Any]:
+    if isinstance(data, dict):
+        data = data.get("runs") or data.get("data") or data.get("items") or []
+    return data if isinstance(data, list) else []
+
+def _iter_json_items(f: io.BufferedReader) -> Iterator[Any]:
     """
-    Shallow-clone a private repo and load JSON/JSONL file.
+    바이너리 스트림에서 항목을 순차 yield.
+    - 첫 바이트 '[' → JSON 배열 (ijson 있으면 증분 파싱)
+    - 그 외 → JSONL로 줄 단위 파싱. 첫 줄이 파싱 안 되면(여러 줄 JSON 객체) 전체를 한 문서로 파싱
+      한 줄짜리 단일 객체면 {"runs"|"data"|"items": [...]} 래퍼로 간주
     """
+    if f.peek(64).lstrip()[:1] == b"[":
+        if ijson is not None:
+            yield from ijson.items(f, "item", use_float=True)
+        else:
+            yield from _unwrap_items(_json_loads(f.read()))
+        return
+
+    first: Any = None
+    has_first = False
+    for line in f:
+        if not line.strip():
+            continue
+        if not has_first:
+            try:
+                first = _json_loads(line)
+            except json.JSONDecodeError:
+                yield from _unwrap_items(_json_loads(line + f.read()))
+                return
+            has_first = True
+            continue
+        if first is not None:
+            yield first
+            first = None
+        yield _json_loads(line)
+    if has_first and first is not None:
+        # 비어 있지 않은 줄이 하나뿐 → 단일 JSON 문서
+        yield from _unwrap_items(first)
+
+
+GH_MAX_WORKERS = 8
+
+# TCP/TLS 연결 재사용 (경로 여러 개면 병렬 요청이 같은 풀을 공유)
+_GH_SESSION = requests.Session()
+_GH_SESSION.mount("https://", HTTPAdapter(pool_connections=GH_MAX_WORKERS, pool_maxsize=GH_MAX_WORKERS))
+
+def _fetch_private_file(pat: str, repo: str, path: str, ref: str = "") -> List[Any]:
+    """
+    Fetch a single JSON/JSONL file from a private repo via the GitHub Contents API (raw media type).
+    """
+    r = _GH_SESSION.get(
+        f"{GH_API}/repos/{repo}/contents/{path.lstrip('/')}",
+        stream=True,
+        params={"ref": ref} if ref else None,
+        headers={
+            "Authorization": f"Bearer {pat}",
+            "Accept": "application/vnd.github.raw",
+            "X-GitHub-Api-Version": "2022-11-28",
+        },
+        timeout=30,
+    )
+    # 에러로 빠져나가도 스트리밍 연결이 풀에 반환되도록 상태 확인도 with 안에서
+    with r:
+        if r.status_code == 404:
+            raise FileNotFoundError(f"File not found in repo: {path}")
+        r.raise_for_status()
+
+        # Read JSON or JSONL (스트리밍: 응답 전체를 bytes로 들고 있지 않음)
+        r.raw.decode_content = True
+        return list(_iter_json_items(io.BufferedReader(r.raw)))
+
+def _fetch_private_file_git(pat: str, repo: str, path: str, ref: str = "") -> List[Any]:
+    """
+    Fetch a single JSON/JSONL file over the git protocol (for networks that block api.github.com).
+    Blob-less shallow partial clone → only the target file's blob is downloaded.
+    """
+    path = path.lstrip("/")
     with tempfile.TemporaryDirectory() as td:
-        url = f"https://{pat}@github.com/{repo}.git"
-        cmd = ["git", "clone", "--depth", "1"]
+        cmd = ["git", "clone", "--quiet", "--depth", "1", "--filter=blob:none", "--no-checkout"]
         if ref:
             cmd += ["--branch", ref]
-        cmd += [url, td]
-        subprocess.check_call(cmd)
-        fpath = os.path.join(td, path)
-        if not os.path.isfile(fpath):
+        cmd += [f"https://{pat}@github.com/{repo}.git", td]
+        # 예외 메시지에 토큰 포함 URL이 노출되지 않도록 CalledProcessError 대신 직접 확인
+        if subprocess.run(cmd, capture_output=True).returncode != 0:
+            raise RuntimeError(f"git clone failed: {repo}")
+        ls = subprocess.run(["git", "-C", td, "ls-tree", "--name-only", "HEAD", "--", path],
+                            capture_output=True, text=True)
+        if not ls.stdout.strip():
             raise FileNotFoundError(f"File not found in repo: {path}")
+        # promisor에서 이 blob 하나만 지연 fetch, stdout을 그대로 스트리밍 파싱
+        with subprocess.Popen(["git", "-C", td, "cat-file", "blob", f"HEAD:{path}"],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+            items = list(_iter_json_items(proc.stdout))
+        if proc.returncode != 0:
+            raise RuntimeError(f"git cat-file failed: {path}")
+        return items
 
-        # Read JSON or JSONL
-        with open(fpath, "r", encoding="utf-8") as f:
-            txt = f.read()
-        try:
-            data: Any = json.loads(txt)
-        except json.JSONDecodeError:
-            data = [json.loads(line) for line in txt.splitlines() if line.strip()]
-        if isinstance(data, dict):
-            data = data.get("runs") or data.get("data") or data.get("items") or []
-        if not isinstance(data, list):
-            data = []
-        return data
+@st.cache_data(show_spinner=False)
+def _fetch_private_json(pat: str, repo: str, paths: Tuple[str, ...], ref: str = "", transport: str = "api") -> List[Any]:
+    """여러 경로는 스레드 풀로 동시에 받아 순서대로 이어 붙임"""
+    fetch = _fetch_private_file_git if transport == "git" else _fetch_private_file
+    if len(paths) == 1:
+        return fetch(pat, repo, paths[0], ref)
+    with ThreadPoolExecutor(max_workers=min(GH_MAX_WORKERS, len(paths))) as ex:
+        parts = list(ex.map(lambda p: fetch(pat, repo, p, ref), paths))
+    return [x for part in parts for x in part]
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Local load (cached)
 # ─────────────────────────────────────────────────────────────────────────────
+def _file_sig(path: str) -> Tuple[float, int]:
+    try:
+        stt = os.stat(path)
+    except OSError:
+        return 0.0, -1
+    return stt.st_mtime, stt.st_size
+
 @st.cache_data(show_spinner=False)
-def _load_local_items(path: str) -> List[Any]:
+def _load_local_items(path: str, mtime: float = 0.0, size: int = -1) -> List[Any]:
+    # mtime/size는 캐시 키 용도: 파일이 바뀌면 새로 읽음
     if not os.path.exists(path):
         return []
-    with open(path, "r", encoding="utf-8") as f:
-        txt = f.read()
-    try:
-        data: Any = json.loads(txt)  # JSON array or dict
-    except json.JSONDecodeError:
-        data = [json.loads(line) for line in txt.splitlines() if line.strip()]
-    if isinstance(data, dict):
-        data = data.get("runs") or data.get("data") or []
-    if not isinstance(data, list):
-        data = []
-    return data
+    with open(path, "rb") as f:
+        return list(_iter_json_items(f))
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Q/A extractors (for full LangSmith runs)
@@ -330,94 +440,192 @@ def _extract_messages_from_llm(run: Dict[str, Any]) -> List[Dict[str, Any]]:
             out.append({"role": "unknown", "content": _clip(m, 400)})
     return out
 
-def _extract_question(run: Dict[str, Any]) -> str:
-    v = _dig(run, "inputs", "input")
-    if isinstance(v, str) and v.strip():
-        return v
-    msgs = _extract_messages_from_llm(run)
-    for m in reversed(msgs):
+def _path_getter(*path):
+    def get(run: Dict[str, Any]) -> str:
+        v = _dig(run, *path)
+        return v if isinstance(v, str) and v.strip() else ""
+    return get
+
+def _question_from_messages(run: Dict[str, Any]) -> str:
+    for m in reversed(_extract_messages_from_llm(run)):
         if (m.get("role") or "").lower() in {"user", "human"} and m.get("content"):
             return str(m["content"])
-    for k in ["question", "query", "prompt"]:
-        v = _dig(run, "inputs", k)
-        if isinstance(v, str) and v.strip():
-            return v
     return ""
 
-def _extract_answer(run: Dict[str, Any]) -> str:
-    v = _dig(run, "outputs", "answer")
-    if isinstance(v, str) and v.strip():
+# 필드 후보(우선순위 순). 한 배포의 로그는 거의 같은 모양이므로 직전에 성공한 후보를
+# 먼저 시도(_SCHEMA_HINT)하되, 결과는 항상 우선순위 순 첫 매치와 같아야 함
+# (힌트가 맞아도 더 앞선 후보가 모두 비어 있을 때만 채택 → 레코드 순서와 무관)
+_Q_GETTERS = (
+    _path_getter("inputs", "input"),
+    _question_from_messages,
+    _path_getter("inputs", "question"),
+    _path_getter("inputs", "query"),
+    _path_getter("inputs", "prompt"),
+)
+_A_GETTERS = (
+    _path_getter("outputs", "answer"),
+    _path_getter("outputs"),
+    _path_getter("outputs", "generations", 0, 0, "text"),
+    _path_getter("outputs", "content"),
+    _path_getter("outputs", "output"),
+)
+_SCHEMA_HINT = {"q": 0, "a": 0}
+
+def _first_with_hint(run: Dict[str, Any], getters: Tuple, slot: str) -> str:
+    h = _SCHEMA_HINT[slot]
+    v = getters[h](run)
+    if v:
+        for i, get in enumerate(getters[:h]):
+            hv = get(run)
+            if hv:
+                _SCHEMA_HINT[slot] = i
+                return hv
         return v
-    out = run.get("outputs")
-    if isinstance(out, str) and out.strip():
-        return out
-    if isinstance(out, dict):
-        gen = _dig(out, "generations", 0, 0, "text")
-        if isinstance(gen, str) and gen.strip():
-            return gen
-        content = out.get("content")
-        if isinstance(content, str) and content.strip():
-            return content
-        outp = out.get("output")
-        if isinstance(outp, str) and outp.strip():
-            return outp
+    for i, get in enumerate(getters):
+        if i == h:
+            continue
+        v = get(run)
+        if v:
+            _SCHEMA_HINT[slot] = i
+            return v
     return ""
 
-def _score_for_qa(run: Dict[str, Any]) -> Tuple:
-    rt = (run.get("run_type") or "").lower()
-    depth = _get_depth(run)
-    has_q = bool(_extract_question(run))
-    ans = _extract_answer(run)
-    has_ans = bool(ans)
-    bad_ans = _answers_like_source_only(ans)
-    end = _safe_parse_dt(run.get("end_time")) or _safe_parse_dt(run.get("start_time")) or datetime.min.replace(tzinfo=timezone.utc)
-    return (100 if rt == "chain" else 0, -depth, 20 if has_q else 0, 40 if has_ans else 0, -30 if bad_ans else 0, end.timestamp())
-
-def _select_representative_runs(runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    by_trace: Dict[str, List[Dict[str, Any]]] = {}
-    for r in runs:
-        by_trace.setdefault(r.get("trace_id") or "", []).append(r)
-    selected: List[Dict[str, Any]] = []
-    for _, group in by_trace.items():
-        best = max(group, key=_score_for_qa)
-        selected.append(best)
-    return selected
+def _extract_question(run: Dict[str, Any]) -> str:
+    return _first_with_hint(run, _Q_GETTERS, "q")
+
+def _extract_answer(run: Dict[str, Any]) -> str:
+    return _first_with_hint(run, _A_GETTERS, "a")
+
+@dataclass
+class Extracted:
+    """run 1개에서 점수/행 생성에 쓰는 값을 한 번만 뽑아 둔 것"""
+    q: str
+    a: str
+    start: Optional[datetime]
+    end: Optional[datetime]
+    depth: int
+    rtype: str
+
+def _extract_all(run: Dict[str, Any]) -> Extracted:
+    return Extracted(
+        q=_extract_question(run),
+        a=_extract_answer(run),
+        start=_safe_parse_dt(run.get("start_time")),
+        end=_safe_parse_dt(run.get("end_time")),
+        depth=_get_depth(run),
+        rtype=(run.get("run_type") or "").lower(),
+    )
+
+_DT_MIN_UTC = datetime.min.replace(tzinfo=timezone.utc)
+
+def _score_for_qa(e: Extracted) -> Tuple:
+    has_ans = bool(e.a)
+    bad_ans = _answers_like_source_only(e.a)
+    end = e.end or e.start or _DT_MIN_UTC
+    return (100 if e.rtype == "chain" else 0, -e.depth, 20 if e.q else 0, 40 if has_ans else 0, -30 if bad_ans else 0, end.timestamp())
+
+def _select_representative_runs(extracted: List[Tuple[Extracted, Dict[str, Any]]]) -> List[Tuple[Extracted, Dict[str, Any]]]:
+    # trace_id별 (최고 점수, (추출값, run))만 유지하는 단일 패스 (동점이면 먼저 나온 run 유지 = max()와 동일)
+    best: Dict[str, Tuple[Tuple, Tuple[Extracted, Dict[str, Any]]]] = {}
+    for pair in extracted:
+        tid = pair[1].get("trace_id") or ""
+        s = _score_for_qa(pair[0])
+        cur = best.get(tid)
+        if cur is None or s > cur[0]:
+            best[tid] = (s, pair)
+    return [p for _, p in best.values()]
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Q/A rows coercion (handles minimal JSON as well)
 # ─────────────────────────────────────────────────────────────────────────────
-def _coerce_to_rows(items: List[Any]) -> List[Dict[str, Any]]:
+# 캐시되는 행 DataFrame은 원본 필드만 보관. 표시용 컬럼(VIEW_COLUMNS)은
+# _with_view_columns로 현재 페이지/다운로드 대상 행에만 계산
+ROW_COLUMNS = ["ts", "ID", "_q_full", "_a_full", "_contexts"]
+VIEW_COLUMNS = ["시각(KST)", "ID", "질문", "답변", "참고문서"]
+
+_SRC_LINES_RE = r"(?im)^[ \t]*Source[ \t]*:?[^\n]*(?:\n|$)"
+
+# pandas 2는 첫 값으로 포맷을 추론해 형식이 섞인 ISO 문자열을 NaT로 만들므로 ISO8601 혼합 파싱을 명시
+_TO_DT_KW = {"format": "ISO8601"} if int(pd.__version__.split(".", 1)[0]) >= 2 else {}
+
+def _clip_series(s: pd.Series, n: int) -> pd.Series:
+    return s.where(s.str.len() <= n, s.str.slice(0, n - 1) + "…")
+
+def _rows_from_minimal(items: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    최소 JSON({question, answer, ts, id, contexts}) → 행 DataFrame.
+    원시 필드만 한 번 뽑고, 날짜 파싱/정규화는 pandas 벡터 연산으로 처리.
+    """
+    ts_raw = pd.Series([x.get("ts") or x.get("timestamp") or x.get("time") for x in items], dtype=object)
+    ts = pd.to_datetime(ts_raw, utc=True, errors="coerce", **_TO_DT_KW).dt.tz_convert(KST)
+
+    q = (pd.Series([x.get("question") for x in items], dtype=object).fillna("").astype(str)
+         .str.strip().str.replace(r"\s+", " ", regex=True))
+    a = (pd.Series([x.get("answer") for x in items], dtype=object).fillna("").astype(str)
+         .str.replace(_SRC_LINES_RE, "", regex=True).str.strip())
+    ctxs = [x.get("contexts") or [] for x in items]
+
+    return pd.DataFrame({
+        "ts": ts,
+        "ID": ["" if x.get("id") is None else str(x.get("id")) for x in items],
+        "_q_full": q,
+        "_a_full": a,
+        "_contexts": ctxs,  # 다운로드용 원본
+    }, columns=ROW_COLUMNS)
+
+def _with_view_columns(df: pd.DataFrame) -> pd.DataFrame:
+    return df.assign(**{
+        "시각(KST)": df["ts"].dt.strftime("%Y-%m-%d %H:%M:%S").fillna(""),
+        "질문": _clip_series(df["_q_full"], 500),
+        "답변": _clip_series(df["_a_full"], 800),
+        "참고문서": [_format_contexts(c, max_items=5) for c in df["_contexts"]],
+    })
+
+def _add_filter_columns(df: pd.DataFrame) -> pd.DataFrame:
+    # 필터용 보조 컬럼을 한 번만 계산: KST 날짜(datetime64[D], 결측=NaT) / 소문자 ID
+    df["_day"] = df["ts"].dt.tz_localize(None).to_numpy().astype("datetime64[D]")
+    df["_id_lower"] = df["ID"].str.lower()
+    return df
+
+def _coerce_to_rows(items: List[Any]) -> pd.DataFrame:
     if items and isinstance(items, list) and isinstance(items[0], dict) and (
         "question" in items[0] and "answer" in items[0]
     ):
-        rows: List[Dict[str, Any]] = []
-        for x in items:
-            ts = _safe_parse_dt(x.get("ts") or x.get("timestamp") or x.get("time"))
-            if ts:
-                ts = ts.astimezone(KST)
-            q = _normalize_text(str(x.get("question", "")))
-            a = _strip_source_lines(str(x.get("answer", "")))
-            rid = str(x.get("id", "")) if x.get("id") is not None else ""
-
-            # 🔹 여기 추가: contexts 표시용
-            ctxs = x.get("contexts") or []
-            ctx_str = _format_contexts(ctxs, max_items=5)
-
-            rows.append({
-                "ts": ts,
-                "시각(KST)": ts.strftime("%Y-%m-%d %H:%M:%S") if ts else "",
-                "ID": rid,
-                "질문": _clip(q, 500),
-                "답변": _clip(a, 800),
-                "참고문서": ctx_str,     # 👈 표에 보일 컬럼
-                "_q_full": q,
-                "_a_full": a,
-                "_contexts": ctxs,       # 👈 다운로드용 원본
-            })
-        return rows
+        return _add_filter_columns(_rows_from_minimal([x for x in items if isinstance(x, dict)]))
     # Fallback: full runs
-    reps = _select_representative_runs([r for r in items if isinstance(r, dict)])
-    return _to_rows_from_runs(reps)
+    # 추출은 run당 한 번: 대표 선정 점수와 행 생성이 같은 값을 재사용
+    extracted = [(_extract_all(r), r) for r in items if isinstance(r, dict)]
+    reps = _select_representative_runs(extracted)
+    df = pd.DataFrame(_to_rows_from_runs(reps), columns=ROW_COLUMNS)
+    df["ts"] = pd.to_datetime(df["ts"], utc=True).dt.tz_convert(KST)
+    return _add_filter_columns(df)
+
+# 행 DataFrame은 읽기 전용으로만 쓰므로 cache_resource(복사/역직렬화 없이 같은 객체 반환)
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _local_rows(path: str, mtime: float, size: int) -> pd.DataFrame:
+    return _coerce_to_rows(_load_local_items(path, mtime, size))
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _private_rows(pat: str, repo: str, paths: Tuple[str, ...], ref: str = "", transport: str = "api") -> pd.DataFrame:
+    return _coerce_to_rows(_fetch_private_json(pat, repo, paths, ref, transport))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _build_downloads(_filtered: pd.DataFrame, key: Tuple) -> Tuple[bytes, bytes]:
+    """필터 결과 CSV/JSON bytes. DataFrame은 해시하지 않고 key(소스+필터 조건)로만 캐시"""
+    _filtered = _with_view_columns(_filtered)
+    csv_bytes = _filtered[VIEW_COLUMNS].to_csv(index=False).encode("utf-8-sig")
+    payload = [
+        {
+            "timestamp_kst": t,
+            "id": rid,
+            "question": q,
+            "answer": a,
+            "contexts": c,
+        }
+        for t, rid, q, a, c in zip(_filtered["시각(KST)"], _filtered["ID"], _filtered["_q_full"],
+                                   _filtered["_a_full"], _filtered["_contexts"])
+    ]
+    return csv_bytes, _json_dumps_pretty(payload)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Page
@@ -428,24 +636,22 @@ def admin_page():
         return
 
     # Decide source: Private repo if all secrets exist; else local file
-    use_gh = bool(GH_PAT and GH_REPO and GH_PATH)
-    items: List[Any] = []
+    use_gh = bool(GH_PAT and GH_REPO and GH_PATHS)
     source_label = ""
 
     try:
         if use_gh:
-            items = _fetch_private_json(GH_PAT, GH_REPO, GH_PATH, GH_REF)
+            rows = _private_rows(GH_PAT, GH_REPO, GH_PATHS, GH_REF, GH_TRANSPORT)
             ref_part = f"@{GH_REF}" if GH_REF else ""
-            source_label = f"Source: Private GitHub · {GH_REPO}/{GH_PATH}{ref_part}"
+            source_label = f"Source: Private GitHub · {GH_REPO}/{', '.join(GH_PATHS)}{ref_part}"
         else:
-            items = _load_local_items(JSON_PATH)
+            rows = _local_rows(JSON_PATH, *_file_sig(JSON_PATH))
             source_label = f"Source: Local JSON · {JSON_PATH}"
     except Exception as e:
         st.error(f"Data load failed. Check secrets/paths. ({e})")
         return
 
-    rows = _coerce_to_rows(items)
-    if not rows:
+    if rows.empty:
         _topbar(source_label)
         st.info("No Q/A records found.")
         return
@@ -454,9 +660,9 @@ def admin_page():
 
     # ── Sidebar: 필요한 4가지만 ────────────────────────────────────────────
     st.sidebar.markdown("### 필터")
-    dates = [r["ts"].date() for r in rows if r["ts"]]
-    if dates:
-        dmin, dmax = min(dates), max(dates)
+    days = rows["_day"].dropna()
+    if not days.empty:
+        dmin, dmax = days.min().date(), days.max().date()
     else:
         today = date.today()
         dmin = dmax = today
@@ -473,17 +679,14 @@ def admin_page():
     page_size = st.sidebar.number_input("페이지 크기", min_value=10, max_value=200, value=50, step=10)
 
     # ── Filter & sort ───────────────────────────────────────────────────────
-    def _ok(r):
-        t = r["ts"]
-        if t and (t.date() < d1 or t.date() > d2):
-            return False
-        if id_kw and id_kw.lower() not in (r["ID"] or "").lower():
-            return False
-        return True
-
-    filtered = [r for r in rows if _ok(r)]
+    # 시각이 없는 행은 날짜 필터에서 제외하지 않음
+    day = rows["_day"].to_numpy()
+    mask = np.isnat(day) | ((day >= np.datetime64(d1)) & (day <= np.datetime64(d2)))
+    if id_kw:
+        mask &= rows["_id_lower"].str.contains(id_kw.lower(), regex=False, na=False).to_numpy()
     reverse = sort_opt.endswith("내림차순")
-    filtered.sort(key=lambda r: r["ts"] or datetime.min, reverse=reverse)
+    filtered = rows[mask].sort_values("ts", ascending=not reverse, kind="mergesort",
+                                      na_position="last" if reverse else "first")
 
     # Pagination
     total = len(filtered)
@@ -493,19 +696,14 @@ def admin_page():
     page = max(1, min(st.session_state["_qa_page"], total_pages))
     start = (page - 1) * page_size
     end = min(start + page_size, total)
-    page_rows = filtered[start:end]
+    page_rows = _with_view_columns(filtered.iloc[start:end])
 
     st.markdown(f"**Results:** {total:,}  ·  Showing {start+1}-{end}  ·  Page {page}/{total_pages}")
 
-    view_cols = ["시각(KST)", "ID", "질문", "답변", "참고문서"]
-    if pd is not None:
-        df = pd.DataFrame([{k: r[k] for k in view_cols} for r in page_rows])
-        st.dataframe(
-            df, use_container_width=True, hide_index=True,
-            column_config={"참고문서": st.column_config.TextColumn(width="large")}
-        )
-    else:
-        st.table([{k: r[k] for k in view_cols} for r in page_rows])
+    st.dataframe(
+        page_rows[VIEW_COLUMNS], use_container_width=True, hide_index=True,
+        column_config={"참고문서": st.column_config.TextColumn(width="large")}
+    )
 
     # 페이지 이동 버튼
     c1, c2, c3 = st.columns([1, 2, 1])
@@ -518,34 +716,17 @@ def admin_page():
             st.session_state["_qa_page"] = min(total_pages, page + 1)
             st.rerun()
 
-    # 다운로드(필터 적용본)
-    colA, colB = st.columns(2)
-    with colA:
-        if pd is not None:
-            fdf = pd.DataFrame([{k: r[k] for k in view_cols} for r in filtered])
-            csv_bytes = fdf.to_csv(index=False).encode("utf-8-sig")
-        else:
-            import csv as _csv, io as _io
-            sio = _io.StringIO()
-            writer = _csv.DictWriter(sio, fieldnames=view_cols)
-            writer.writeheader()
-            for r in filtered:
-                writer.writerow({k: r[k] for k in view_cols})
-            csv_bytes = sio.getvalue().encode("utf-8-sig")
-        st.download_button("⬇️ CSV (filtered)", csv_bytes, file_name="qa_filtered.csv", mime="text/csv")
-    with colB:
-        payload = [
-    {
-        "timestamp_kst": r["시각(KST)"],
-        "id": r["ID"],
-        "question": r["_q_full"],
-        "answer": r["_a_full"],
-        "contexts": r.get("_contexts", [])  # 👈 추가
-    }
-            for r in filtered
-        ]
-        jb = io.BytesIO(json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8"))
-        st.download_button("⬇️ JSON (filtered)", jb.getvalue(), file_name="qa_filtered.json", mime="application/json")
+    # 다운로드(필터 적용본): 요청했을 때만 생성, 같은 필터면 캐시 재사용
+    if st.toggle("⬇️ 다운로드 파일 준비", key="qa_dl"):
+        data_sig = _file_sig(JSON_PATH) if not use_gh else ()
+        csv_bytes, json_bytes = _build_downloads(
+            filtered, (source_label, data_sig, d1, d2, id_kw.lower(), reverse)
+        )
+        colA, colB = st.columns(2)
+        with colA:
+            st.download_button("⬇️ CSV (filtered)", csv_bytes, file_name="qa_filtered.csv", mime="text/csv")
+        with colB:
+            st.download_button("⬇️ JSON (filtered)", json_bytes, file_name="qa_filtered.json", mime="application/json")
 
 # Standalone
 if __name__ == "__main__":
@@ -3,15 +3,32 @@
 import json
 from pathlib import Path
 
+KEYWORD = "컴퓨터공학"
+# 파싱 전 바이트 단위 사전 필터(UTF-8 원문 / ensure_ascii 이스케이프 둘 다 허용).
+# 학과 태그 "컴퓨터공학과"/"컴퓨터공학부"도 같은 부분문자열을 포함하므로 누락 없음
+NEEDLES = (KEYWORD.encode("utf-8"), KEYWORD.encode("unicode_escape"))
+
+
+def _iter_candidates(path: Path):
+    """(비어있지 않은 줄 번호, 파싱된 문서) — 키워드가 바이트로 보이는 줄만 json.loads"""
+    i = -1
+    with open(path, "rb") as f:
+        for raw in f:
+            if not raw.strip():
+                continue
+            i += 1
+            if not any(n in raw for n in NEEDLES):
+                continue
+            yield i, json.loads(raw)
+
+
 orig = Path(r"docs\undergrad_rules\2025\doc.jsonl")
-with open(orig, "r", encoding="utf-8") as f:
-    lines = [json.loads(l) for l in f if l.strip()]
 
 # Dump lines containing 컴퓨터공학 to JSON
 output = []
-for i, doc in enumerate(lines):
+for i, doc in _iter_candidates(orig):
     content = doc.get("page_content", "")
-    if "컴퓨터공학" in content:
+    if KEYWORD in content:
         output.append({
             "line": i,
             "length": len(content),
@@ -27,14 +44,12 @@ print(f"Found {len(output)} docs with 컴퓨터공학. Saved to {out_path}")
 
 # Also dump V2 chunks
 v2 = Path(r"docs_v2\undergrad_rules\2025\doc.jsonl")
-with open(v2, "r", encoding="utf-8") as f:
-    v2docs = [json.loads(l) for l in f if l.strip()]
 
 v2_output = []
-for i, d in enumerate(v2docs):
+for i, d in _iter_candidates(v2):
     content = d.get("page_content", "")
     dept = d.get("metadata", {}).get("department", "")
-    if "컴퓨터공학" in content or dept in ("컴퓨터공학과", "컴퓨터공학부"):
+    if KEYWORD in content or dept in ("컴퓨터공학과", "컴퓨터공학부"):
         v2_output.append({
             "chunk": i,
             "department_tag": dept,
@@ -1,56 +1,191 @@
-# Simple JSON file-based database for history and bookmarks
-# Can be replaced with SQLite or other DB later
+# SQLite (WAL) database for history and bookmarks
+# - 단일 파일 DATA_DIR/app.db, 행 단위 갱신(파일 전체 재작성 없음)
+# - 예전 history.json / bookmarks.json이 있으면 첫 실행 시 자동 이관
+# - 연결은 스레드별로 하나를 열어 재사용 (요청마다 open/close 하지 않음)
+# - 저장 위치는 BACKEND_DATA_DIR 환경변수로 바꿀 수 있음 (테스트용 임시 디렉터리 등)
 
 import json
 import os
-from datetime import datetime
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Optional, Dict
 import uuid
 
-DATA_DIR = Path(__file__).parent / "data"
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DATA_DIR = Path(os.getenv("BACKEND_DATA_DIR") or Path(__file__).parent / "data")
 DATA_DIR.mkdir(exist_ok=True)
 
+DB_FILE = DATA_DIR / "app.db"
+
+# 이전 JSON 저장소(이관용)
 HISTORY_FILE = DATA_DIR / "history.json"
 BOOKMARKS_FILE = DATA_DIR / "bookmarks.json"
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id         TEXT PRIMARY KEY,
+    member_id  TEXT NOT NULL,
+    title      TEXT,
+    category   TEXT,
+    cohort     TEXT,
+    messages   TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT,
+    updated_at TEXT,
+    preview    TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_member_updated ON sessions (member_id, updated_at DESC);
+
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id         TEXT PRIMARY KEY,
+    member_id  TEXT NOT NULL,
+    title      TEXT,
+    article    TEXT,
+    uri        TEXT,
+    category   TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_member ON bookmarks (member_id);
+"""
+
+_SESSION_COLS = ("id", "member_id", "title", "category", "cohort", "messages", "created_at", "updated_at", "preview")
+_BOOKMARK_COLS = ("id", "member_id", "title", "article", "uri", "category", "created_at")
+
+
+_local = threading.local()
+
+def _get_conn() -> sqlite3.Connection:
+    """현재 스레드의 연결 (이벤트 루프 스레드 + BackgroundTasks 스레드풀 워커마다 하나)"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+    return conn
+
+@contextmanager
+def _connect():
+    conn = _get_conn()
+    with conn:  # commit / rollback (연결은 닫지 않고 재사용)
+        yield conn
+
+def _dumps(obj) -> str:
+    """messages 컬럼 직렬화 (값은 이미 str/ISO 문자열이므로 default=str 불필요)"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+def _loads(s: str):
+    return orjson.loads(s) if orjson is not None else json.loads(s)
+
+def _session_from_row(row: sqlite3.Row) -> Dict:
+    session = dict(row)
+    session["messages"] = _loads(session["messages"] or "[]")
+    return session
+
+def _iso_to_epoch(iso: Optional[str]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(iso).timestamp()
+    except (TypeError, ValueError):
+        return None
+
 def _load_json(filepath: Path) -> Dict:
     if not filepath.exists():
         return {}
     with open(filepath, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def _save_json(filepath: Path, data: Dict):
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+def _migrate_json_files(conn: sqlite3.Connection):
+    """예전 JSON 파일 데이터를 빈 테이블로 옮긴다(원본 파일은 그대로 둠)."""
+    if HISTORY_FILE.exists() and not conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchone():
+        rows = []
+        for member_id, sessions in _load_json(HISTORY_FILE).items():
+            for s in sessions:
+                rows.append((
+                    s.get("id") or str(uuid.uuid4()), s.get("member_id") or member_id, s.get("title"),
+                    s.get("category"), s.get("cohort"), _dumps(s.get("messages") or []),
+                    s.get("created_at"), s.get("updated_at"), s.get("preview") or "",
+                ))
+        conn.executemany(f"INSERT OR IGNORE INTO sessions {_SESSION_COLS} VALUES ({','.join('?' * len(_SESSION_COLS))})", rows)
+    if BOOKMARKS_FILE.exists() and not conn.execute("SELECT 1 FROM bookmarks LIMIT 1").fetchone():
+        rows = []
+        for member_id, bookmarks in _load_json(BOOKMARKS_FILE).items():
+            for b in bookmarks:
+                rows.append((
+                    b.get("id") or str(uuid.uuid4()), b.get("member_id") or member_id, b.get("title"),
+                    b.get("article"), b.get("uri"), b.get("category"), b.get("created_at"),
+                ))
+        conn.executemany(f"INSERT OR IGNORE INTO bookmarks {_BOOKMARK_COLS} VALUES ({','.join('?' * len(_BOOKMARK_COLS))})", rows)
+
+def _init_db():
+    with _connect() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")  # DB 파일에 영구 저장되는 설정
+        conn.executescript(_SCHEMA)
+        _migrate_json_files(conn)
+
+_init_db()
 
 # ─────────────────────────────────────────────────────────────
 # History CRUD
 # ─────────────────────────────────────────────────────────────
 
+# member_id별 쓰기 버전: 세션이 바뀌면 올려서 캐시 키를 무효화 (단일 프로세스 기준)
+_history_version: Dict[str, int] = defaultdict(int)
+
+def _bump_history(member_id: str):
+    _history_version[member_id] += 1
+
+@lru_cache(maxsize=512)
+def _get_user_history_cached(member_id: str, version: int) -> tuple:
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT * FROM sessions WHERE member_id = ? ORDER BY updated_at DESC", (member_id,)
+        ).fetchall()
+    sessions = tuple(_session_from_row(r) for r in rows)
+    # 목록 화면의 상대 날짜용: ISO 파싱은 캐시 채울 때 한 번만
+    for s in sessions:
+        s["updated_at_epoch"] = _iso_to_epoch(s["updated_at"] or s["created_at"])
+    return sessions
+
 def get_user_history(member_id: str) -> List[Dict]:
-    """Get all chat sessions for a user"""
-    data = _load_json(HISTORY_FILE)
-    user_sessions = data.get(member_id, [])
-    return sorted(user_sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+    """Get all chat sessions for a user (cached until the user's sessions change; treat as read-only)"""
+    return list(_get_user_history_cached(member_id, _history_version[member_id]))
 
 def get_session(member_id: str, session_id: str) -> Optional[Dict]:
     """Get a specific chat session"""
-    sessions = get_user_history(member_id)
-    for session in sessions:
-        if session.get("id") == session_id:
-            return session
-    return None
-
-def create_session(member_id: str, title: str, category: str, cohort: Optional[str] = None) -> Dict:
-    """Create a new chat session"""
-    data = _load_json(HISTORY_FILE)
-    if member_id not in data:
-        data[member_id] = []
-    
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT * FROM sessions WHERE id = ? AND member_id = ?", (session_id, member_id)
+        ).fetchone()
+    return _session_from_row(row) if row else None
+
+def find_active_session(member_id: str, category: str, max_age_seconds: int = 3600) -> Optional[Dict]:
+    """Most recent session of this category updated within max_age_seconds (None if none)"""
+    # updated_at은 isoformat 문자열이라 사전순 비교 = 시간순 비교
+    since = (datetime.now() - timedelta(seconds=max_age_seconds)).isoformat()
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT * FROM sessions WHERE member_id = ? AND category = ? AND updated_at > ? "
+            "ORDER BY updated_at DESC LIMIT 1",
+            (member_id, category, since),
+        ).fetchone()
+    return _session_from_row(row) if row else None
+
+def create_session(member_id: str, title: str, category: str, cohort: Optional[str] = None,
+                   session_id: Optional[str] = None) -> Dict:
+    """Create a new chat session (session_id: 호출측에서 미리 정한 id, 없으면 새로 발급)"""
     now = datetime.now().isoformat()
     session = {
-        "id": str(uuid.uuid4()),
+        "id": session_id or str(uuid.uuid4()),
         "member_id": member_id,
         "title": title,
         "category": category,
@@ -60,59 +195,64 @@ def create_session(member_id: str, title: str, category: str, cohort: Optional[s
         "updated_at": now,
         "preview": ""
     }
-    data[member_id].insert(0, session)
-    _save_json(HISTORY_FILE, data)
+    with _connect() as conn:
+        conn.execute(
+            f"INSERT INTO sessions {_SESSION_COLS} VALUES ({','.join('?' * len(_SESSION_COLS))})",
+            tuple(_dumps(session[c]) if c == "messages" else session[c] for c in _SESSION_COLS),
+        )
+    _bump_history(member_id)
     return session
 
 def update_session(member_id: str, session_id: str, messages: List[Dict], title: Optional[str] = None) -> Optional[Dict]:
     """Update a chat session with new messages"""
-    data = _load_json(HISTORY_FILE)
-    if member_id not in data:
-        return None
-    
-    for session in data[member_id]:
-        if session.get("id") == session_id:
-            session["messages"] = messages
-            session["updated_at"] = datetime.now().isoformat()
-            if title:
-                session["title"] = title
-            # Update preview from last user message
-            for msg in reversed(messages):
-                if msg.get("role") == "user":
-                    session["preview"] = msg.get("content", "")[:50] + "..."
-                    break
-            _save_json(HISTORY_FILE, data)
-            return session
-    return None
+    # Update preview from last user message
+    preview = None
+    for msg in reversed(messages):
+        if msg.get("role") == "user":
+            preview = msg.get("content", "")[:50] + "..."
+            break
+
+    with _connect() as conn:
+        cur = conn.execute(
+            "UPDATE sessions SET messages = ?, updated_at = ?, title = COALESCE(?, title), "
+            "preview = COALESCE(?, preview) WHERE id = ? AND member_id = ?",
+            (_dumps(messages), datetime.now().isoformat(),
+             title or None, preview, session_id, member_id),
+        )
+        if cur.rowcount == 0:
+            return None
+        row = conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    _bump_history(member_id)
+    return _session_from_row(row)
 
 def delete_session(member_id: str, session_id: str) -> bool:
     """Delete a chat session"""
-    data = _load_json(HISTORY_FILE)
-    if member_id not in data:
-        return False
-    
-    original_len = len(data[member_id])
-    data[member_id] = [s for s in data[member_id] if s.get("id") != session_id]
-    if len(data[member_id]) < original_len:
-        _save_json(HISTORY_FILE, data)
-        return True
-    return False
+    with _connect() as conn:
+        cur = conn.execute("DELETE FROM sessions WHERE id = ? AND member_id = ?", (session_id, member_id))
+    if cur.rowcount:
+        _bump_history(member_id)
+    return cur.rowcount > 0
 
 # ─────────────────────────────────────────────────────────────
 # Bookmarks CRUD
 # ─────────────────────────────────────────────────────────────
 
+_bookmarks_version: Dict[str, int] = defaultdict(int)
+
+@lru_cache(maxsize=512)
+def _get_user_bookmarks_cached(member_id: str, version: int) -> tuple:
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT * FROM bookmarks WHERE member_id = ? ORDER BY rowid", (member_id,)
+        ).fetchall()
+    return tuple(dict(r) for r in rows)
+
 def get_user_bookmarks(member_id: str) -> List[Dict]:
-    """Get all bookmarks for a user"""
-    data = _load_json(BOOKMARKS_FILE)
-    return data.get(member_id, [])
+    """Get all bookmarks for a user (cached until the user's bookmarks change; treat as read-only)"""
+    return list(_get_user_bookmarks_cached(member_id, _bookmarks_version[member_id]))
 
 def add_bookmark(member_id: str, title: str, article: Optional[str], uri: Optional[str], category: str) -> Dict:
     """Add a new bookmark"""
-    data = _load_json(BOOKMARKS_FILE)
-    if member_id not in data:
-        data[member_id] = []
-    
     bookmark = {
         "id": str(uuid.uuid4()),
         "member_id": member_id,
@@ -122,19 +262,18 @@ def add_bookmark(member_id: str, title: str, article: Optional[str], uri: Option
         "category": category,
         "created_at": datetime.now().isoformat()
     }
-    data[member_id].append(bookmark)
-    _save_json(BOOKMARKS_FILE, data)
+    with _connect() as conn:
+        conn.execute(
+            f"INSERT INTO bookmarks {_BOOKMARK_COLS} VALUES ({','.join('?' * len(_BOOKMARK_COLS))})",
+            tuple(bookmark[c] for c in _BOOKMARK_COLS),
+        )
+    _bookmarks_version[member_id] += 1
     return bookmark
 
 def delete_bookmark(member_id: str, bookmark_id: str) -> bool:
     """Delete a bookmark"""
-    data = _load_json(BOOKMARKS_FILE)
-    if member_id not in data:
-        return False
-    
-    original_len = len(data[member_id])
-    data[member_id] = [b for b in data[member_id] if b.get("id") != bookmark_id]
-    if len(data[member_id]) < original_len:
-        _save_json(BOOKMARKS_FILE, data)
-        return True
-    return False
+    with _connect() as conn:
+        cur = conn.execute("DELETE FROM bookmarks WHERE id = ? AND member_id = ?", (bookmark_id, member_id))
+    if cur.rowcount:
+        _bookmarks_version[member_id] += 1
+    return cur.rowcount > 0
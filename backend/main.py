@@ -11,6 +11,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from routers import chat, history, bookmarks
+from backend.responses import DEFAULT_RESPONSE_CLASS
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -35,7 +36,8 @@ app = FastAPI(
     title="KHU Regulation Assistant API",
     description="Backend API for KyungHee University Regulation Chatbot",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=DEFAULT_RESPONSE_CLASS,
 )
 
 # CORS configuration
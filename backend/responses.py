@@ -0,0 +1,40 @@
+# Fast JSON response for hot endpoints
+# - 핸들러가 dict/list를 바로 담아 반환하면 FastAPI의 response_model 재검증/직렬화를 건너뜀
+#   (response_model은 OpenAPI 스키마 용도로만 유지)
+# - msgspec이 있으면 msgspec.json, 없으면 orjson, 둘 다 없으면 표준 json
+# - DEFAULT_RESPONSE_CLASS: 앱 전체 기본 응답 클래스 (orjson이 있으면 ORJSONResponse)
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+    _encoder = msgspec.json.Encoder()
+    _encode = _encoder.encode
+except ImportError:
+    msgspec = None
+
+    if orjson is not None:
+        _encode = orjson.dumps
+    else:
+        def _encode(content: Any) -> bytes:
+            return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# ORJSONResponse는 orjson이 없으면 렌더링 시점에 실패하므로 설치 여부로 고름
+DEFAULT_RESPONSE_CLASS = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def encode_json(content: Any) -> bytes:
+    return _encode(content)
+
+
+class MsgspecJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return _encode(content)
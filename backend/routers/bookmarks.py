@@ -1,17 +1,25 @@
 # Bookmarks router - Bookmark CRUD
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+from pydantic import TypeAdapter
 from typing import List, Optional
 from backend.models import Bookmark, BookmarkCreate
 from backend import database
 
 router = APIRouter()
 
+# 목록 전체를 한 번에 검증/직렬화 (FastAPI의 항목별 response_model 처리 대신)
+_BOOKMARKS_ADAPTER = TypeAdapter(List[Bookmark])
+
 @router.get("/bookmarks", response_model=List[Bookmark])
 async def get_bookmarks(member_id: str = Query(...)):
     """Get all bookmarks for a user"""
     bookmarks = database.get_user_bookmarks(member_id)
-    return bookmarks
+    return Response(
+        _BOOKMARKS_ADAPTER.dump_json(_BOOKMARKS_ADAPTER.validate_python(bookmarks)),
+        media_type="application/json",
+    )
 
 @router.post("/bookmarks", response_model=Bookmark)
 async def create_bookmark(bookmark: BookmarkCreate):
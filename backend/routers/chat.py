@@ -1,58 +1,131 @@
 # Chat router - RAG API endpoint
 # Connects to existing chains.py and query_parser.py
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+from collections import OrderedDict
+from functools import lru_cache
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage, AIMessage
+import logging
 import sys
 import os
-import uuid
+import re
+import secrets
+import time
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from backend.models import ChatRequest, ChatResponse, SourceDocument
+from backend.models import ChatRequest, ChatResponse
 from backend import database
+from backend.responses import MsgspecJSONResponse, encode_json as _encode_json
+from backend.semantic_cache import SemanticCache
+# 상위 디렉터리의 RAG 모듈 (backend를 import하지 않으므로 순환 없음)
+from chains import (
+    get_multi_year_vector_store, get_retriever_chain, get_conversational_rag, get_embeddings,
+    multi_year_signature, extract_dept_keywords,
+)
+from query_parser import parse_query
+from reranker import rerank
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+SOURCE_LIMIT = 5   # 응답에 싣는 출처 수
+RERANK_POOL = 16   # reranker에 넘기는 후보 문서 수 상한
+# 순위별 근사 relevance (1위 100, 이후 10씩 감소)
+_RELEVANCE = (100, 90, 80, 70, 60, 50, 40, 30, 20, 10)
+
+# ─────────────────────────────────────────────────────────────
+# Answer cache (exact match on normalized question)
+# ─────────────────────────────────────────────────────────────
+ANSWER_CACHE_SIZE = 512
+ANSWER_CACHE_TTL = 1800  # seconds
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACES_RE = re.compile(r"\s+")
+
+def normalize_query(msg: str) -> str:
+    """소문자화 + 구두점 제거 + 공백 정리"""
+    return _SPACES_RE.sub(" ", _PUNCT_RE.sub("", msg.lower())).strip()
+
+class _TTLCache:
+    """작은 in-process LRU + TTL 캐시"""
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+_answer_cache = _TTLCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL)
+
+# 표현만 다른 같은 질문용 (_semantic_scope 범위 안에서만 매칭)
+_semantic_cache = SemanticCache(n_tables=8, bits=16, threshold=0.95)
+
+def _embed_query(text: str):
+    """벡터 인덱스와 같은 임베딩 클라이언트로 질문 임베딩 (실패 시 None → 시맨틱 캐시 생략)"""
+    try:
+        return get_embeddings().embed_query(text)
+    except Exception:
+        logger.warning("semantic cache: query embedding failed, skipping", exc_info=True)
+        return None
+
+_MSG_CLS = {"user": HumanMessage, "assistant": AIMessage}
 
 def _convert_history(history: list) -> list:
-    """Convert chat history to LangChain message format"""
-    messages = []
-    for msg in history:
-        if msg.role == "user":
-            messages.append(HumanMessage(content=msg.content))
-        else:
-            messages.append(AIMessage(content=msg.content))
-    return messages
+    """Convert chat history to LangChain message format (user 외 role은 AIMessage)"""
+    return [_MSG_CLS.get(m.role, AIMessage)(content=m.content) for m in history]
+
+_HEX_TITLE_RE = re.compile(r"^<([0-9A-Fa-f]+)>$")
 
 def _decode_title(title: str) -> str:
     """디코드 hex 인코딩된 한글 파일명 및 경로 정리"""
-    import os
-    
     # 경로에서 파일명만 추출
     if "\\" in title or "/" in title:
-        title = os.path.basename(title)
+        title = os.path.basename(title.replace("\\", "/"))
     
     # Hex 인코딩된 파일명 디코딩 (예: <312E20B1B3...>)
-    if title.startswith('<') and title.endswith('>'):
+    m = _HEX_TITLE_RE.match(title)
+    if m:
         try:
-            hex_str = title[1:-1]
-            title = bytes.fromhex(hex_str).decode('cp949')
-        except:
+            title = bytes.fromhex(m.group(1)).decode("cp949")
+        except ValueError:  # 홀수 길이 hex / cp949 디코드 실패(UnicodeDecodeError 포함)
             pass
     
     # .pdf 확장자 제거
-    if title.endswith(".pdf"):
-        title = title.rsplit(".", 1)[0]
+    if title[-4:].lower() == ".pdf":
+        title = title[:-4]
     
     return title
 
-def _extract_sources(context_docs: list) -> list[SourceDocument]:
-    """Extract source documents from RAG response"""
+def _extract_sources(context_docs: list, limit: int = SOURCE_LIMIT) -> list[dict]:
+    """Extract source documents (SourceDocument-shaped dicts) from RAG response"""
     sources = []
     seen = set()
-    for i, doc in enumerate(context_docs[:5]):  # Limit to top 5
-        meta = getattr(doc, "metadata", {}) if hasattr(doc, "metadata") else {}
+    for i, doc in enumerate(context_docs[:limit]):
+        # Document 객체 또는 reranker가 돌려주는 dict 모두 처리
+        if isinstance(doc, dict):
+            meta = doc.get("metadata") or {}
+            content = doc.get("page_content") or doc.get("content") or ""
+        else:
+            meta = getattr(doc, "metadata", None) or {}
+            content = getattr(doc, "page_content", "") or ""
         
         # Try multiple keys for title (different JSON formats use different keys)
         raw_title = (
@@ -74,166 +147,269 @@ def _extract_sources(context_docs: list) -> list[SourceDocument]:
             article_str = None
         
         # Deduplicate by title + content preview (same doc, different chunks are OK)
-        content_key = doc.page_content[:100] if hasattr(doc, 'page_content') else ""
-        dedup_key = f"{title}::{content_key[:50]}"
+        dedup_key = (title, content[:50])
         if dedup_key in seen:
             continue
         seen.add(dedup_key)
         
         # Get a cleaner content preview (remove Source: prefix if present)
-        content = doc.page_content
         if content.startswith("Source :"):
             content = content.split("\n", 1)[-1] if "\n" in content else content
         preview = content[:200] + "..." if len(content) > 200 else content
         
-        sources.append(SourceDocument(
-            id=str(i + 1),
-            title=title,
-            article=article_str,
-            content=preview,
-            relevance=round((1 - i * 0.1) * 100),  # Approximate relevance
-            uri=meta.get("uri") or meta.get("articleUri")
-        ))
+        sources.append({
+            "id": str(i + 1),
+            "title": title,
+            "article": article_str,
+            "content": preview,
+            "relevance": _RELEVANCE[i] if i < len(_RELEVANCE) else 0,  # Approximate relevance
+            "uri": meta.get("uri") or meta.get("articleUri"),
+        })
     return sources
 
 
+def _freeze_filter(meta_filter) -> tuple:
+    """meta_filter dict → 캐시 키용 정렬된 튜플 (list 값은 tuple로)"""
+    return tuple(sorted(
+        (k, tuple(v) if isinstance(v, list) else v) for k, v in (meta_filter or {}).items()
+    ))
+
+# index_signature: 인덱스 파일 mtime. 인덱스를 다시 빌드하면 키가 바뀌어 새 store/체인을 만듦
+@lru_cache(maxsize=8)
+def _get_vector_store(category: str, cohort, index_signature: tuple):
+    """Load vector store with cross-year fallback (category, cohort, 인덱스 버전별로 한 번만 로드)"""
+    return get_multi_year_vector_store(category, cohort)
+
+@lru_cache(maxsize=64)
+def _get_rag_chain(category: str, cohort, meta_filter_key: tuple, top_k: int, index_signature: tuple):
+    """Build retriever chain (metadata filter + year priority) and conversational RAG chain"""
+    retriever_chain = get_retriever_chain(
+        _get_vector_store(category, cohort, index_signature),
+        meta_filter={k: list(v) if isinstance(v, tuple) else v for k, v in meta_filter_key},
+        top_k=top_k,
+        primary_cohort=cohort,
+    )
+    return get_conversational_rag(retriever_chain)
+
+def _prepare_rag(request: ChatRequest, meta_filter, query_vec=None) -> tuple:
+    """Get the (cached) RAG chain for the parsed filter. Returns (rag_chain, inputs)."""
+    # Vector store / retriever / RAG chain (요청 간 재사용, 실패는 캐시되지 않음)
+    # top_k=8: reranker가 넓은 풀에서 재정렬하도록
+    try:
+        rag_chain = _get_rag_chain(request.category, request.cohort, _freeze_filter(meta_filter), 8,
+                                   multi_year_signature(request.category, request.cohort))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    # Convert history to LangChain format
+    inputs = {
+        "input": request.message,
+        "chat_history": _convert_history(request.history or []),
+    }
+    if query_vec is not None:
+        inputs["query_vec"] = query_vec  # 시맨틱 캐시용으로 이미 계산한 임베딩 재사용
+    return rag_chain, inputs
+
+def _sources_from_context(context_docs: list, hints: dict, message: str) -> list[dict]:
+    """Apply BM25+MMR reranking to context docs, then extract sources"""
+    if not context_docs:
+        return _extract_sources(context_docs)
+    # rerank 풀은 RERANK_POOL개까지만, 출처는 상위 SOURCE_LIMIT개만 사용
+    candidate_docs = context_docs[:RERANK_POOL]
+    try:
+        rerank_input = [
+            d if isinstance(d, dict) else
+            {"page_content": d.page_content, "metadata": getattr(d, "metadata", None) or {}, "score": 0.0}
+            for d in candidate_docs
+            if isinstance(d, dict) or hasattr(d, "page_content")
+        ]
+        
+        if rerank_input:
+            # reranked 결과에서 sources 추출
+            return _extract_sources(rerank(rerank_input, hints, message), SOURCE_LIMIT)
+        return _extract_sources(candidate_docs, SOURCE_LIMIT)
+    except Exception:
+        logger.warning("reranker failed, falling back to retrieval order", exc_info=True)
+        return _extract_sources(candidate_docs, SOURCE_LIMIT)
+
+def _run_rag(request: ChatRequest, meta_filter, hints: dict, query_vec=None) -> tuple:
+    """Retrieve + generate + rerank. Returns (answer, sources)."""
+    rag_chain, inputs = _prepare_rag(request, meta_filter, query_vec)
+    
+    # Invoke the chain
+    result = rag_chain.invoke(inputs)
+    
+    # Extract answer and sources
+    answer = result.get("answer", "죄송합니다. 응답을 생성하는 데 문제가 발생했습니다.")
+    sources = _sources_from_context(result.get("context", []), hints, request.message)
+    return answer, sources
+
+def _answer_cache_key(request: ChatRequest):
+    # 이전 대화 맥락이 없는 질문만 캐시 (맥락에 따라 답이 달라짐)
+    if request.history:
+        return None
+    return (request.category, request.cohort or "", normalize_query(request.message))
+
+def _semantic_scope(request: ChatRequest, meta_filter) -> tuple:
+    """
+    시맨틱 캐시 매칭 범위: 조·항 번호나 학과명만 다른 질문은 임베딩이 거의 같으므로
+    parse_query 필터와 학과 키워드까지 같아야 같은 답으로 본다
+    """
+    return (
+        request.category,
+        request.cohort or "",
+        _freeze_filter(meta_filter),
+        tuple(extract_dept_keywords(request.message)),
+    )
+
+async def _lookup_cached_answer(request: ChatRequest, meta_filter) -> tuple:
+    """Exact → semantic cache. Returns (cache_key, scope, query_vec, cached (answer, sources) or None)."""
+    cache_key = _answer_cache_key(request)
+    cached = _answer_cache.get(cache_key) if cache_key else None
+    scope = query_vec = None
+    if cache_key and cached is None:
+        scope = _semantic_scope(request, meta_filter)
+        # 임베딩 API 호출은 이벤트 루프 밖에서
+        query_vec = await asyncio.to_thread(_embed_query, request.message)
+        if query_vec is not None:
+            cached = _semantic_cache.get(scope, query_vec)
+    return cache_key, scope, query_vec, cached
+
+def _store_cached_answer(cache_key, scope, query_vec, answer: str, sources: list):
+    if cache_key:
+        _answer_cache.set(cache_key, (answer, sources))
+        if query_vec is not None:
+            _semantic_cache.put(scope, query_vec, (answer, sources))
+
+
+def _persist_session(member_id: str, session_id: str, new_title, category: str, cohort, messages: list):
+    """Auto-save the exchange. new_title이 있으면 session_id로 새 세션 생성 후 저장"""
+    try:
+        if new_title is not None:
+            database.create_session(member_id, new_title, category, cohort, session_id=session_id)
+        database.update_session(member_id, session_id, messages)
+    except Exception:
+        logger.warning("history: failed to save session %s", session_id, exc_info=True)
+
+def _schedule_autosave(request: ChatRequest, answer: str, background_tasks: BackgroundTasks) -> str:
+    """Pick the session (active or new) and schedule the save. Returns session_id."""
+    # Auto-save to history if member_id is provided
+    session_id = None
+    if request.member_id:
+        try:
+            # Build messages list (including current exchange)
+            all_messages = [
+                *({"role": m.role, "content": m.content} for m in (request.history or [])),
+                {"role": "user", "content": request.message},
+                {"role": "assistant", "content": answer},
+            ]
+            
+            # Try to find an active session (less than 1 hour old with same category)
+            active_session = database.find_active_session(request.member_id, request.category, 3600)
+            
+            if active_session:
+                # Update existing session
+                session_id = active_session["id"]
+                title = None
+            else:
+                # Create new session with title from first message
+                session_id = secrets.token_hex(16)
+                title = request.message[:30] + "..." if len(request.message) > 30 else request.message
+            
+            # DB 쓰기는 응답 전송 후 실행 (session_id는 위에서 이미 확정)
+            background_tasks.add_task(
+                _persist_session,
+                request.member_id,
+                session_id,
+                title,
+                request.category,
+                request.cohort,
+                all_messages,
+            )
+        except Exception:
+            # Log error but don't fail the request
+            logger.warning("history: failed to schedule autosave", exc_info=True)
+    # 저장하지 않는 요청(비회원/저장 실패)에도 응답용 id는 발급
+    return session_id or secrets.token_hex(16)
+
+
+def _sse(payload: dict) -> bytes:
+    return b"data: " + _encode_json(payload) + b"\n\n"
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
     """
     Process a chat message through the RAG pipeline.
     Returns the assistant response and source documents.
     """
     try:
-        # Import chains dynamically to avoid circular imports
-        from chains import get_multi_year_vector_store, get_retriever_chain, get_conversational_rag
-        from query_parser import parse_query
-        from reranker import rerank
-        
         # Parse query for metadata hints
         meta_filter, hints = parse_query(request.message)
-        
-        # Load vector store with cross-year fallback
-        try:
-            vector_store = get_multi_year_vector_store(request.category, request.cohort)
-        except FileNotFoundError as e:
-            raise HTTPException(status_code=404, detail=str(e))
-        
-        # Build retriever chain with metadata filter and year priority
-        # top_k=8: reranker가 넓은 풀에서 재정렬하도록
-        retriever_chain = get_retriever_chain(
-            vector_store,
-            meta_filter=meta_filter,
-            top_k=8,
-            primary_cohort=request.cohort,
-        )
-        
-        # Build conversational RAG chain
-        rag_chain = get_conversational_rag(retriever_chain)
-        
-        # Convert history to LangChain format
-        chat_history = _convert_history(request.history or [])
-        
-        # Invoke the chain
-        result = rag_chain.invoke({
-            "input": request.message,
-            "chat_history": chat_history
-        })
-        
-        # Extract answer and sources
-        answer = result.get("answer", "죄송합니다. 응답을 생성하는 데 문제가 발생했습니다.")
-        context_docs = result.get("context", [])
-        
-        # Apply BM25+MMR reranking to context docs
-        if context_docs:
-            try:
-                rerank_input = []
-                for doc in context_docs:
-                    if hasattr(doc, "page_content"):
-                        rerank_input.append({
-                            "page_content": doc.page_content,
-                            "metadata": doc.metadata if hasattr(doc, "metadata") else {},
-                            "score": 0.0,
-                        })
-                    elif isinstance(doc, dict):
-                        rerank_input.append(doc)
-                
-                if rerank_input:
-                    reranked = rerank(rerank_input, hints, request.message)
-                    # reranked 결과에서 sources 추출
-                    sources = _extract_sources(reranked)
-                else:
-                    sources = _extract_sources(context_docs)
-            except Exception as e:
-                print(f"[Reranker] Failed, falling back: {e}")
-                sources = _extract_sources(context_docs)
+        cache_key, scope, query_vec, cached = await _lookup_cached_answer(request, meta_filter)
+        if cached is not None:
+            answer, sources = cached
         else:
-            sources = _extract_sources(context_docs)
-        
-        # Generate or retrieve session ID
-        session_id = str(uuid.uuid4())
+            answer, sources = _run_rag(request, meta_filter, hints, query_vec)
+            _store_cached_answer(cache_key, scope, query_vec, answer, sources)
         
-        # Auto-save to history if member_id is provided
-        if request.member_id:
-            try:
-                # Build messages list (including current exchange)
-                all_messages = []
-                for msg in (request.history or []):
-                    all_messages.append({"role": msg.role, "content": msg.content})
-                all_messages.append({"role": "user", "content": request.message})
-                all_messages.append({"role": "assistant", "content": answer})
-                
-                # Check if session exists for this user, otherwise create new
-                existing_sessions = database.get_user_history(request.member_id)
-                
-                # Try to find an active session (less than 1 hour old with same category)
-                from datetime import datetime
-                active_session = None
-                for s in existing_sessions[:5]:  # Check only recent 5
-                    if s.get("category") == request.category:
-                        try:
-                            updated = datetime.fromisoformat(s.get("updated_at", ""))
-                            if (datetime.now() - updated).total_seconds() < 3600:  # 1 hour
-                                active_session = s
-                                break
-                        except:
-                            pass
-                
-                if active_session:
-                    # Update existing session
-                    database.update_session(
-                        request.member_id, 
-                        active_session["id"], 
-                        all_messages
-                    )
-                    session_id = active_session["id"]
-                else:
-                    # Create new session with title from first message
-                    title = request.message[:30] + "..." if len(request.message) > 30 else request.message
-                    new_session = database.create_session(
-                        request.member_id,
-                        title,
-                        request.category,
-                        request.cohort
-                    )
-                    database.update_session(
-                        request.member_id,
-                        new_session["id"],
-                        all_messages
-                    )
-                    session_id = new_session["id"]
-            except Exception as e:
-                # Log error but don't fail the request
-                print(f"[History] Failed to save: {e}")
+        session_id = _schedule_autosave(request, answer, background_tasks)
         
-        return ChatResponse(
-            answer=answer,
-            sources=sources,
-            session_id=session_id
-        )
+        # ChatResponse 모양 그대로 직접 인코딩 (response_model은 문서화용)
+        return MsgspecJSONResponse({
+            "answer": answer,
+            "sources": sources,
+            "session_id": session_id,
+        })
         
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("RAG pipeline error")
         raise HTTPException(status_code=500, detail=f"RAG pipeline error: {str(e)}")
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, background_tasks: BackgroundTasks):
+    """
+    Same pipeline as /chat, streamed as Server-Sent Events:
+      data: {"token": "..."}                          (answer chunks)
+      data: {"sources": [...], "session_id": "..."}   (final event)
+      data: {"error": "..."}                          (on failure mid-stream)
+    """
+    try:
+        meta_filter, hints = parse_query(request.message)
+        cache_key, scope, query_vec, cached = await _lookup_cached_answer(request, meta_filter)
+        prepared = _prepare_rag(request, meta_filter, query_vec) if cached is None else None
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("RAG pipeline error")
+        raise HTTPException(status_code=500, detail=f"RAG pipeline error: {str(e)}")
+    
+    async def events():
+        try:
+            if cached is not None:
+                answer, sources = cached
+                yield _sse({"token": answer})
+            else:
+                rag_chain, inputs = prepared
+                parts, context_docs = [], []
+                async for chunk in rag_chain.astream_answer(inputs):
+                    if "answer" in chunk:
+                        parts.append(chunk["answer"])
+                        yield _sse({"token": chunk["answer"]})
+                    elif "context" in chunk:
+                        context_docs = chunk["context"]
+                answer = "".join(parts)
+                sources = _sources_from_context(context_docs, hints, request.message)
+                _store_cached_answer(cache_key, scope, query_vec, answer, sources)
+            
+            # 세션 저장은 스트림이 끝난 뒤 BackgroundTasks로 실행됨
+            session_id = _schedule_autosave(request, answer, background_tasks)
+            yield _sse({"sources": sources, "session_id": session_id})
+        except Exception as e:
+            logger.exception("RAG pipeline error")
+            yield _sse({"error": f"RAG pipeline error: {str(e)}"})
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -4,45 +4,52 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from backend.models import ChatSession, ChatSessionSummary, ChatMessage
 from backend import database
+from backend.responses import MsgspecJSONResponse
 from datetime import datetime
 
 router = APIRouter()
 
-def _format_date(iso_date: str) -> str:
-    """Format ISO date to relative date string"""
-    try:
-        dt = datetime.fromisoformat(iso_date)
-        now = datetime.now()
-        diff = now - dt
-        
-        if diff.days == 0:
-            return "오늘"
-        elif diff.days == 1:
-            return "어제"
-        elif diff.days < 7:
-            return f"{diff.days}일 전"
-        elif diff.days < 30:
-            weeks = diff.days // 7
-            return f"{weeks}주일 전"
-        else:
-            return dt.strftime("%Y-%m-%d")
-    except:
-        return iso_date
+def _format_date(value, now_ts: float) -> str:
+    """Format epoch seconds or ISO date to relative date string (now_ts는 호출측에서 한 번만 계산)"""
+    if isinstance(value, (int, float)):
+        ts = value
+    else:
+        try:
+            ts = datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            return value
+    days = int((now_ts - ts) // 86400)
+    
+    if days == 0:
+        return "오늘"
+    if days == 1:
+        return "어제"
+    if days < 7:
+        return f"{days}일 전"
+    if days < 30:
+        return f"{days // 7}주일 전"
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
 
 @router.get("/history", response_model=List[ChatSessionSummary])
 async def get_history(member_id: str = Query(...)):
     """Get all chat sessions for a user"""
     sessions = database.get_user_history(member_id)
-    return [
-        ChatSessionSummary(
-            id=s["id"],
-            title=s.get("title", "Untitled"),
-            date=_format_date(s.get("updated_at", s.get("created_at", ""))),
-            preview=s.get("preview", "")[:50] + "..." if len(s.get("preview", "")) > 50 else s.get("preview", ""),
-            category=s.get("category", "regulations")
-        )
-        for s in sessions
-    ]
+    now_ts = datetime.now().timestamp()
+    # ChatSessionSummary 모양의 dict를 직접 인코딩 (response_model은 문서화용)
+    out = []
+    for s in sessions:
+        # SQLite 행은 키가 항상 있고 값이 NULL일 수 있으므로 get(k, default) 대신 `or`
+        p = s.get("preview") or ""
+        out.append({
+            "id": s["id"],
+            "title": s.get("title") or "Untitled",
+            "date": _format_date(
+                s.get("updated_at_epoch") or s.get("updated_at") or s.get("created_at") or "", now_ts
+            ),
+            "preview": (p[:50] + "...") if len(p) > 50 else p,
+            "category": s.get("category") or "regulations",
+        })
+    return MsgspecJSONResponse(out)
 
 @router.get("/history/{session_id}")
 async def get_session(session_id: str, member_id: str = Query(...)):
@@ -0,0 +1,69 @@
+# Semantic answer cache
+# - 질문 임베딩을 random-projection LSH로 버킷팅해 표현만 다른 같은 질문("졸업요건 알려줘" / "졸업 요건이 뭔가요")의 답을 재사용
+# - 테이블 N개 × 비트 B개: 어느 한 테이블에서라도 버킷이 같으면 후보, 후보 중 코사인 유사도 >= threshold면 히트
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    def __init__(self, n_tables: int = 8, bits: int = 16, threshold: float = 0.95,
+                 max_entries: int = 2048, seed: int = 0):
+        self.n_tables, self.bits, self.threshold, self.max_entries = n_tables, bits, threshold, max_entries
+        self._seed = seed
+        self._planes: Optional[np.ndarray] = None  # (n_tables, dim, bits), 첫 벡터의 차원으로 생성
+        self._pow2 = 1 << np.arange(bits, dtype=np.uint64)
+        self._tables: List[Dict[Tuple[Hashable, int], List[int]]] = [{} for _ in range(n_tables)]
+        # entry_id -> (scope, unit vector, bucket keys, value), 삽입 순(오래된 것부터 제거)
+        self._entries: "OrderedDict[int, Tuple[Hashable, np.ndarray, List[int], Any]]" = OrderedDict()
+        self._next_id = 0
+
+    def _unit(self, vec) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32)
+        n = float(np.linalg.norm(v))
+        return v / n if n else v
+
+    def _buckets(self, v: np.ndarray) -> List[int]:
+        if self._planes is None:
+            rng = np.random.default_rng(self._seed)
+            self._planes = rng.standard_normal((self.n_tables, v.shape[0], self.bits)).astype(np.float32)
+        signs = np.einsum("d,tdb->tb", v, self._planes) > 0  # (n_tables, bits)
+        return [int(k) for k in signs.astype(np.uint64) @ self._pow2]
+
+    def get(self, scope: Hashable, vec) -> Optional[Any]:
+        if not self._entries:
+            return None
+        v = self._unit(vec)
+        cand = set()
+        for table, key in zip(self._tables, self._buckets(v)):
+            cand.update(table.get((scope, key), ()))
+        best_sim, best = self.threshold, None
+        for eid in cand:
+            _, ev, _, value = self._entries[eid]
+            sim = float(v @ ev)
+            if sim >= best_sim:
+                best_sim, best = sim, value
+        return best
+
+    def put(self, scope: Hashable, vec, value: Any) -> None:
+        v = self._unit(vec)
+        keys = self._buckets(v)
+        eid = self._next_id
+        self._next_id += 1
+        self._entries[eid] = (scope, v, keys, value)
+        for table, key in zip(self._tables, keys):
+            table.setdefault((scope, key), []).append(eid)
+        while len(self._entries) > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        eid, (scope, _, keys, _) = self._entries.popitem(last=False)
+        for table, key in zip(self._tables, keys):
+            ids = table.get((scope, key))
+            if ids is None:
+                continue
+            ids.remove(eid)
+            if not ids:
+                del table[(scope, key)]
@@ -0,0 +1,64 @@
+"""
+FAISS docstore에 청크별 언어 정보를 한 번만 기록
+===============================================
+faiss_db/ 아래 모든 index.pkl 의 문서 metadata에 다음을 넣고 다시 저장:
+  _lang      : "ko" / "en" / "mixed"  (diagnose_index.py가 본문 대신 사용)
+  _kor_ratio : 한글 음절 비율           (HybridRetriever가 검색 시 재계산 없이 사용)
+둘 다 본문 앞 LANG_WINDOW자 기준 (chains.py와 같은 함수). index.faiss는 건드리지 않음.
+
+사용:
+  python backfill_language.py            # 전체
+  python backfill_language.py --dry-run  # 바뀔 문서 수만 출력
+  python backfill_language.py --force    # 이미 있는 값도 다시 계산
+"""
+import os
+import sys
+import pickle
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.resolve()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from chains import korean_ratio, detect_lang, LANG_WINDOW
+
+FAISS_DIR = PROJECT_ROOT / "faiss_db"
+
+
+def backfill_index(pkl_path: Path, dry_run: bool = False, force: bool = False) -> int:
+    """index.pkl 하나를 패치. 값을 새로 쓴 문서 수 반환"""
+    docstore, index_to_docstore_id = pickle.loads(pkl_path.read_bytes())
+    changed = 0
+    for doc in docstore._dict.values():
+        md = getattr(doc, "metadata", None)
+        if md is None or (not force and "_lang" in md and "_kor_ratio" in md):
+            continue
+        head = (getattr(doc, "page_content", "") or "")[:LANG_WINDOW]
+        md["_lang"] = detect_lang(head)
+        md["_kor_ratio"] = korean_ratio(head)
+        changed += 1
+    if changed and not dry_run:
+        # 같은 디렉터리에 쓰고 교체 (중간에 실패해도 원본 유지)
+        tmp = pkl_path.with_suffix(".pkl.tmp")
+        tmp.write_bytes(pickle.dumps((docstore, index_to_docstore_id)))
+        os.replace(tmp, pkl_path)
+    return changed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args()
+
+    total = 0
+    for pkl_path in sorted(FAISS_DIR.rglob("index.pkl")):
+        label = pkl_path.parent.relative_to(FAISS_DIR).as_posix()
+        n = backfill_index(pkl_path, args.dry_run, args.force)
+        total += n
+        print(f"  [{label}] {n} docs updated" if n else f"  [{label}] up to date")
+    print(f"\nDone: {total} docs {'would be ' if args.dry_run else ''}updated")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,34 @@
 # chains.py - RAG Pipeline for KHU Regulation Assistant
 # Updated for langchain 1.2.x API
 
+import asyncio
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
+import numpy as np
+
+try:
+    import ahocorasick  # pyahocorasick (선택): 학과명 다중 패턴 매칭 가속
+except ImportError:
+    ahocorasick = None
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langchain_core.messages import BaseMessage
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
 
 # RAG 시스템 프롬프트
 SYSTEM_PROMPT = (
@@ -58,76 +76,258 @@ ANSWER_FORMAT = """
 # 프로젝트 루트 디렉토리 (chains.py가 위치한 곳)
 PROJECT_ROOT = Path(__file__).resolve().parent
 
+EMBEDDING_MODEL = "text-embedding-3-large"
+
+# reindex_faiss.py로 HNSW 변환된 인덱스의 검색 폭 (클수록 recall↑, 속도↓)
+HNSW_EF_SEARCH = 64
+_EMBEDDINGS: Optional[OpenAIEmbeddings] = None
+
+
+def get_embeddings() -> OpenAIEmbeddings:
+    """프로세스 전체에서 공유하는 임베딩 클라이언트 (HTTP 커넥션 풀 재사용, 첫 호출 시 생성)"""
+    global _EMBEDDINGS
+    if _EMBEDDINGS is None:
+        _EMBEDDINGS = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+    return _EMBEDDINGS
+
+
+def _index_dir(category_slug: str, cohort: Optional[str] = None) -> Path:
+    """cohort 경로 우선, index.faiss가 없으면 카테고리 기본 경로로 fallback"""
+    base = PROJECT_ROOT / "faiss_db" / category_slug
+    if cohort:
+        cohort_base = base / str(cohort)
+        if (cohort_base / "index.faiss").exists():
+            return cohort_base
+    return base
+
+
+def index_signature(category_slug: str, cohort: Optional[str] = None) -> Tuple[int, ...]:
+    """
+    인덱스 파일(index.faiss / index.pkl / docstore.sqlite)의 st_mtime_ns. 캐시 키 용도:
+    add_document / rebuild_* / reindex_faiss / backfill_language로 다시 쓰면 값이 바뀜 (없는 파일은 0)
+    """
+    return _dir_signature(_index_dir(category_slug, cohort))
+
+
+def _dir_signature(base: Path) -> Tuple[int, ...]:
+    sig = []
+    for name in ("index.faiss", "index.pkl", "docstore.sqlite"):
+        try:
+            sig.append((base / name).stat().st_mtime_ns)
+        except OSError:
+            sig.append(0)
+    return tuple(sig)
+
+
+def multi_year_signature(category_slug: str, primary_cohort: Optional[str] = None) -> Tuple:
+    """
+    get_multi_year_vector_store 결과의 캐시 키: cohort가 있으면 연도 디렉토리 전체(추가/삭제 포함),
+    없으면 카테고리 통합 인덱스의 index_signature
+    """
+    if not primary_cohort:
+        return index_signature(category_slug, None)
+    base = PROJECT_ROOT / "faiss_db" / category_slug
+    years = sorted(d for d in base.iterdir() if d.is_dir() and re.match(r"^\d{4}$", d.name)) if base.is_dir() else []
+    return (_dir_signature(base),) + tuple((d.name, _dir_signature(d)) for d in years)
+
 
-def get_vector_store(category_slug: str, cohort: Optional[str] = None) -> FAISS:
+def get_vector_store(category_slug: str, cohort: Optional[str] = None, mmap: bool = True) -> FAISS:
     """
     카테고리(+코호트)별 FAISS 로드
     - 규정/학사제도: cohort=None → faiss_db/<category>/
     - 학부/대학원 시행세칙: cohort='2020' 등 → faiss_db/<category>/<cohort>/
+    - mmap=True: index.faiss를 읽기 전용 mmap으로 연다 (전체 read 없이 필요한 페이지만 적재).
+      read-only이므로 add/merge_from 대상이 될 인덱스는 mmap=False로 로드할 것.
     
-    Note: Windows에서 한글 경로 문제를 우회하기 위해 임시 디렉토리에 복사 후 로드합니다.
+    Note: Windows에서 faiss(C++)가 한글 경로를 못 여는 문제는 파이썬에서 파일을 바이트로 읽어
+    메모리에서 역직렬화하는 방식으로 우회합니다 (임시 디렉토리 복사 없음).
     cohort 경로가 없으면 카테고리 기본 인덱스로 fallback합니다.
     """
-    import os
-    import shutil
-    import tempfile
-    
-    base = PROJECT_ROOT / "faiss_db" / category_slug
-    
-    # cohort 경로 우선 시도, 없으면 기본 카테고리로 fallback
-    if cohort:
-        cohort_base = base / str(cohort)
-        if (cohort_base / "index.faiss").exists():
-            base = cohort_base
-        # else: use category base (fallback)
+    import pickle
+    import faiss
+    import sqlite_docstore
     
+    base = _index_dir(category_slug, cohort)
     index_path = base / "index.faiss"
     pkl_path = base / "index.pkl"
     
     if not index_path.exists():
         raise FileNotFoundError(f"FAISS index not found for: {category_slug}")
     
-    # 한글 경로 문제 우회: ASCII 경로 임시 디렉토리에 복사 후 로드
-    temp_dir = tempfile.mkdtemp(prefix="faiss_")
-    try:
-        # FAISS 파일들을 임시 디렉토리로 복사
-        shutil.copy2(str(index_path), os.path.join(temp_dir, "index.faiss"))
-        if pkl_path.exists():
-            shutil.copy2(str(pkl_path), os.path.join(temp_dir, "index.pkl"))
-        
-        # 임시 디렉토리에서 로드
-        result = FAISS.load_local(
-            temp_dir,
-            embeddings=OpenAIEmbeddings(model="text-embedding-3-large"),
-            allow_dangerous_deserialization=True,
-        )
-        return result
-    finally:
-        # 임시 디렉토리 정리
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    # FAISS.load_local과 같은 구성: index.faiss + docstore, index_to_docstore_id
+    index = None
+    if mmap:
+        try:
+            index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except (RuntimeError, AttributeError):
+            # 경로를 못 여는 경우(Windows 한글 경로) / mmap 미지원 빌드 → 메모리 로드
+            index = None
+    if index is None:
+        index = faiss.deserialize_index(np.frombuffer(index_path.read_bytes(), dtype=np.uint8))
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    if sqlite_docstore.is_fresh(base):
+        # 변환된 docstore.sqlite가 있으면 문서는 검색 결과로 필요할 때만 디스크에서 읽음
+        docstore, index_to_docstore_id = sqlite_docstore.load(base)
+    else:
+        docstore, index_to_docstore_id = pickle.loads(pkl_path.read_bytes())
+    return FAISS(
+        embedding_function=get_embeddings(),
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
+
+
+# HybridRetriever 의미 검색(키워드 검색과 겹쳐 실행) + MultiYearVectorStore 연도별 검색용
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-search")
+
+
+@lru_cache(maxsize=32)
+def _load_vs_cached(category_slug: str, cohort: Optional[str], signature: Tuple[int, ...]) -> FAISS:
+    """연도별 인덱스 캐시 (MultiYearVectorStore가 읽기만 하므로 공유해도 안전)"""
+    return get_vector_store(category_slug, cohort)
+
+
+def _load_vs(category_slug: str, cohort: Optional[str]) -> FAISS:
+    # 파일 mtime을 키에 넣어 인덱스를 다시 빌드하면 다음 요청부터 새로 로드
+    return _load_vs_cached(category_slug, cohort, index_signature(category_slug, cohort))
+
+
+class MultiYearVectorStore:
+    """
+    연도별 FAISS 인덱스를 합치지 않고 묶어 두는 vector store 대용.
+    - as_retriever().invoke(query): 질문 임베딩 1회 → 연도별 인덱스를 병렬 검색 →
+      연도 거리 가중 RRF(reciprocal rank fusion)로 합쳐 상위 k개 반환
+    - 결과 문서는 metadata에 '_cohort_year'가 붙은 사본 (캐시된 원본 docstore는 건드리지 않음)
+    """
+    RRF_K = 60
+
+    def __init__(self, stores: List[Tuple[str, FAISS]], primary_cohort: Optional[str] = None):
+        self.stores = stores
+        self.primary_cohort = primary_cohort
+        self._docstore = None
+
+    def _year_weight(self, year: str) -> float:
+        try:
+            return 1.0 / (1 + abs(int(year) - int(self.primary_cohort)))
+        except (TypeError, ValueError):
+            return 1.0
+
+    @property
+    def docstore(self):
+        """키워드 검색용: 연도별 docstore를 이어 붙인 읽기 전용 뷰 (문서는 꺼낼 때 연도 태그)"""
+        if self._docstore is None:
+            self._docstore = _MultiYearDocstore(self.stores)
+        return self._docstore
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        return self.similarity_search_by_vector(get_embeddings().embed_query(query), k=k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        def _search(item):
+            year, vs = item
+            return year, vs.similarity_search_with_score_by_vector(embedding, k=k, **kwargs)
+
+        if len(self.stores) > 1:
+            # 공용 _SEARCH_POOL 사용 (쿼리마다 스레드풀 생성 X). 이 함수 자체가 _SEARCH_POOL
+            # 워커에서 돌 수 있으므로, 아직 시작 안 된 작업은 취소하고 호출 스레드에서 직접 실행(교착 방지)
+            futures = [_SEARCH_POOL.submit(_search, item) for item in self.stores]
+            results = [_search(item) if f.cancel() else f.result() for item, f in zip(self.stores, futures)]
+        else:
+            results = [_search(item) for item in self.stores]
+
+        fused: Dict[str, Tuple[float, Document]] = {}
+        for year, hits in results:
+            w = self._year_weight(year)
+            for rank, (doc, _dist) in enumerate(hits, start=1):
+                score = w / (self.RRF_K + rank)
+                key = doc.page_content
+                prev = fused.get(key)
+                if prev is None:
+                    fused[key] = (score, _with_cohort_year(doc, year))
+                else:
+                    # 연도 간 동일 청크: 점수 합산, 태그는 가중치가 높은(가까운) 연도 유지
+                    fused[key] = (prev[0] + score, prev[1])
+        ranked = sorted(fused.values(), key=lambda x: x[0], reverse=True)
+        return [doc for _, doc in ranked[:k]]
+
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None):
+        store, skw = self, dict(search_kwargs or {})
+        k = skw.pop("k", 4)
+
+        class _Retriever:
+            def invoke(self, query: str) -> List[Document]:
+                return store.similarity_search(query, k=k, **skw)
+
+            def get_relevant_documents(self, query: str) -> List[Document]:
+                return self.invoke(query)
+
+        return _Retriever()
+
+
+class _MultiYearDocMap(Mapping):
+    def __init__(self, stores: List[Tuple[str, FAISS]]):
+        self._stores = stores
+
+    def __getitem__(self, doc_id: str) -> Document:
+        for year, vs in self._stores:
+            d = vs.docstore._dict
+            if doc_id in d:
+                return _with_cohort_year(d[doc_id], year)
+        raise KeyError(doc_id)
+
+    def __iter__(self):
+        for _, vs in self._stores:
+            yield from vs.docstore._dict
+
+    def __len__(self) -> int:
+        return sum(len(vs.docstore._dict) for _, vs in self._stores)
+
+    def items(self):
+        for year, vs in self._stores:
+            for doc_id, doc in vs.docstore._dict.items():
+                yield doc_id, _with_cohort_year(doc, year)
+
+
+class _MultiYearDocstore:
+    def __init__(self, stores: List[Tuple[str, FAISS]]):
+        self._dict = _MultiYearDocMap(stores)
+
+    def search(self, search: str):
+        try:
+            return self._dict[search]
+        except KeyError:
+            return f"ID {search} not found."
+
+
+def _with_cohort_year(doc: Document, year: str) -> Document:
+    # 빌드 시점에 태그가 저장된 인덱스(rebuild_*.py / tag_cohort_years.py)는 사본 없이 그대로
+    if doc.metadata.get("_cohort_year") == year:
+        return doc
+    return Document(page_content=doc.page_content, metadata={**doc.metadata, "_cohort_year": year})
 
 
 def get_multi_year_vector_store(
     category_slug: str,
     primary_cohort: Optional[str] = None,
     max_fallback: int = 3,
-) -> FAISS:
+):
     """
     Cross-year fallback retrieval.
-    primary_cohort (예: "2025") 인덱스를 로드하고,
-    인접 연도의 인덱스를 merge하여 검색 범위를 확장합니다.
+    primary_cohort (예: "2025") 인덱스와 인접 연도 인덱스를 묶은 MultiYearVectorStore를 반환합니다.
 
     전략:
-      1) primary_cohort 인덱스 로드
-      2) 인접 연도(최신 → 과거)를 최대 max_fallback개까지 병합
-      3) 각 문서 metadata에 '_cohort_year' 태그 추가
+      1) primary_cohort 인덱스 로드 (연도별 인덱스는 프로세스 내 캐시)
+      2) 인접 연도(가까운 연도 우선)를 최대 max_fallback개까지 추가
+      3) 검색 시 연도별로 따로 검색 후 RRF로 합침 (merge_from 복사 없음),
+         결과 문서 metadata에 '_cohort_year' 태그
 
-    cohort가 None이면 카테고리 통합 인덱스를 반환합니다.
+    cohort가 None이면 카테고리 통합 인덱스(FAISS)를 반환합니다.
     """
     if not primary_cohort:
-        return get_vector_store(category_slug, None)
+        return _load_vs(category_slug, None)
 
-    import re
     base_dir = PROJECT_ROOT / "faiss_db" / category_slug
 
     # 사용 가능한 연도 목록 스캔
@@ -144,16 +344,16 @@ def get_multi_year_vector_store(
 
     if not available_years:
         # 연도 디렉토리가 없으면 카테고리 통합 인덱스 사용
-        return get_vector_store(category_slug, None)
+        return _load_vs(category_slug, None)
+
+    stores: List[Tuple[str, FAISS]] = []
 
     # primary 연도 인덱스 로드
     primary_year = str(primary_cohort)
     try:
-        merged_vs = get_vector_store(category_slug, primary_year)
-        # primary 문서에 연도 태그 추가
-        _tag_cohort_year(merged_vs, primary_year)
+        stores.append((primary_year, _load_vs(category_slug, primary_year)))
     except FileNotFoundError:
-        merged_vs = None
+        pass
 
     # 인접 연도 선택: primary보다 가까운 연도 순서 (최신 우선)
     fallback_years = [
@@ -167,50 +367,179 @@ def get_multi_year_vector_store(
     except ValueError:
         pass
 
-    # 최대 max_fallback개 병합
-    merged_count = 0
+    # 최대 max_fallback개 추가
+    added = 0
     for year in fallback_years:
-        if merged_count >= max_fallback:
+        if added >= max_fallback:
             break
         try:
-            fallback_vs = get_vector_store(category_slug, year)
-            _tag_cohort_year(fallback_vs, year)
-            if merged_vs is None:
-                merged_vs = fallback_vs
-            else:
-                merged_vs.merge_from(fallback_vs)
-            merged_count += 1
+            stores.append((year, _load_vs(category_slug, year)))
+            added += 1
         except FileNotFoundError:
             continue
 
-    if merged_vs is None:
-        return get_vector_store(category_slug, None)
+    if not stores:
+        return _load_vs(category_slug, None)
 
-    return merged_vs
+    return MultiYearVectorStore(stores, primary_year)
 
 
-def _tag_cohort_year(vs: FAISS, year: str) -> None:
-    """FAISS vector store의 모든 문서 metadata에 _cohort_year 태그 추가."""
-    try:
-        for doc_id in vs.docstore._dict:
-            doc = vs.docstore._dict[doc_id]
-            if hasattr(doc, "metadata"):
-                doc.metadata["_cohort_year"] = year
-    except Exception:
-        pass  # 태그 실패해도 검색에는 영향 없음
+# 청크 언어 판정에 쓰는 앞부분 길이 (HybridRetriever / diagnose_index / backfill_language.py 공통)
+LANG_WINDOW = 500
+
+
+def _codepoints(content: str) -> np.ndarray:
+    return np.frombuffer(content.encode("utf-32-le"), dtype=np.uint32)
+
+
+def korean_ratio(content: str) -> float:
+    """한글 음절(가-힣) 비율 (공백/개행 제외)"""
+    if not content:
+        return 0.0
+    cp = _codepoints(content)
+    korean_chars = np.count_nonzero((cp >= 0xAC00) & (cp <= 0xD7A3))
+    total_chars = cp.size - np.count_nonzero((cp == 0x20) | (cp == 0x0A))
+    return float(korean_chars / max(total_chars, 1))
+
+
+def detect_lang(content: str) -> str:
+    """"ko" / "en" / "mixed": 한쪽 글자 수가 다른 쪽의 2배를 넘으면 그 언어"""
+    cp = _codepoints(content or "")
+    korean_chars = np.count_nonzero((cp >= 0xAC00) & (cp <= 0xD7A3))
+    lower = cp | 0x20  # ASCII 대문자 → 소문자
+    english_chars = np.count_nonzero((lower >= 0x61) & (lower <= 0x7A))
+    if korean_chars > english_chars * 2:
+        return "ko"
+    if english_chars > korean_chars * 2:
+        return "en"
+    return "mixed"
 
 
 def format_docs(docs: List) -> str:
     """Format retrieved documents into context string"""
     parts = []
+    append = parts.append
     for doc in docs:
-        src = doc.metadata.get("source", doc.metadata.get("filename", "알 수 없음"))
-        year_tag = doc.metadata.get("_cohort_year", "")
-        year_prefix = f"[{year_tag}년도] " if year_tag else ""
-        parts.append(f"Source: {year_prefix}{src}\n{doc.page_content}")
+        m = doc.metadata
+        # source가 있으면 filename은 조회하지 않음 (get 기본값 인자는 매번 평가됨)
+        src = m["source"] if "source" in m else m.get("filename", "알 수 없음")
+        year_tag = m.get("_cohort_year")
+        append(f"Source: [{year_tag}년도] {src}\n{doc.page_content}" if year_tag
+               else f"Source: {src}\n{doc.page_content}")
     return "\n\n---\n\n".join(parts)
 
 
+# 알려진 학과명 패턴 (키워드 추출용)
+DEPT_PATTERNS = [
+    "전자공학과", "컴퓨터공학과", "컴퓨터공학부", "화학공학과", "기계공학과",
+    "산업경영공학과", "원자력공학과", "건축공학과", "건축학과",
+    "사회기반시스템공학과", "환경학및환경공학과", "신소재공학과",
+    "정보전자신소재공학과", "소프트웨어융합학과", "인공지능학과",
+    "생체의공학과", "반도체공학과", "전자정보공학부",
+    "응용수학과", "응용물리학과", "응용화학과", "우주과학과",
+    "식품생명공학과", "유전생명공학과", "원예생명공학과",
+    "한방생명공학과", "스마트팜과학과",
+    "융합바이오", "국제학과", "아시아학과",
+]
+
+# 약어 매핑
+DEPT_ALIASES = {
+    "전자과": "전자공학과", "전공과": "전자공학과", "전자": "전자공학과",
+    "컴공과": "컴퓨터공학과", "컴공": "컴퓨터공학과", "컴퓨터": "컴퓨터공학과",
+    "화공과": "화학공학과", "화공": "화학공학과",
+    "기공과": "기계공학과", "기계": "기계공학과",
+    "산공과": "산업경영공학과", "산공": "산업경영공학과",
+    "원자력": "원자력공학과",
+    "건축": "건축공학과",
+    "환경": "환경학및환경공학과",
+    "소융": "소프트웨어융합학과", "소프트웨어": "소프트웨어융합학과",
+    "반도체": "반도체공학과",
+    "인공지능": "인공지능학과", "AI": "인공지능학과",
+    "생의공": "생체의공학과",
+    "신소재": "신소재공학과",
+}
+
+_DEPT_INDEX_KEYWORDS = tuple(dict.fromkeys([*DEPT_PATTERNS, *DEPT_ALIASES.values()]))
+
+
+def _build_automaton(words: Dict[str, str]):
+    """패턴 → 정규 학과명 Aho-Corasick 오토마톤 (pyahocorasick 없으면 None)"""
+    if ahocorasick is None:
+        return None
+    ac = ahocorasick.Automaton()
+    for word, canonical in words.items():
+        ac.add_word(word, canonical)
+    ac.make_automaton()
+    return ac
+
+
+# 쿼리용: 정식 학과명 + 약어 / 문서 색인용: 정식 학과명만
+_QUERY_AC = _build_automaton({**{p: p for p in DEPT_PATTERNS}, **DEPT_ALIASES})
+_CONTENT_AC = _build_automaton({k: k for k in _DEPT_INDEX_KEYWORDS})
+
+# _CONTENT_AC가 없을 때의 문서 색인용: 정식 학과명 union 정규식 한 번으로 스캔.
+# 전방탐색으로 모든 위치에서 매칭 → 겹치는 학과명(정보전자신소재공학과 ⊃ 신소재공학과)도 모두 찾음
+# (정식 학과명끼리는 접두어 관계가 없어 `kw in content` 검사와 결과가 같음)
+_DEPT_RX = re.compile("(?=(" + "|".join(map(re.escape, _DEPT_INDEX_KEYWORDS)) + "))")
+
+
+def extract_dept_keywords(query: str) -> List[str]:
+    """쿼리에서 학과명 키워드 추출 (약어는 정식 학과명으로)"""
+    if _QUERY_AC is not None:
+        # 한 번의 선형 스캔으로 겹치는 매칭까지 모두 (substring 검사와 같은 결과)
+        return list(dict.fromkeys(v for _, v in _QUERY_AC.iter(query)))
+    keywords = []
+    # 정식 학과명 매칭
+    for dept in DEPT_PATTERNS:
+        if dept in query:
+            keywords.append(dept)
+    # 약어 매칭
+    for alias, full_name in DEPT_ALIASES.items():
+        if alias in query and full_name not in keywords:
+            keywords.append(full_name)
+    return keywords
+
+
+def _doc_key(doc) -> str:
+    """
+    중복 제거 키: 본문 전체. 잘라낸 사본을 만들지 않고, str 해시는 객체에 캐시되어 재사용됨.
+    (docstore id는 연도별 인덱스마다 달라서 같은 조항의 연도 간 중복을 못 거름)
+    """
+    return doc.page_content
+
+
+def _dept_index(vector_store) -> Dict[str, Any]:
+    """
+    학과명 → 해당 학과명을 포함한 doc_id 목록(docstore 순서) 역색인.
+    vector store 객체에 한 번 만들어 붙여 두고 재사용 (_dept_idx).
+    """
+    idx = getattr(vector_store, "_dept_idx", None)
+    if idx is not None:
+        return idx
+    postings: Dict[str, List[str]] = {kw: [] for kw in _DEPT_INDEX_KEYWORDS}
+    order: Dict[str, int] = {}
+    seen_content = set()
+    for pos, (doc_id, doc) in enumerate(vector_store.docstore._dict.items()):
+        order[doc_id] = pos
+        content = getattr(doc, "page_content", "")
+        # 여러 연도에 같은 조항이 있으면 첫 문서만 색인 (키워드 결과 자체에 중복이 없도록)
+        if content in seen_content:
+            continue
+        seen_content.add(content)
+        if _CONTENT_AC is not None:
+            matched = dict.fromkeys(v for _, v in _CONTENT_AC.iter(content))
+        else:
+            matched = dict.fromkeys(m.group(1) for m in _DEPT_RX.finditer(content))
+        for kw in matched:
+            postings[kw].append(doc_id)
+    idx = {"postings": postings, "order": order}
+    try:
+        vector_store._dept_idx = idx
+    except AttributeError:
+        pass  # 속성을 붙일 수 없는 객체면 매번 생성
+    return idx
+
+
 def get_retriever_chain(
     vector_store: FAISS,
     meta_filter: Optional[Dict[str, Any]] = None,
@@ -231,68 +560,22 @@ def get_retriever_chain(
     
     base_retriever = vector_store.as_retriever(search_kwargs=skw)
     
-    # 알려진 학과명 패턴 (키워드 추출용)
-    DEPT_PATTERNS = [
-        "전자공학과", "컴퓨터공학과", "컴퓨터공학부", "화학공학과", "기계공학과",
-        "산업경영공학과", "원자력공학과", "건축공학과", "건축학과",
-        "사회기반시스템공학과", "환경학및환경공학과", "신소재공학과",
-        "정보전자신소재공학과", "소프트웨어융합학과", "인공지능학과",
-        "생체의공학과", "반도체공학과", "전자정보공학부",
-        "응용수학과", "응용물리학과", "응용화학과", "우주과학과",
-        "식품생명공학과", "유전생명공학과", "원예생명공학과",
-        "한방생명공학과", "스마트팜과학과",
-        "융합바이오", "국제학과", "아시아학과",
-    ]
-    
-    # 약어 매핑
-    DEPT_ALIASES = {
-        "전자과": "전자공학과", "전공과": "전자공학과", "전자": "전자공학과",
-        "컴공과": "컴퓨터공학과", "컴공": "컴퓨터공학과", "컴퓨터": "컴퓨터공학과",
-        "화공과": "화학공학과", "화공": "화학공학과",
-        "기공과": "기계공학과", "기계": "기계공학과",
-        "산공과": "산업경영공학과", "산공": "산업경영공학과",
-        "원자력": "원자력공학과",
-        "건축": "건축공학과",
-        "환경": "환경학및환경공학과",
-        "소융": "소프트웨어융합학과", "소프트웨어": "소프트웨어융합학과",
-        "반도체": "반도체공학과",
-        "인공지능": "인공지능학과", "AI": "인공지능학과",
-        "생의공": "생체의공학과",
-        "신소재": "신소재공학과",
-    }
-    
-    def _extract_dept_keywords(query: str) -> List[str]:
-        """쿼리에서 학과명 키워드 추출"""
-        keywords = []
-        # 정식 학과명 매칭
-        for dept in DEPT_PATTERNS:
-            if dept in query:
-                keywords.append(dept)
-        # 약어 매칭
-        for alias, full_name in DEPT_ALIASES.items():
-            if alias in query and full_name not in keywords:
-                keywords.append(full_name)
-        return keywords
+    def _semantic_search(query: str, query_vec=None) -> List:
+        # 호출측(시맨틱 캐시 조회)에서 이미 임베딩한 벡터가 있으면 다시 임베딩하지 않음
+        if query_vec is None:
+            return base_retriever.invoke(query)
+        return vector_store.similarity_search_by_vector(query_vec, **skw)
     
     def _keyword_search(keywords: List[str], max_results: int = 10) -> List:
-        """FAISS docstore에서 키워드 포함 문서 직접 검색"""
-        results = []
-        seen_ids = set()
+        """학과명 역색인으로 키워드 포함 문서 조회 (docstore 순서 유지)"""
         try:
-            for doc_id, doc in vector_store.docstore._dict.items():
-                if doc_id in seen_ids:
-                    continue
-                content = getattr(doc, "page_content", "")
-                for kw in keywords:
-                    if kw in content:
-                        results.append(doc)
-                        seen_ids.add(doc_id)
-                        break
-                if len(results) >= max_results:
-                    break
+            idx = _dept_index(vector_store)
+            postings, order = idx["postings"], idx["order"]
+            ids = set().union(*(postings.get(kw, ()) for kw in keywords))
+            docs = vector_store.docstore._dict
+            return [docs[i] for i in sorted(ids, key=order.__getitem__)[:max_results]]
         except Exception:
-            pass
-        return results
+            return []
     
     class HybridRetriever:
         def __init__(self, retriever, final_k, target_year=None):
@@ -300,12 +583,13 @@ def get_retriever_chain(
             self.final_k = final_k
             self.target_year = target_year
         
-        def _score_korean(self, content: str) -> float:
-            if not content:
-                return 0
-            korean_chars = sum(1 for c in content if '\uac00' <= c <= '\ud7a3')
-            total_chars = len(content.replace(" ", "").replace("\n", ""))
-            return korean_chars / max(total_chars, 1)
+        def _korean_ratio(self, doc) -> float:
+            """backfill_language.py로 미리 저장된 값 우선, 없으면 앞부분만 계산
+            (docstore 공유 metadata에 쓰면 응답 sources로 새어 나가므로 기록하지 않음)"""
+            ratio = doc.metadata.get("_kor_ratio")
+            if ratio is None:
+                ratio = korean_ratio(doc.page_content[:LANG_WINDOW])
+            return ratio
         
         def _score_year(self, doc) -> float:
             if not self.target_year:
@@ -319,61 +603,53 @@ def get_retriever_chain(
             except (ValueError, TypeError):
                 return 0.3
         
-        def invoke(self, query: str) -> List:
-            # 1) Semantic search
-            semantic_docs = self.retriever.invoke(query)
+        def invoke(self, query: str, query_vec=None) -> List:
+            # 1) Semantic search (임베딩 API + FAISS는 별도 스레드에서, 그동안 키워드 검색)
+            semantic_future = _SEARCH_POOL.submit(_semantic_search, query, query_vec)
             
             # 2) Keyword search for department names
-            dept_keywords = _extract_dept_keywords(query)
+            dept_keywords = extract_dept_keywords(query)
             keyword_docs = _keyword_search(dept_keywords, max_results=10) if dept_keywords else []
+            semantic_docs = semantic_future.result()
             
             # 3) Merge: keyword docs first, then semantic (deduplicate)
-            seen_content = set()
+            seen = set()
             all_docs = []
             
             # Add keyword-matched docs with boost flag
             for doc in keyword_docs:
-                content_key = doc.page_content[:200]
-                if content_key not in seen_content:
-                    seen_content.add(content_key)
+                key = _doc_key(doc)
+                if key not in seen:
+                    seen.add(key)
                     all_docs.append((doc, True))  # True = keyword match
             
             # Add semantic docs
             for doc in semantic_docs:
-                content_key = doc.page_content[:200]
-                if content_key not in seen_content:
-                    seen_content.add(content_key)
+                key = _doc_key(doc)
+                if key not in seen:
+                    seen.add(key)
                     all_docs.append((doc, False))
             
-            # 4) Score and rank
-            scored = []
-            for i, (doc, is_keyword_match) in enumerate(all_docs):
-                korean_score = self._score_korean(doc.page_content[:500])
-                year_score = self._score_year(doc)
-                rank_bonus = 1 - (i / max(len(all_docs), 1)) * 0.15
-                
-                # 키워드 매칭 문서에 큰 boost
-                keyword_boost = 0.5 if is_keyword_match else 0.0
-                
-                # 학과명이 content에 직접 포함되는지 추가 확인
-                content_match = 0.0
-                if dept_keywords:
-                    for kw in dept_keywords:
-                        if kw in doc.page_content:
-                            content_match = 0.3
-                            break
-                
-                final_score = (
-                    korean_score * 0.25
-                    + year_score * 0.20
-                    + rank_bonus * 0.10
-                    + keyword_boost
-                    + content_match
-                )
-                scored.append((final_score, doc))
+            # 4) Score and rank (문서별 특징만 모으고 가중합/정렬은 배열 연산으로)
+            n = len(all_docs)
+            if n == 0:
+                return []
+            korean = np.fromiter((self._korean_ratio(doc) for doc, _ in all_docs), dtype=float, count=n)
+            year = np.fromiter((self._score_year(doc) for doc, _ in all_docs), dtype=float, count=n)
+            rank_bonus = 1 - (np.arange(n) / n) * 0.15
+            # 키워드 매칭 문서에 큰 boost
+            keyword_boost = np.fromiter((0.5 if m else 0.0 for _, m in all_docs), dtype=float, count=n)
+            # 학과명이 content에 직접 포함되는지 추가 확인
+            content_match = np.fromiter(
+                (0.3 if dept_keywords and any(kw in doc.page_content for kw in dept_keywords) else 0.0
+                 for doc, _ in all_docs),
+                dtype=float, count=n,
+            )
             
-            scored.sort(key=lambda x: x[0], reverse=True)
-            return [doc for _, doc in scored[:self.final_k]]
+            final_score = korean * 0.25 + year * 0.20 + rank_bonus * 0.10 + keyword_boost + content_match
+            # stable: 동점이면 병합 순서(키워드 → 의미 검색) 유지
+            order = np.argsort(-final_score, kind="stable")[:self.final_k]
+            return [all_docs[i][0] for i in order]
         
         def get_relevant_documents(self, query: str) -> List:
             return self.invoke(query)
@@ -385,6 +661,25 @@ def get_retriever_chain(
 get_retreiver_chain = get_retriever_chain
 
 
+# 질문 재작성 결과 LRU: temperature=0이라 (질문, 대화 이력)이 같으면 결과도 같음.
+# 프롬프트/모델이 모든 체인에서 동일하므로 체인 인스턴스 간에 공유한다.
+REWRITE_CACHE_SIZE = 256
+_rewrite_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_rewrite_lock = threading.Lock()
+
+# 재작성이 이 시간(초) 안에 안 끝나면 원 질문으로 미리 돌려 둔 검색 결과를 사용
+# (대화 맥락 없이 검색되므로 LLM 호출보다 넉넉하게. 늦게 끝난 재작성 결과는 캐시에만 저장됨)
+REWRITE_TIMEOUT = float(os.getenv("RAG_REWRITE_TIMEOUT", "10"))
+
+# 재작성 LLM 호출 + 원 질문 선검색용. 선검색이 _SEARCH_POOL 작업을 기다리므로
+# 같은 풀을 쓰면 포화 시 교착될 수 있어 분리한다.
+_REWRITE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-rewrite")
+
+
+def _history_key(chat_history) -> tuple:
+    return tuple((getattr(m, "type", ""), getattr(m, "content", str(m))) for m in chat_history)
+
+
 def get_conversational_rag(retriever):
     """
     End-to-end Conversational RAG chain using modern LCEL
@@ -415,28 +710,59 @@ def get_conversational_rag(retriever):
     
     query_rewriter = query_rewrite_prompt | llm | StrOutputParser()
     
+    def _rewrite(original_query: str, chat_history, key: tuple) -> str:
+        search_query = query_rewriter.invoke({
+            "input": original_query,
+            "chat_history": chat_history
+        }).strip()
+        with _rewrite_lock:  # 실패는 캐시하지 않음
+            _rewrite_cache[key] = search_query
+            if len(_rewrite_cache) > REWRITE_CACHE_SIZE:
+                _rewrite_cache.popitem(last=False)
+        return search_query
+    
     # Build the chain using LCEL
     def retrieve_and_format(inputs: dict):
         """Retrieve documents and format them with context-aware query rewriting"""
         original_query = inputs.get("input", "")
         chat_history = inputs.get("chat_history", [])
+        # query_vec: original_query의 임베딩 (backend 시맨틱 캐시에서 계산한 것, 없으면 None)
+        query_vec = inputs.get("query_vec")
         
+        docs = None
         # Rewrite query if there's conversation history
         if chat_history and len(chat_history) > 0:
-            try:
-                rewritten_query = query_rewriter.invoke({
-                    "input": original_query,
-                    "chat_history": chat_history
-                })
-                search_query = rewritten_query.strip()
-            except Exception:
-                search_query = original_query
+            key = (original_query, _history_key(chat_history))
+            with _rewrite_lock:
+                search_query = _rewrite_cache.get(key)
+                if search_query is not None:
+                    _rewrite_cache.move_to_end(key)
+            if search_query is None:
+                # 재작성(LLM)과 원 질문 검색을 동시에 시작
+                rewrite_future = _REWRITE_POOL.submit(_rewrite, original_query, chat_history, key)
+                fallback_future = _REWRITE_POOL.submit(retriever.invoke, original_query, query_vec=query_vec)
+                try:
+                    search_query = rewrite_future.result(timeout=REWRITE_TIMEOUT)
+                except TimeoutError:
+                    logger.debug("query rewrite timed out after %.1fs; retrieving without chat context", REWRITE_TIMEOUT)
+                    search_query = original_query
+                except Exception:
+                    logger.debug("query rewrite failed; retrieving without chat context", exc_info=True)
+                    search_query = original_query
+                if search_query == original_query:
+                    docs = fallback_future.result()
+                else:
+                    fallback_future.cancel()  # 아직 시작 전이면 원 질문 임베딩/검색 생략
         else:
             search_query = original_query
         
-        docs = retriever.invoke(search_query)
+        if docs is None:
+            if query_vec is not None and search_query == original_query:
+                docs = retriever.invoke(search_query, query_vec=query_vec)
+            else:
+                docs = retriever.invoke(search_query)
         return {
-            **inputs,
+            **{k: v for k, v in inputs.items() if k != "query_vec"},  # 벡터는 프롬프트로 넘기지 않음
             "context": format_docs(docs),
             "_retrieved_docs": docs  # Keep for later extraction
         }
@@ -459,12 +785,12 @@ def get_conversational_rag(retriever):
         ("user", "{input}")
     ])
     
+    answer_chain = rag_prompt | llm | StrOutputParser()
+    
     # Chain that retrieves, formats, and generates
     chain = (
         RunnableLambda(retrieve_and_format)
-        | RunnablePassthrough.assign(
-            answer=rag_prompt | llm | StrOutputParser()
-        )
+        | RunnablePassthrough.assign(answer=answer_chain)
     )
     
     # Wrap to return context docs as well
@@ -476,4 +802,13 @@ def get_conversational_rag(retriever):
             "input": inputs.get("input", "")
         }
     
-    return RunnableLambda(invoke_with_context)
+    # Streaming: 답변 토큰을 {"answer": token}으로, 마지막에 {"context": 검색 문서}를 yield
+    async def astream_answer(inputs: dict):
+        prepared = await asyncio.to_thread(retrieve_and_format, inputs)
+        async for token in answer_chain.astream(prepared):
+            yield {"answer": token}
+        yield {"context": prepared.get("_retrieved_docs", [])}
+    
+    rag = RunnableLambda(invoke_with_context)
+    rag.astream_answer = astream_answer  # backend /chat/stream 용
+    return rag
@@ -1,18 +1,12 @@
 """학과별 문서 존재 여부 진단"""
 import os, sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Load API key
-secrets_path = os.path.join(os.path.dirname(__file__), ".streamlit", "secrets.toml")
-if os.path.exists(secrets_path):
-    try:
-        import tomllib
-    except ImportError:
-        import tomli as tomllib
-    with open(secrets_path, "rb") as f:
-        secrets = tomllib.load(f)
-        if "OPENAI_API_KEY" in secrets:
-            os.environ["OPENAI_API_KEY"] = secrets["OPENAI_API_KEY"]
+# Load API key (환경변수에 있으면 secrets.toml은 읽지 않음)
+from utils import ensure_api_key
+ensure_api_key()
 
 from chains import get_vector_store, get_retriever_chain
 
@@ -23,13 +17,8 @@ print("=" * 60)
 print("FAISS DB 내 문서 소스 파일 목록")
 print("=" * 60)
 docstore = vs.docstore
-all_docs = list(docstore._dict.values())
-sources = set()
-for doc in all_docs:
-    src = doc.metadata.get("source", "unknown")
-    sources.add(src)
-for s in sorted(sources):
-    count = sum(1 for d in all_docs if d.metadata.get("source") == s)
+source_counts = Counter(doc.metadata.get("source", "unknown") for doc in docstore._dict.values())
+for s, count in source_counts.most_common():
     print(f"  [{count:3d} chunks] {s}")
 
 # 2) 학과별 검색 테스트
@@ -44,9 +33,12 @@ queries = [
     "신소재공학과 졸업요건",
 ]
 
-for q in queries:
+# 쿼리마다 임베딩 API 호출이 병목이므로 스레드로 동시에 검색하고, 출력은 쿼리 순서대로
+with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+    results = list(pool.map(lambda q: vs.similarity_search(q, k=3), queries))
+
+for q, docs in zip(queries, results):
     print(f"\n>> Query: {q}")
-    docs = vs.similarity_search(q, k=3)
     for i, doc in enumerate(docs):
         content_preview = doc.page_content[:150].replace('\n', ' ')
         has_dept = q.split(" ")[0] in doc.page_content
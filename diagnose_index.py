@@ -3,20 +3,12 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Load API key from .streamlit/secrets.toml
-secrets_path = os.path.join(os.path.dirname(__file__), ".streamlit", "secrets.toml")
-if os.path.exists(secrets_path):
-    try:
-        import tomllib
-    except ImportError:
-        import tomli as tomllib
-    with open(secrets_path, "rb") as f:
-        secrets = tomllib.load(f)
-        if "OPENAI_API_KEY" in secrets:
-            os.environ["OPENAI_API_KEY"] = secrets["OPENAI_API_KEY"]
+# Load API key (환경변수에 있으면 secrets.toml은 읽지 않음)
+from utils import ensure_api_key
+ensure_api_key()
 
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from chains import get_embeddings, detect_lang, LANG_WINDOW
 import tempfile
 import shutil
 from pathlib import Path
@@ -49,37 +41,36 @@ def diagnose_faiss_index(category: str, cohort: str = None):
         
         store = FAISS.load_local(
             temp_dir,
-            embeddings=OpenAIEmbeddings(model="text-embedding-3-large"),
+            embeddings=get_embeddings(),
             allow_dangerous_deserialization=True
         )
         
-        # 문서 분석
-        docs = list(store.docstore._dict.values())
+        # 문서 분석: docstore를 한 번만 돌며 소스/언어 통계와 영어 샘플을 함께 수집
+        docs = store.docstore._dict.values()
         print(f"\n📊 Total documents: {len(docs)}")
         
-        # 소스 파일별 통계
-        sources = []
+        source_counts = Counter()
         languages = {"korean": 0, "english": 0, "mixed": 0}
+        lang_names = {"ko": "korean", "en": "english", "mixed": "mixed"}
+        english_samples = []  # (source, content[:200]) 최대 5개
         
         for doc in docs:
             meta = doc.metadata
-            source = meta.get("source") or meta.get("filename") or meta.get("title") or "Unknown"
-            sources.append(source)
+            source_counts[meta.get("source") or meta.get("filename") or meta.get("title") or "Unknown"] += 1
             
-            # 언어 감지 (간단한 휴리스틱)
-            content = doc.page_content[:500]
-            korean_chars = sum(1 for c in content if '\uac00' <= c <= '\ud7a3')
-            english_chars = sum(1 for c in content if 'a' <= c.lower() <= 'z')
+            # 언어: backfill_language.py로 저장된 _lang 우선, 없으면 계산
+            content = doc.page_content[:LANG_WINDOW]
+            languages[lang_names[meta.get("_lang") or detect_lang(content)]] += 1
             
-            if korean_chars > english_chars * 2:
-                languages["korean"] += 1
-            elif english_chars > korean_chars * 2:
-                languages["english"] += 1
-            else:
-                languages["mixed"] += 1
+            # 영어 문서 샘플은 앞 200자 기준
+            if len(english_samples) < 5:
+                head = content[:200]
+                korean_chars = sum(1 for c in head if '\uac00' <= c <= '\ud7a3')
+                english_chars = sum(1 for c in head if 'a' <= c.lower() <= 'z')
+                if english_chars > korean_chars * 2:
+                    english_samples.append((meta.get('source', 'Unknown'), head))
         
         # 소스 파일 통계
-        source_counts = Counter(sources)
         print(f"\n📁 Unique sources: {len(source_counts)}")
         print("\n🔝 Top 20 sources:")
         for src, count in source_counts.most_common(20):
@@ -94,17 +85,9 @@ def diagnose_faiss_index(category: str, cohort: str = None):
         # 영어 문서 샘플 (문제 있는 문서)
         if languages["english"] > 0:
             print(f"\n⚠️ English document samples (potential issues):")
-            count = 0
-            for doc in docs:
-                content = doc.page_content[:200]
-                korean_chars = sum(1 for c in content if '\uac00' <= c <= '\ud7a3')
-                english_chars = sum(1 for c in content if 'a' <= c.lower() <= 'z')
-                if english_chars > korean_chars * 2:
-                    print(f"\n  Source: {doc.metadata.get('source', 'Unknown')[:60]}")
-                    print(f"  Content: {content[:150]}...")
-                    count += 1
-                    if count >= 5:
-                        break
+            for source, head in english_samples:
+                print(f"\n  Source: {source[:60]}")
+                print(f"  Content: {head[:150]}...")
         
         # 검색 테스트
         print("\n\n🔍 Search test: '전자공학과 졸업요건'")
@@ -10,15 +10,20 @@ Features:
      * 실제 데이터와 혼동 방지를 위해 기본은 OFF입니다.
   3) pyshacl.validate() 훅(--validate --shapes ontology/shapes.ttl):
      내보낸 그래프를 주어진 SHACL shapes로 검증합니다.
+     --engine jena|topbraid 이면 외부 SHACL CLI로 검증합니다(validate_ttl.py).
   4) 디버깅/브라우징 편의를 위한 메타 방출:
      RDFS.label / DCTERMS.source / UNI.page / UNI.md5
+  5) CLI는 Graph에 모으지 않고 Turtle을 레코드 단위로 바로 씁니다(emit_meta_ttl).
+     Graph.serialize의 qname 계산/정렬 비용과 전체 트리플 메모리를 피하기 위함.
+     --validate일 때만 방금 쓴 TTL을 Graph로 다시 읽어 검증합니다.
 """
 from __future__ import annotations
 
 import argparse
 import json
 import random
-from typing import Dict, Iterable, Optional, Tuple
+import re
+from typing import Dict, Iterator, Optional, Set, TextIO, Tuple
 
 from rdflib import Graph, Namespace, URIRef, Literal
 from rdflib.namespace import RDF, RDFS, XSD, OWL, DCTERMS
@@ -28,6 +33,42 @@ UNI = Namespace("https://kg.khu.ac.kr/uni#")      # vocab (classes/properties)
 ID  = Namespace("https://kg.khu.ac.kr/id/")       # instances (optional)
 EX  = Namespace("https://kg.khu.ac.kr/example/")  # sample instance space
 
+# 자주 쓰는 term은 모듈 로드 시 한 번만 만들어 둠 (루프 안 Namespace.__getattr__ 회피)
+_T_CLAUSE          = UNI.Clause
+_P_TYPE            = RDF.type
+_P_SAMEAS          = OWL.sameAs
+_P_CATEGORY        = UNI.category
+_P_PROGRAM         = UNI.appliesToProgram
+_P_COHORT          = UNI.appliesToCohort
+_P_ARTICLE         = UNI.article
+_P_CLAUSE          = UNI.clause
+_P_EFFECTIVE_FROM  = UNI.effectiveFrom
+_P_EFFECTIVE_UNTIL = UNI.effectiveUntil
+_P_OVERRIDES       = UNI.overrides
+_P_CITES           = UNI.cites
+_P_EXCEPTION_FOR   = UNI.hasExceptionFor
+_P_LABEL           = RDFS.label
+_P_SOURCE          = DCTERMS.source
+_P_PAGE            = UNI.page
+_P_MD5             = UNI.md5
+_P_SAMPLE          = UNI.sample
+
+_BASIC_ATTRS = (
+    ("category", _P_CATEGORY), ("program", _P_PROGRAM), ("cohort", _P_COHORT),
+    ("article", _P_ARTICLE), ("clause", _P_CLAUSE),
+)
+_RELATION_ATTRS = (("overrides", _P_OVERRIDES), ("cites", _P_CITES))
+
+# Turtle 직접 출력용 prefix (긴 namespace가 먼저 매칭되도록 정렬)
+_PREFIXES = (
+    ("uni", str(UNI)), ("id", str(ID)), ("ex", str(EX)), ("owl", str(OWL)),
+    ("rdf", str(RDF)), ("rdfs", str(RDFS)), ("xsd", str(XSD)), ("dcterms", str(DCTERMS)),
+)
+_PREFIX_MATCH = sorted(_PREFIXES, key=lambda p: -len(p[1]))
+_PN_LOCAL_RE = re.compile(r"^[A-Za-z0-9_](?:[A-Za-z0-9_.-]*[A-Za-z0-9_-])?$")
+_IRI_BAD_RE = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+_LITERAL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"})
+
 # ---------- helpers ----------
 def _safe_uri(u: str) -> Optional[URIRef]:
     try:
@@ -35,9 +76,9 @@ def _safe_uri(u: str) -> Optional[URIRef]:
     except Exception:
         return None
 
-def _pick_subject_and_link(meta: Dict, g: Graph) -> URIRef:
+def _pick_subject_and_link(meta: Dict, g: Graph, quads: list) -> URIRef:
     """
-    Decide canonical subject and, if both URN and HTTP exist, add owl:sameAs links.
+    Decide canonical subject and, if both URN and HTTP exist, add owl:sameAs links (to quads).
     Priority: clauseUri(http) > articleUri(http) > meta['uri'] (could be URN or http)
     """
     http = meta.get("clauseUri") or meta.get("articleUri")
@@ -48,8 +89,8 @@ def _pick_subject_and_link(meta: Dict, g: Graph) -> URIRef:
         if any_uri and any_uri != http:
             u2 = _safe_uri(any_uri)
             if u2:
-                g.add((URIRef(http), OWL.sameAs, u2))
-                g.add((u2, OWL.sameAs, URIRef(http)))
+                quads.append((subj, _P_SAMEAS, u2, g))
+                quads.append((u2, _P_SAMEAS, subj, g))
     elif any_uri:
         subj = URIRef(any_uri)
     else:
@@ -57,83 +98,211 @@ def _pick_subject_and_link(meta: Dict, g: Graph) -> URIRef:
     return subj
 
 # ---------- conversion ----------
-def chunk_meta_to_rdf(meta: Dict) -> Tuple[Graph, URIRef]:
-    """
-    Convert one meta dict to RDF. Returns (graph, canonical_subject).
-    """
+def new_graph() -> Graph:
+    """prefix를 한 번 bind한 빈 Graph (여러 meta를 chunk_meta_to_rdf로 계속 추가)"""
     g = Graph()
     g.bind("uni", UNI)
     g.bind("id", ID)
     g.bind("owl", OWL)
     g.bind("ex", EX)
+    return g
+
+def chunk_meta_to_rdf(meta: Dict, g: Graph) -> URIRef:
+    """
+    Convert one meta dict to RDF, adding triples to g in place. Returns canonical_subject.
+    트리플은 quads 리스트에 모아 마지막에 g.addN 한 번으로 넣음.
+    """
+    quads = []
 
     # subject (and sameAs links)
-    subj = _pick_subject_and_link(meta, g)
+    subj = _pick_subject_and_link(meta, g, quads)
 
     # typing
-    g.add((subj, RDF.type, UNI.Clause))
+    quads.append((subj, _P_TYPE, _T_CLAUSE, g))
 
     # basic attributes
-    if "category" in meta:
-        g.add((subj, UNI.category, Literal(meta["category"])))
-    if "program" in meta:
-        g.add((subj, UNI.appliesToProgram, Literal(meta["program"])))
-    if "cohort" in meta:
-        g.add((subj, UNI.appliesToCohort, Literal(meta["cohort"])))
-    if "article" in meta:
-        # 숫자/문자 모두 허용—JSONL이 문자열일 수도 있으므로 Literal 그대로
-        g.add((subj, UNI.article, Literal(meta["article"])))
-    if "clause" in meta:
-        g.add((subj, UNI.clause, Literal(meta["clause"])))
+    # (article: 숫자/문자 모두 허용—JSONL이 문자열일 수도 있으므로 Literal 그대로)
+    for k, pred in _BASIC_ATTRS:
+        if k in meta:
+            quads.append((subj, pred, Literal(meta[k]), g))
 
     # effective period
     if meta.get("effectiveFrom"):
-        g.add((subj, UNI.effectiveFrom, Literal(meta["effectiveFrom"], datatype=XSD.date)))
+        quads.append((subj, _P_EFFECTIVE_FROM, Literal(meta["effectiveFrom"], datatype=XSD.date), g))
     if meta.get("effectiveUntil"):
-        g.add((subj, UNI.effectiveUntil, Literal(meta["effectiveUntil"], datatype=XSD.date)))
+        quads.append((subj, _P_EFFECTIVE_UNTIL, Literal(meta["effectiveUntil"], datatype=XSD.date), g))
 
     # relations (as-is; tolerate bad URIs)
-    for k, pred in (("overrides", UNI.overrides), ("cites", UNI.cites)):
+    for k, pred in _RELATION_ATTRS:
         vals = meta.get(k) or []
         for u in vals:
             ur = _safe_uri(u) if isinstance(u, str) else None
             if ur:
-                g.add((subj, pred, ur))
+                quads.append((subj, pred, ur, g))
 
     # hasExceptionFor: URI or literal
     for exc in (meta.get("hasExceptionFor") or []):
         if isinstance(exc, str) and exc.startswith("http"):
             ur = _safe_uri(exc)
             if ur:
-                g.add((subj, UNI.hasExceptionFor, ur))
+                quads.append((subj, _P_EXCEPTION_FOR, ur, g))
         else:
-            g.add((subj, UNI.hasExceptionFor, Literal(exc)))
+            quads.append((subj, _P_EXCEPTION_FOR, Literal(exc), g))
 
     # ---- optional debugging metadata ----
     # label
     lbl = meta.get("label")
     if lbl:
-        g.add((subj, RDFS.label, Literal(lbl)))
+        quads.append((subj, _P_LABEL, Literal(lbl), g))
     # source
     src = meta.get("source")
     if src:
-        g.add((subj, DCTERMS.source, Literal(src)))
+        quads.append((subj, _P_SOURCE, Literal(src), g))
     # page (int)
     if meta.get("page") is not None:
         try:
-            g.add((subj, UNI.page, Literal(int(meta["page"]), datatype=XSD.integer)))
+            quads.append((subj, _P_PAGE, Literal(int(meta["page"]), datatype=XSD.integer), g))
         except Exception:
             # 페이지가 숫자가 아니면 문자열로라도 남겨둠
-            g.add((subj, UNI.page, Literal(str(meta["page"]))))
+            quads.append((subj, _P_PAGE, Literal(str(meta["page"])), g))
     # md5
     md5v = meta.get("md5")
     if md5v:
-        g.add((subj, UNI.md5, Literal(md5v)))
+        quads.append((subj, _P_MD5, Literal(md5v), g))
+
+    g.addN(quads)
+    return subj
+
+# ---------- streaming Turtle writer ----------
+def _escape_literal(s: str) -> str:
+    return s.translate(_LITERAL_ESCAPES)
+
+def _compact(uri: str) -> str:
+    """known prefix면 uni:foo, 아니면 <full> (IRI에 못 쓰는 문자는 \\uXXXX)"""
+    for prefix, ns in _PREFIX_MATCH:
+        if uri.startswith(ns) and _PN_LOCAL_RE.match(uri[len(ns):]):
+            return f"{prefix}:{uri[len(ns):]}"
+    return "<" + _IRI_BAD_RE.sub(lambda m: f"\\u{ord(m.group()):04X}", uri) + ">"
+
+# emit_meta_ttl용 술어 표기: chunk_meta_to_rdf와 같은 _P_* 상수에서 만들어 둘이 어긋나지 않게
+_TTL_CLAUSE         = _compact(str(_T_CLAUSE))
+_TTL_SAMEAS         = _compact(str(_P_SAMEAS))
+_TTL_BASIC_ATTRS    = tuple((key, _compact(str(pred))) for key, pred in _BASIC_ATTRS)
+_TTL_RELATION_ATTRS = tuple((key, _compact(str(pred))) for key, pred in _RELATION_ATTRS)
+_TTL_EFFECTIVE      = tuple((key, _compact(str(pred))) for key, pred in (
+    ("effectiveFrom", _P_EFFECTIVE_FROM), ("effectiveUntil", _P_EFFECTIVE_UNTIL)))
+_TTL_EXCEPTION_FOR  = _compact(str(_P_EXCEPTION_FOR))
+_TTL_LABEL          = _compact(str(_P_LABEL))
+_TTL_SOURCE         = _compact(str(_P_SOURCE))
+_TTL_PAGE           = _compact(str(_P_PAGE))
+_TTL_MD5            = _compact(str(_P_MD5))
+_TTL_SAMPLE         = _compact(str(_P_SAMPLE))
+_TTL_DATE           = _compact(str(XSD.date))
+
+def _literal(value, datatype: Optional[str] = None) -> str:
+    """rdflib Literal(value[, datatype])과 같은 의미의 Turtle 표기"""
+    if datatype:
+        return f'"{_escape_literal(str(value))}"^^{datatype}'
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return f'"{value!r}"^^xsd:double'
+    return f'"{_escape_literal(str(value))}"'
+
+def write_prefixes(fw: TextIO) -> None:
+    for prefix, ns in _PREFIXES:
+        fw.write(f"@prefix {prefix}: <{ns}> .\n")
+    fw.write("\n")
+
+def _write_block(fw: TextIO, subj: str, pairs) -> None:
+    fw.write(subj + " " + " ;\n    ".join(f"{p} {o}" for p, o in pairs) + " .\n\n")
+
+def emit_meta_ttl(fw: TextIO, meta: Dict) -> str:
+    """
+    chunk_meta_to_rdf와 같은 트리플을 Turtle 문자열로 바로 씀. subject(Turtle 표기) 반환.
+    """
+    http = meta.get("clauseUri") or meta.get("articleUri")
+    any_uri = meta.get("uri")
+    if http:
+        subj = _compact(http)
+    elif any_uri:
+        subj = _compact(any_uri)
+    else:
+        raise ValueError("meta lacks both 'uri' and 'articleUri/clauseUri'")
+
+    pairs = [("a", _TTL_CLAUSE)]
+    if http and any_uri and any_uri != http:
+        other = _compact(any_uri)
+        pairs.append((_TTL_SAMEAS, other))
+        _write_block(fw, other, [(_TTL_SAMEAS, subj)])
+
+    # basic attributes
+    for key, pred in _TTL_BASIC_ATTRS:
+        if key in meta:
+            pairs.append((pred, _literal(meta[key])))
+
+    # effective period
+    for key, pred in _TTL_EFFECTIVE:
+        if meta.get(key):
+            pairs.append((pred, _literal(meta[key], _TTL_DATE)))
 
-    return g, subj
+    # relations
+    for key, pred in _TTL_RELATION_ATTRS:
+        for u in (meta.get(key) or []):
+            if isinstance(u, str):
+                pairs.append((pred, _compact(u)))
+
+    # hasExceptionFor: URI or literal
+    for exc in (meta.get("hasExceptionFor") or []):
+        if isinstance(exc, str) and exc.startswith("http"):
+            pairs.append((_TTL_EXCEPTION_FOR, _compact(exc)))
+        else:
+            pairs.append((_TTL_EXCEPTION_FOR, _literal(exc)))
+
+    # ---- optional debugging metadata ----
+    if meta.get("label"):
+        pairs.append((_TTL_LABEL, _literal(meta["label"])))
+    if meta.get("source"):
+        pairs.append((_TTL_SOURCE, _literal(meta["source"])))
+    if meta.get("page") is not None:
+        try:
+            pairs.append((_TTL_PAGE, _literal(int(meta["page"]))))
+        except Exception:
+            pairs.append((_TTL_PAGE, _literal(str(meta["page"]))))
+    if meta.get("md5"):
+        pairs.append((_TTL_MD5, _literal(meta["md5"])))
+
+    _write_block(fw, subj, pairs)
+    return subj
+
+def emit_sample_ttl(fw: TextIO, subj: str, count: int = 6, seed: Optional[int] = 42,
+                    emitted: Optional[Set[int]] = None) -> None:
+    """
+    inject_sample_relations의 Turtle 버전. demo 대상 설명은 emitted에 없을 때만 한 번 씀.
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    n = max(5, min(10, int(count)))
+    links = []
+    for i in range(n):
+        pred = random.choice(_SAMPLE_RELATION_PROPS)
+        links.append((_compact(str(pred)), f"ex:demo-{i+1}"))
+        if emitted is not None and i in emitted:
+            continue
+        _write_block(fw, f"ex:demo-{i+1}", [
+            ("a", _TTL_CLAUSE),
+            (_TTL_LABEL, _literal(f"Demo target #{i+1}")),
+            (_TTL_SAMPLE, _literal(True)),
+        ])
+        if emitted is not None:
+            emitted.add(i)
+    _write_block(fw, subj, links)
 
 # ---------- sample relation injector ----------
-_SAMPLE_RELATION_PROPS = [UNI.overrides, UNI.cites, UNI.hasExceptionFor]
+_SAMPLE_RELATION_PROPS = [_P_OVERRIDES, _P_CITES, _P_EXCEPTION_FOR]
 
 def inject_sample_relations(g: Graph, subj: URIRef, count: int = 6, seed: Optional[int] = 42) -> None:
     """
@@ -144,13 +313,15 @@ def inject_sample_relations(g: Graph, subj: URIRef, count: int = 6, seed: Option
         random.seed(seed)
 
     n = max(5, min(10, int(count)))
+    quads = []
     for i in range(n):
         target = URIRef(str(EX) + f"demo-{i+1}")
         pred = random.choice(_SAMPLE_RELATION_PROPS)
-        g.add((subj, pred, target))
-        g.add((target, RDF.type, UNI.Clause))
-        g.add((target, RDFS.label, Literal(f"Demo target #{i+1}")))
-        g.add((target, UNI.sample, Literal(True, datatype=XSD.boolean)))
+        quads.append((subj, pred, target, g))
+        quads.append((target, _P_TYPE, _T_CLAUSE, g))
+        quads.append((target, _P_LABEL, Literal(f"Demo target #{i+1}"), g))
+        quads.append((target, _P_SAMPLE, Literal(True, datatype=XSD.boolean), g))
+    g.addN(quads)
 
 # ---------- SHACL validation ----------
 def shacl_validate(g: Graph, shapes_path: str) -> Tuple[bool, Graph, str]:
@@ -174,33 +345,38 @@ def shacl_validate(g: Graph, shapes_path: str) -> Tuple[bool, Graph, str]:
     return conforms, results_graph, results_text
 
 # ---------- IO ----------
-def _read_meta_items(path: str) -> Iterable[Dict]:
+def _read_meta_items(path: str) -> Iterator[Dict]:
     """
     Accepts either:
       - a JSON file with an object (single meta) or a list of objects
       - a JSONL file (one JSON object per line)
+    JSONL은 한 줄씩 읽어 바로 yield (파일 전체를 메모리에 올리지 않음).
+    첫 줄이 '['로 시작하거나 한 줄짜리 JSON이 아니면(여러 줄 객체) 그때만 전체를 파싱.
     """
     with open(path, "r", encoding="utf-8") as f:
-        text = f.read().strip()
-    if not text:
-        return []
-    # try JSON (object or list)
-    try:
-        obj = json.loads(text)
-        if isinstance(obj, dict):
-            return [obj]
-        if isinstance(obj, list):
-            return obj
-    except Exception:
-        pass
-    # fallback: JSONL
-    items = []
-    for line in text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        items.append(json.loads(line))
-    return items
+        for line in f:
+            if line.strip():
+                break
+        else:
+            return  # 빈 파일
+        first = None
+        if not line.lstrip().startswith("["):
+            try:
+                first = json.loads(line)
+            except json.JSONDecodeError:
+                pass
+        if first is None:
+            obj = json.loads(line + f.read())
+            if isinstance(obj, dict):
+                yield obj
+            elif isinstance(obj, list):
+                yield from obj
+            return
+        # JSONL
+        yield first
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
 
 # ---------- CLI ----------
 def export_cli() -> int:
@@ -211,27 +387,31 @@ def export_cli() -> int:
     ap.add_argument("--sample-count", type=int, default=6, help="how many sample relations (5~10 recommended)")
     ap.add_argument("--validate", action="store_true", help="run SHACL validation after export")
     ap.add_argument("--shapes", default="ontology/shapes.ttl", help="path to SHACL shapes TTL")
+    ap.add_argument("--engine", choices=("pyshacl", "jena", "topbraid"), default="pyshacl",
+                    help="SHACL engine (jena/topbraid: validate the written TTL with the external CLI)")
     args = ap.parse_args()
 
-    g_all = Graph()
-    g_all.bind("uni", UNI)
-    g_all.bind("id", ID)
-    g_all.bind("owl", OWL)
-    g_all.bind("ex", EX)
-
-    metas = list(_read_meta_items(args.inp))
-    for m in metas:
-        g_one, subj = chunk_meta_to_rdf(m)
-        g_all += g_one
-        if args.inject_samples:
-            inject_sample_relations(g_all, subj=subj, count=args.sample_count)
-
-    g_all.serialize(destination=args.out, format="turtle")
+    metas = _read_meta_items(args.inp)
+    emitted: Set[int] = set()
+    with open(args.out, "w", encoding="utf-8", newline="\n") as fw:
+        write_prefixes(fw)
+        for m in metas:
+            subj = emit_meta_ttl(fw, m)
+            if args.inject_samples:
+                emit_sample_ttl(fw, subj, count=args.sample_count, emitted=emitted)
     print(f"✅ wrote: {args.out}")
 
     if args.validate:
         try:
-            conforms, _rg, rtxt = shacl_validate(g_all, args.shapes)
+            if args.engine == "pyshacl":
+                # pyshacl은 Graph가 필요하므로 검증할 때만 방금 쓴 TTL을 다시 읽음
+                g_all = new_graph()
+                g_all.parse(args.out, format="turtle")
+                conforms, _rg, rtxt = shacl_validate(g_all, args.shapes)
+            else:
+                # 외부 CLI는 파일 경로만 받으므로 rdflib 파싱 없이 바로 검증
+                from validate_ttl import validate_file
+                conforms, rtxt = validate_file(args.out, args.shapes, args.engine)
             if conforms:
                 print("✅ SHACL Validation Passed")
                 return 0
@@ -1,5 +1,7 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 FUSEKI_BASE = os.getenv("FUSEKI_BASE", "http://localhost:3030")
@@ -12,70 +14,101 @@ ADMIN_PASS = os.getenv("FUSEKI_PASS", "")
 
 AUTH = (ADMIN_USER, ADMIN_PASS) if ADMIN_USER and ADMIN_PASS else None
 HEADERS = {"Accept": "application/sparql-results+json"}
+POOL_MAXSIZE = int(os.getenv("FUSEKI_POOL_MAXSIZE", "32"))
+
+# 모듈 전역 세션: keep-alive로 연결(TCP/TLS 핸드셰이크)을 호출 간에 재사용
+_SESSION = requests.Session()
+_SESSION.auth = AUTH
+for _scheme in ("http://", "https://"):
+    _SESSION.mount(_scheme, HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE))
 
 def sparql_query(query: str, timeout: int = 30) -> Dict[str, Any]:
-    r = requests.get(QUERY_URL, params={"query": query}, headers=HEADERS, auth=AUTH, timeout=timeout)
+    # POST(form): 긴 쿼리도 URL 길이 제한에 걸리지 않음
+    r = _SESSION.post(QUERY_URL, data={"query": query}, headers=HEADERS, timeout=timeout)
     r.raise_for_status()
     return r.json()
 
 def sparql_update(update: str, timeout: int = 30) -> None:
-    r = requests.get(UPDATE_URL, params={"update": update}, auth=AUTH, timeout=timeout)
+    # SPARQL Update는 프로토콜상 POST만 허용
+    r = _SESSION.post(UPDATE_URL, data={"update": update}, timeout=timeout)
     r.raise_for_status()
+    clear_cache()
 
-def latest_clause(article: int, clause: Optional[int], graph_uri: str) -> Optional[Dict[str, str]]:
-    q = f"""
-    SELECT ?clause ?article ?clauseNo ?eff ?label ?page ?src WHERE {{
-      GRAPH <{graph_uri}> {{
+# 쿼리 템플릿은 모듈 로드 시 한 번만 만들고, 호출 때는 값만 치환
+_Q_LATEST = """
+    SELECT ?clause ?article ?clauseNo ?eff ?label ?page ?src WHERE {
+      GRAPH <%(graph)s> {
         ?clause a <https://kg.khu.ac.kr/uni#Clause> ;
                 <https://kg.khu.ac.kr/uni#article> ?article ;
                 <https://kg.khu.ac.kr/uni#effectiveFrom> ?eff .
-        OPTIONAL {{ ?clause <https://kg.khu.ac.kr/uni#clause> ?clauseNo }}
-        OPTIONAL {{ ?clause <http://www.w3.org/2000/01/rdf-schema#label> ?label }}
-        OPTIONAL {{ ?clause <https://kg.khu.ac.kr/uni#page> ?page }}
-        OPTIONAL {{ ?clause <http://purl.org/dc/terms/source> ?src }}
-        FILTER(?article = {article})
-        {"FILTER(BOUND(?clauseNo) && ?clauseNo = " + str(clause) + ")" if clause is not None else ""}
-      }}
-    }}
+        OPTIONAL { ?clause <https://kg.khu.ac.kr/uni#clause> ?clauseNo }
+        OPTIONAL { ?clause <http://www.w3.org/2000/01/rdf-schema#label> ?label }
+        OPTIONAL { ?clause <https://kg.khu.ac.kr/uni#page> ?page }
+        OPTIONAL { ?clause <http://purl.org/dc/terms/source> ?src }
+        FILTER(?article = %(article)s)
+        %(clause_filter)s
+      }
+    }
     ORDER BY DESC(?eff)
     LIMIT 1
     """
-    res = sparql_query(q)
-    b = res.get("results", {}).get("bindings", [])
-    if not b:
-        return None
-    row = b[0]
-    def g(key): 
-        v = row.get(key)
-        return v and v.get("value")
-    return {
-        "uri": g("clause"),
-        "article": g("article"),
-        "clauseNo": g("clauseNo"),
-        "effectiveFrom": g("eff"),
-        "label": g("label"),
-        "page": g("page"),
-        "source": g("src"),
-    }
+_Q_LATEST_CLAUSE_FILTER = "FILTER(BOUND(?clauseNo) && ?clauseNo = %s)"
 
-def clause_meta(clause_uri: str, graph_uri: str) -> Dict[str, Optional[str]]:
-    q = f"""
-    SELECT ?label ?src ?page ?md5 WHERE {{
-      GRAPH <{graph_uri}> {{
-        OPTIONAL {{ <{clause_uri}> <http://www.w3.org/2000/01/rdf-schema#label> ?label }}
-        OPTIONAL {{ <{clause_uri}> <http://purl.org/dc/terms/source> ?src }}
-        OPTIONAL {{ <{clause_uri}> <https://kg.khu.ac.kr/uni#page> ?page }}
-        OPTIONAL {{ <{clause_uri}> <https://kg.khu.ac.kr/uni#md5> ?md5 }}
-      }}
-    }}
+_Q_META = """
+    SELECT ?label ?src ?page ?md5 WHERE {
+      GRAPH <%(graph)s> {
+        OPTIONAL { <%(clause)s> <http://www.w3.org/2000/01/rdf-schema#label> ?label }
+        OPTIONAL { <%(clause)s> <http://purl.org/dc/terms/source> ?src }
+        OPTIONAL { <%(clause)s> <https://kg.khu.ac.kr/uni#page> ?page }
+        OPTIONAL { <%(clause)s> <https://kg.khu.ac.kr/uni#md5> ?md5 }
+      }
+    }
     LIMIT 1
     """
-    res = sparql_query(q)
-    b = res.get("results", {}).get("bindings", [])
-    if not b:
-        return {"label": None, "src": None, "page": None, "md5": None}
-    row = b[0]
-    def g(key):
-        v = row.get(key)
-        return v and v.get("value")
-    return {"label": g("label"), "src": g("src"), "page": g("page"), "md5": g("md5")}
+
+CACHE_SIZE = 4096
+
+def _first_row(q: str) -> Optional[Dict[str, Any]]:
+    b = sparql_query(q).get("results", {}).get("bindings", [])
+    return b[0] if b else None
+
+def _value(row: Dict[str, Any], key: str) -> Optional[str]:
+    v = row.get(key)
+    return v and v.get("value")
+
+# 캐시에는 불변 tuple을 두고, 호출자에게는 매번 새 dict를 돌려줌
+@lru_cache(maxsize=CACHE_SIZE)
+def _latest_clause_cached(article: int, clause: Optional[int], graph_uri: str) -> Optional[tuple]:
+    row = _first_row(_Q_LATEST % {
+        "graph": graph_uri,
+        "article": article,
+        "clause_filter": _Q_LATEST_CLAUSE_FILTER % clause if clause is not None else "",
+    })
+    if row is None:
+        return None
+    return (
+        ("uri", _value(row, "clause")),
+        ("article", _value(row, "article")),
+        ("clauseNo", _value(row, "clauseNo")),
+        ("effectiveFrom", _value(row, "eff")),
+        ("label", _value(row, "label")),
+        ("page", _value(row, "page")),
+        ("source", _value(row, "src")),
+    )
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _clause_meta_cached(clause_uri: str, graph_uri: str) -> tuple:
+    row = _first_row(_Q_META % {"graph": graph_uri, "clause": clause_uri}) or {}
+    return tuple((k, _value(row, k)) for k in ("label", "src", "page", "md5"))
+
+def latest_clause(article: int, clause: Optional[int], graph_uri: str) -> Optional[Dict[str, str]]:
+    items = _latest_clause_cached(article, clause, graph_uri)
+    return dict(items) if items is not None else None
+
+def clause_meta(clause_uri: str, graph_uri: str) -> Dict[str, Optional[str]]:
+    return dict(_clause_meta_cached(clause_uri, graph_uri))
+
+def clear_cache() -> None:
+    """그래프 내용이 바뀌면 (sparql_update 등) 조회 캐시 비우기"""
+    _latest_clause_cached.cache_clear()
+    _clause_meta_cached.cache_clear()
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-import argparse, json, re
+import argparse, json, os, re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, Iterable, Optional, List
+from typing import Dict, Iterable, Optional, List, Tuple
 
 PROGRAM_MAP = {
     "관광대학원": "GraduateSchoolOfTourism",
@@ -12,25 +14,29 @@ PROGRAM_MAP = {
 }
 CATEGORY_SET = {"regulations", "undergrad_rules", "grad_rules", "academic_system"}
 
-INT_RE  = re.compile(r"\d+")
-YEAR_RE = re.compile(r"(20\d{2})")
+# 숫자만 보는 패턴이므로 re.ASCII (\d/\s의 유니코드 범주 조회 생략)
+YEAR_RE = re.compile(r"(20\d{2})", re.ASCII)
+# "15", "제15조", "제15조 제2항" → (15, None|2) 한 번의 스캔으로
+ARTICLE_RE = re.compile(r"(\d+)(?:\s*조(?:\s*제?\s*(\d+)\s*항)?)?", re.ASCII)
 
-def _korean_article_to_int(s: Optional[str]) -> Optional[int]:
-    if not s: return None
-    m = INT_RE.search(s); return int(m.group(0)) if m else None
-
-def _infer_article(meta: Dict) -> Optional[int]:
+def _infer_article_clause(meta: Dict) -> Tuple[Optional[int], Optional[int]]:
+    article, clause_in_text = None, None
     for k in ("articleNumber", "article_number"):
         v = meta.get(k)
-        if isinstance(v, int): return v
+        if isinstance(v, int):
+            article = v; break
         if isinstance(v, str):
-            m = INT_RE.search(v)
-            if m: return int(m.group(0))
-    return _korean_article_to_int(meta.get("article_number"))
+            m = ARTICLE_RE.search(v)
+            if m:
+                article = int(m.group(1))
+                clause_in_text = int(m.group(2)) if m.group(2) else None
+                break
+    return article, _infer_clause(meta, clause_in_text)
 
-def _infer_clause(meta: Dict) -> Optional[int]:
+def _infer_clause(meta: Dict, default: Optional[int] = None) -> Optional[int]:
+    # articleSub이 없으면 조문 번호 문자열에서 함께 뽑은 항 번호(default)
     v = meta.get("articleSub")
-    if v in (None, "", "null"): return None
+    if v in (None, "", "null"): return default
     try: return int(v)
     except: return None
 
@@ -66,17 +72,19 @@ def _guess_program_from_path(p: Path) -> Optional[str]:
     return None
 
 def _read_text_with_fallback(path: Path) -> Optional[str]:
-    encs = ["utf-8", "utf-16", "cp949"]
-    for enc in encs:
-        try:
-            return path.read_text(encoding=enc)
-        except Exception:
-            continue
-    # 최후의 수단: 바이너리 읽고 디코딩 오류 무시
+    # 파일은 한 번만 읽고 BOM으로 인코딩 판별, 없으면 utf-8 → cp949 (디코딩 최대 2회)
     try:
-        return path.read_bytes().decode("utf-8", errors="ignore")
+        data = path.read_bytes()
     except Exception:
         return None
+    if data[:3] == b"\xef\xbb\xbf":
+        return data[3:].decode("utf-8", errors="replace")
+    if data[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        return data.decode("utf-16", errors="replace")
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("cp949", errors="replace")
 
 def _json_objects_from_text(text: str) -> List[Dict]:
     text = text.strip()
@@ -143,8 +151,7 @@ def convert_file(
     for it in items:
         meta = it.get("metadata", {})
         md5 = meta.get("md5") or "nohash"
-        article = _infer_article(meta)
-        clause  = _infer_clause(meta)
+        article, clause = _infer_article_clause(meta)
         page    = _pick_page(meta)
         label   = _infer_label(meta, article)
         source  = meta.get("sourceFile") or meta.get("document_title")
@@ -185,6 +192,10 @@ def convert_file(
 
         yield m
 
+def _convert_file_lines(fpath: Path, **defaults) -> List[str]:
+    # 워커 프로세스용: 제너레이터는 pickle이 안 되므로 JSONL 줄 리스트로 반환 (직렬화도 워커에서)
+    return [json.dumps(meta, ensure_ascii=False) + "\n" for meta in convert_file(fpath, **defaults)]
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--in-root", default="../past_documents",
@@ -203,6 +214,8 @@ def main():
                     help="기본 cohort")
     ap.add_argument("--glob", default="**/*.json,**/*.JSON,**/*.Json,**/*.jsonl,**/*.ndjson",
                     help="콤마로 구분된 glob 패턴")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="파일 변환 프로세스 수 (기본: CPU 수, 1이면 순차 처리)")
     args = ap.parse_args()
 
     in_root = Path(args.in_root).resolve()
@@ -226,19 +239,30 @@ def main():
     outp = Path(args.out)
     outp.parent.mkdir(parents=True, exist_ok=True)
 
+    convert = partial(
+        _convert_file_lines,
+        default_category=args.category,
+        default_program=args.program,
+        default_cohort=args.cohort,
+        default_code=args.code,
+        default_effective_from=args.effective_from,
+    )
+    workers = max(1, min(args.workers, len(files)))
+
     total = 0
     with outp.open("w", encoding="utf-8") as fw:
-        for fp in files:
-            for meta in convert_file(
-                fp,
-                default_category=args.category,
-                default_program=args.program,
-                default_cohort=args.cohort,
-                default_code=args.code,
-                default_effective_from=args.effective_from,
-            ):
-                fw.write(json.dumps(meta, ensure_ascii=False) + "\n")
-                total += 1
+        # 파일별 변환은 독립적이므로 프로세스 풀로 나누고, 쓰기는 메인 프로세스에서 입력 순서대로
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(convert, files)
+                for lines in results:
+                    fw.writelines(lines)
+                    total += len(lines)
+        else:
+            for fp in files:
+                lines = convert(fp)
+                fw.writelines(lines)
+                total += len(lines)
 
     print(f"[OK] wrote {outp} ({total} items)")
     return 0
@@ -1,10 +1,42 @@
 #!/usr/bin/env python3
+"""
+TTL 파일을 SHACL shapes로 검증.
+
+--engine:
+  pyshacl  : rdflib로 파싱 후 pyshacl (기본, 순수 파이썬)
+  jena     : Apache Jena `shacl validate` CLI (JVM, 큰 그래프에서 훨씬 빠름)
+  topbraid : TopBraid SHACL `shaclvalidate` CLI
+외부 엔진은 rdflib/pyshacl을 import하지 않고 파일 경로만 넘긴다.
+실행 파일이 PATH에 없으면 pyshacl로 대체. 경로는 JENA_SHACL / TOPBRAID_SHACL 환경변수로 지정 가능.
+"""
+import os
+import re
 import sys
+import shutil
 import argparse
-from rdflib import Graph
-from pyshacl import validate
+import subprocess
+from typing import List, Tuple
+
+ENGINES = ("pyshacl", "jena", "topbraid")
+
+_WIN = os.name == "nt"
+_EXTERNAL = {
+    "jena": (os.getenv("JENA_SHACL", "shacl.bat" if _WIN else "shacl"),
+             ["validate", "--shapes", "{shapes}", "--data", "{data}"]),
+    "topbraid": (os.getenv("TOPBRAID_SHACL", "shaclvalidate.bat" if _WIN else "shaclvalidate.sh"),
+                 ["-datafile", "{data}", "-shapesfile", "{shapes}"]),
+}
+# 검증 리포트(Turtle)의 sh:conforms true
+_CONFORMS_RE = re.compile(r"conforms>?\s+\"?true\b")
+
+def _external_command(engine: str, data_path: str, shapes_path: str) -> List[str]:
+    exe, argv = _EXTERNAL[engine]
+    return [exe] + [a.format(data=data_path, shapes=shapes_path) for a in argv]
+
+def validate_pyshacl(data_path: str, shapes_path: str) -> Tuple[bool, str]:
+    from rdflib import Graph  # lazy import (외부 엔진만 쓸 때는 불필요)
+    from pyshacl import validate
 
-def validate_rdf(data_path: str, shapes_path: str) -> int:
     data_graph = Graph()
     data_graph.parse(data_path, format="turtle")
 
@@ -18,6 +50,28 @@ def validate_rdf(data_path: str, shapes_path: str) -> int:
         advanced=True,
         abort_on_first=False,
     )
+    return conforms, results_text
+
+def validate_external(engine: str, data_path: str, shapes_path: str) -> Tuple[bool, str]:
+    if not os.path.exists(shapes_path):
+        raise FileNotFoundError(shapes_path)
+    proc = subprocess.run(_external_command(engine, data_path, shapes_path),
+                          capture_output=True, text=True, encoding="utf-8", errors="replace", check=False)
+    report = proc.stdout
+    if "conforms" not in report:
+        raise RuntimeError(f"{engine} SHACL failed (exit {proc.returncode}): {proc.stderr.strip()}")
+    return bool(_CONFORMS_RE.search(report)), report
+
+def validate_file(data_path: str, shapes_path: str, engine: str = "pyshacl") -> Tuple[bool, str]:
+    """(conforms, report_text). 외부 엔진 실행 파일이 없으면 pyshacl로 대체"""
+    if engine != "pyshacl":
+        if shutil.which(_EXTERNAL[engine][0]):
+            return validate_external(engine, data_path, shapes_path)
+        print(f"⚠️  {engine} SHACL CLI not found ({_EXTERNAL[engine][0]}) — falling back to pyshacl")
+    return validate_pyshacl(data_path, shapes_path)
+
+def validate_rdf(data_path: str, shapes_path: str, engine: str = "pyshacl") -> int:
+    conforms, results_text = validate_file(data_path, shapes_path, engine)
 
     if conforms:
         print("✅ SHACL Validation Passed")
@@ -31,5 +85,6 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--data", required=True, help="RDF Turtle file to validate")
     ap.add_argument("--shapes", default="ontology/shapes.ttl", help="SHACL shapes ttl")
+    ap.add_argument("--engine", choices=ENGINES, default="pyshacl", help="SHACL engine (jena/topbraid: external CLI)")
     args = ap.parse_args()
-    sys.exit(validate_rdf(args.data, args.shapes))
+    sys.exit(validate_rdf(args.data, args.shapes, args.engine))
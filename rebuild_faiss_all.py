@@ -33,6 +33,7 @@ if secrets_path.exists():
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
+from utils import tag_cohort_year
 
 EMBEDDING_MODEL = "text-embedding-3-large"
 DOCS_DIR = PROJECT_ROOT / "docs"
@@ -142,7 +143,8 @@ def main():
         
         print(f"-> Building index...", end=" ", flush=True)
         try:
-            save_faiss(docs, output_dir, embeddings)
+            # 연도별 인덱스는 _cohort_year 태그를 저장해 둠 (검색 시 태깅 생략)
+            save_faiss(tag_cohort_year(docs, year) if year else docs, output_dir, embeddings)
             total_docs += len(docs)
             total_indexes += 1
             print(f"DONE (saved to {output_dir.relative_to(PROJECT_ROOT)})")
@@ -31,6 +31,7 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from smart_chunker import rechunk_jsonl
+from utils import tag_cohort_year
 
 EMBEDDING_MODEL = "text-embedding-3-large"
 DOCS_DIR = PROJECT_ROOT / "docs"
@@ -142,7 +143,8 @@ def main():
         print(f"  [{label}] {len(docs)} docs → ", end="", flush=True)
 
         try:
-            n = save_faiss(docs, out_dir, embeddings)
+            # 연도별 인덱스는 _cohort_year 태그를 저장해 둠 (검색 시 태깅 생략)
+            n = save_faiss(tag_cohort_year(docs, year) if year else docs, out_dir, embeddings)
             total_docs += n
             total_indexes += 1
             print(f"DONE")
@@ -0,0 +1,124 @@
+"""
+기존 FAISS 인덱스(Flat)를 HNSW 인덱스로 변환
+============================================
+index.faiss의 벡터를 그대로 꺼내(reconstruct_n) IndexHNSWFlat에 같은 순서로 다시 넣는다.
+--sq8: 벡터를 8bit 스칼라 양자화해 HNSW32,SQ8로 저장 (메모리 1/4, 거리 계산 대역폭 감소, recall 약간 손실).
+       쿼리 임베딩은 그대로 fp32 (양자화는 인덱스 쪽만).
+벡터 번호가 유지되므로 index.pkl / docstore.sqlite(index_to_docstore_id)는 그대로 쓸 수 있다.
+임베딩 API 호출 없음. Flat 원본은 index.faiss.flat 으로 남겨 둔다 (Flat에서 변환할 때마다 갱신).
+--restore는 백업의 벡터 수가 현재 index.pkl(index_to_docstore_id)과 같을 때만 되돌린다.
+
+검색 시 efSearch는 chains.HNSW_EF_SEARCH (get_vector_store에서 설정).
+
+사용:
+  python reindex_faiss.py                      # faiss_db/ 아래 전체
+  python reindex_faiss.py --only undergrad_rules
+  python reindex_faiss.py --sq8                # HNSW + SQ8 (이미 HNSW인 인덱스도 변환)
+  python reindex_faiss.py --restore            # index.faiss.flat 으로 되돌리기
+"""
+import os
+import pickle
+import argparse
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+PROJECT_ROOT = Path(__file__).parent.resolve()
+FAISS_DIR = PROJECT_ROOT / "faiss_db"
+
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+BACKUP_SUFFIX = ".flat"  # 마지막으로 변환한 Flat 원본
+
+
+def _read(path: Path):
+    # 한글 경로 우회: 파이썬으로 읽어 메모리에서 역직렬화
+    return faiss.deserialize_index(np.frombuffer(path.read_bytes(), dtype=np.uint8))
+
+
+def _write(index, path: Path) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(faiss.serialize_index(index).tobytes())
+    os.replace(tmp, path)
+
+
+def _kind(index) -> str:
+    if isinstance(index, faiss.IndexHNSWSQ):
+        return "HNSW,SQ8"
+    if isinstance(index, faiss.IndexHNSWFlat):
+        return "HNSW"
+    if isinstance(index, faiss.IndexFlat):
+        return "Flat"
+    return type(index).__name__
+
+
+def to_hnsw(index, sq8: bool = False):
+    """Flat/HNSWFlat 인덱스 → 같은 metric의 HNSW(Flat 또는 SQ8) 인덱스 (벡터 순서 유지)"""
+    vectors = index.reconstruct_n(0, index.ntotal)
+    if sq8:
+        hnsw = faiss.index_factory(index.d, f"HNSW{HNSW_M},SQ8", index.metric_type)
+        hnsw.train(vectors)  # SQ8: 차원별 min/max 학습
+    else:
+        hnsw = faiss.IndexHNSWFlat(index.d, HNSW_M, index.metric_type)
+    hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    hnsw.add(vectors)
+    return hnsw
+
+
+def reindex(index_path: Path, sq8: bool = False) -> str:
+    index = _read(index_path)
+    kind, target = _kind(index), ("HNSW,SQ8" if sq8 else "HNSW")
+    if kind == target:
+        return f"already {target}"
+    if kind not in ("Flat", "HNSW"):
+        return f"skip ({kind})"
+    backup = index_path.with_name(index_path.name + BACKUP_SUFFIX)
+    if kind == "Flat":
+        # 인덱스를 다시 빌드했을 수 있으므로 Flat이면 항상 백업 갱신 (HNSW → SQ8은 기존 백업 유지)
+        _write(index, backup)
+    _write(to_hnsw(index, sq8), index_path)
+    return f"{index.ntotal} vectors {kind} → {target}"
+
+
+def _docstore_size(base: Path):
+    """현재 index_to_docstore_id 길이 (index.pkl 우선, 없으면 docstore.sqlite). 둘 다 없으면 None"""
+    if (base / "index.pkl").exists():
+        _, index_to_docstore_id = pickle.loads((base / "index.pkl").read_bytes())
+        return len(index_to_docstore_id)
+    from sqlite_docstore import DB_NAME, load
+    if (base / DB_NAME).exists():
+        return len(load(base)[1])
+    return None
+
+
+def restore(index_path: Path) -> str:
+    backup = index_path.with_name(index_path.name + BACKUP_SUFFIX)
+    if not backup.exists():
+        return "no backup"
+    n_backup, n_docs = _read(backup).ntotal, _docstore_size(index_path.parent)
+    if n_docs is None:
+        return "skip (no index.pkl / docstore)"
+    if n_backup != n_docs:
+        # 백업 이후 인덱스를 다시 빌드함 → 되돌리면 벡터 번호와 문서가 어긋남
+        return f"skip (stale backup: {n_backup} vectors, docstore has {n_docs})"
+    os.replace(backup, index_path)
+    return "restored"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--only", help="카테고리 하나만 (faiss_db/<category>)")
+    ap.add_argument("--sq8", action="store_true", help="HNSW32,SQ8 (8bit 스칼라 양자화)")
+    ap.add_argument("--restore", action="store_true")
+    args = ap.parse_args()
+
+    root = FAISS_DIR / args.only if args.only else FAISS_DIR
+    for index_path in sorted(root.rglob("index.faiss")):
+        label = index_path.parent.relative_to(FAISS_DIR).as_posix() or "."
+        result = restore(index_path) if args.restore else reindex(index_path, args.sq8)
+        print(f"  [{label}] {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 from __future__ import annotations
 from typing import List, Dict, Any, Tuple
 from math import exp
+import numpy as np
 from rank_bm25 import BM25Okapi
 
 # --- rapidfuzz 호환 래퍼 (2.x / 3.x 모두 지원) -------------------------------
@@ -21,10 +22,10 @@ except Exception:
 # ---------------------------------------------------------------------------
 
 
-def _norm01(x, lo, hi):
+def _norm01_arr(x: np.ndarray) -> np.ndarray:
+    lo, hi = float(x.min()), float(x.max())
     if hi <= lo:
-        return 0.0
-    x = max(lo, min(hi, x))
+        return np.zeros_like(x, dtype=float)
     return (x - lo) / (hi - lo)
 
 
@@ -65,10 +66,6 @@ def build_bm25(corpus_texts: List[str]) -> BM25Okapi:
     return BM25Okapi(tokenized)
 
 
-def bm25_scores(bm25: BM25Okapi, query: str, n: int) -> List[float]:
-    return bm25.get_scores(query.split()).tolist()[:n]
-
-
 def rerank(
     contexts: List[Dict[str, Any]],
     hints: Dict[str, Any],
@@ -91,41 +88,37 @@ def rerank(
         texts.append((d.get("page_content") or d.get("content") or ""))
         vecs.append(d.get("score") or 0.0)  # FAISS 리트리버가 부여한 유사도/거리 역수 등
 
+    n = len(texts)
+
     # 1) 코사인(또는 리트리버 점수) 정규화
-    vmin, vmax = min(vecs), max(vecs)
-    if vmin == vmax:
+    vec_arr = np.asarray(vecs, dtype=float)
+    if vec_arr.min() == vec_arr.max():
         # 리트리버 점수가 없을 때: 앞쪽(원 리트리버 상위)이 유리하도록 폴백
-        n = len(vecs)
-        vec_norm = [(n - i) / n for i in range(n)]  # 1.0..(1/n)
+        vec_norm = (n - np.arange(n)) / n  # 1.0..(1/n)
     else:
-        vec_norm = [_norm01(v, vmin, vmax) for v in vecs]
+        vec_norm = _norm01_arr(vec_arr)
 
-    # 2) BM25
+    # 2) BM25 (get_scores는 ndarray 반환)
     bm25 = build_bm25(texts)
-    bm = bm25_scores(bm25, query, len(texts))
-    bmin, bmax = min(bm), max(bm)
-    bm_norm = [_norm01(b, bmin, bmax) for b in bm]
+    bm_norm = _norm01_arr(np.asarray(bm25.get_scores(query.split()), dtype=float))
 
     # 3) 메타/버전/URI
-    meta = [_meta_score(md, hints) for md in mds]
-    ver = [_version_score(md, hints.get("refDate")) for md in mds]
-    uri_hit = []
+    ref_date = hints.get("refDate")
     target_uri = hints.get("target_uri")
-    for md in mds:
-        u = md.get("uri") or ""
-        uri_hit.append(1.0 if target_uri and u == target_uri else 0.0)
-
-    # 4) 가중합
-    scores = []
-    for i in range(len(texts)):
-        s = (
-            W["vec"] * vec_norm[i]
-            + W["bm25"] * bm_norm[i]
-            + W["meta"] * meta[i]
-            + W["ver"] * ver[i]
-            + W["uri"] * uri_hit[i]
-        )
-        scores.append(s)
+    meta = np.fromiter((_meta_score(md, hints) for md in mds), dtype=float, count=n)
+    ver = np.fromiter((_version_score(md, ref_date) for md in mds), dtype=float, count=n)
+    uri_hit = np.fromiter(
+        (1.0 if target_uri and (md.get("uri") or "") == target_uri else 0.0 for md in mds), dtype=float, count=n
+    )
+
+    # 4) 가중합 (벡터 연산)
+    scores = (
+        W["vec"] * vec_norm
+        + W["bm25"] * bm_norm
+        + W["meta"] * meta
+        + W["ver"] * ver
+        + W["uri"] * uri_hit
+    ).tolist()
 
     # 5) (선택) MMR로 다양성 확보
     k = min(len(contexts), 8)
@@ -0,0 +1,175 @@
+"""
+SQLite 기반 읽기 전용 docstore
+==============================
+index.pkl은 모든 청크의 page_content/metadata를 한 번에 unpickle하므로 연도별 인덱스를 여러 개
+올리면 문서가 전부 RAM에 올라간다. index.pkl 옆에 docstore.sqlite를 만들어 두면
+get_vector_store가 이를 대신 열고, 검색 결과로 필요한 문서만 doc_id(PRIMARY KEY)로 꺼낸다.
+
+  docs(id TEXT PRIMARY KEY, pos INTEGER, page_content TEXT, metadata BLOB)
+    pos      : FAISS 벡터 번호 (index_to_docstore_id의 키)
+    metadata : pickle (index.pkl과 같은 타입 그대로 복원)
+
+변환 (index.pkl은 그대로 둠, 인덱스를 다시 빌드하면 다시 변환):
+  python sqlite_docstore.py            # faiss_db/ 아래 전체
+  python sqlite_docstore.py --force    # 최신이어도 다시 변환
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Union
+
+from langchain_core.documents import Document
+
+DB_NAME = "docstore.sqlite"
+
+_SCHEMA = """
+CREATE TABLE docs (
+    id           TEXT PRIMARY KEY,
+    pos          INTEGER,
+    page_content TEXT NOT NULL,
+    metadata     BLOB
+);
+"""
+
+
+class ReadOnlyDocstoreError(PermissionError):
+    """SqliteDocstore는 변환된 스냅샷이라 add/delete를 지원하지 않음"""
+
+    def __init__(self):
+        super().__init__("SqliteDocstore is read-only; rebuild the index and re-run sqlite_docstore.py")
+
+
+def _row_to_doc(page_content: str, metadata: bytes) -> Document:
+    return Document(page_content=page_content, metadata=pickle.loads(metadata) if metadata else {})
+
+
+class _DocMap(Mapping):
+    """docstore._dict 호환 뷰: 조회는 키 단위, 순회(values/items)는 커서 한 번으로"""
+
+    def __init__(self, store: "SqliteDocstore"):
+        self._store = store
+
+    def __getitem__(self, doc_id: str) -> Document:
+        row = self._store._query("SELECT page_content, metadata FROM docs WHERE id = ?", (doc_id,), one=True)
+        if row is None:
+            raise KeyError(doc_id)
+        return _row_to_doc(*row)
+
+    def __iter__(self) -> Iterator[str]:
+        return (r[0] for r in self._store._query("SELECT id FROM docs ORDER BY rowid"))
+
+    def __len__(self) -> int:
+        return self._store._query("SELECT COUNT(*) FROM docs", one=True)[0]
+
+    def __contains__(self, doc_id) -> bool:
+        return self._store._query("SELECT 1 FROM docs WHERE id = ?", (doc_id,), one=True) is not None
+
+    def items(self) -> Iterator[Tuple[str, Document]]:
+        for doc_id, c, m in self._store._scan("SELECT id, page_content, metadata FROM docs ORDER BY rowid"):
+            yield doc_id, _row_to_doc(c, m)
+
+    def values(self) -> Iterator[Document]:
+        for c, m in self._store._scan("SELECT page_content, metadata FROM docs ORDER BY rowid"):
+            yield _row_to_doc(c, m)
+
+
+class SqliteDocstore:
+    """InMemoryDocstore의 읽기 경로(search, _dict)만 구현. 여러 검색 스레드가 공유하므로 연결은 락으로 보호"""
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path).resolve()
+        self._conn = self._connect()
+        self._lock = threading.Lock()
+        self._dict = _DocMap(self)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 읽기 전용 URI (Windows 한글 경로도 sqlite3가 처리)
+        return sqlite3.connect(f"{self.db_path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+
+    def _query(self, sql: str, params: tuple = (), one: bool = False):
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            return cur.fetchone() if one else cur.fetchall()
+
+    def _scan(self, sql: str, params: tuple = ()) -> Iterator[tuple]:
+        """전체 순회용: 별도 연결의 커서로 한 행씩 (공유 연결 락을 yield 동안 잡지 않음)"""
+        conn = self._connect()
+        try:
+            yield from conn.execute(sql, params)
+        finally:
+            conn.close()
+
+    def search(self, search: str) -> Union[str, Document]:
+        try:
+            return self._dict[search]
+        except KeyError:
+            return f"ID {search} not found."
+
+    def index_to_docstore_id(self) -> Dict[int, str]:
+        return dict(self._query("SELECT pos, id FROM docs WHERE pos IS NOT NULL"))
+
+    def add(self, texts):
+        raise ReadOnlyDocstoreError()
+
+    def delete(self, ids):
+        raise ReadOnlyDocstoreError()
+
+
+def is_fresh(base: Path) -> bool:
+    """base/docstore.sqlite가 있고 base/index.pkl보다 오래되지 않았는지"""
+    db, pkl = base / DB_NAME, base / "index.pkl"
+    return db.exists() and (not pkl.exists() or db.stat().st_mtime >= pkl.stat().st_mtime)
+
+
+def load(base: Path) -> Tuple[SqliteDocstore, Dict[int, str]]:
+    store = SqliteDocstore(base / DB_NAME)
+    return store, store.index_to_docstore_id()
+
+
+def convert(base: Path) -> int:
+    """base/index.pkl → base/docstore.sqlite. 변환한 문서 수 반환"""
+    docstore, index_to_docstore_id = pickle.loads((base / "index.pkl").read_bytes())
+    pos_of = {doc_id: pos for pos, doc_id in index_to_docstore_id.items()}
+    tmp = base / (DB_NAME + ".tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(_SCHEMA)
+        conn.executemany(
+            "INSERT INTO docs (id, pos, page_content, metadata) VALUES (?, ?, ?, ?)",
+            (
+                (doc_id, pos_of.get(doc_id), doc.page_content, pickle.dumps(doc.metadata))
+                for doc_id, doc in docstore._dict.items()
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, base / DB_NAME)
+    return len(docstore._dict)
+
+
+def main():
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args()
+
+    faiss_dir = Path(__file__).parent.resolve() / "faiss_db"
+    for pkl_path in sorted(faiss_dir.rglob("index.pkl")):
+        base = pkl_path.parent
+        label = base.relative_to(faiss_dir).as_posix()
+        if is_fresh(base) and not args.force:
+            print(f"  [{label}] up to date")
+            continue
+        print(f"  [{label}] {convert(base)} docs → {DB_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+기존 연도별 FAISS 인덱스에 _cohort_year 태그를 한 번만 기록
+==========================================================
+faiss_db/<category>/<YYYY>/index.pkl 의 모든 문서 metadata에 "_cohort_year": "<YYYY>"를 넣고 다시 저장.
+rebuild_faiss_all.py / rebuild_smart.py로 새로 빌드한 인덱스는 이미 태그가 있으므로 불필요.
+(index.faiss는 건드리지 않음)
+
+사용:
+  python tag_cohort_years.py            # 전체
+  python tag_cohort_years.py --dry-run  # 바뀔 문서 수만 출력
+"""
+import os
+import re
+import pickle
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.resolve()
+
+FAISS_DIR = PROJECT_ROOT / "faiss_db"
+YEAR_RE = re.compile(r"^\d{4}$")
+
+
+def tag_index(pkl_path: Path, year: str, dry_run: bool = False) -> int:
+    """index.pkl 하나를 패치. 새로 태그한 문서 수 반환"""
+    docstore, index_to_docstore_id = pickle.loads(pkl_path.read_bytes())
+    changed = 0
+    for doc in docstore._dict.values():
+        md = getattr(doc, "metadata", None)
+        if md is not None and md.get("_cohort_year") != year:
+            md["_cohort_year"] = year
+            changed += 1
+    if changed and not dry_run:
+        # 같은 디렉터리에 쓰고 교체 (중간에 실패해도 원본 유지)
+        tmp = pkl_path.with_suffix(".pkl.tmp")
+        tmp.write_bytes(pickle.dumps((docstore, index_to_docstore_id)))
+        os.replace(tmp, pkl_path)
+    return changed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    total = 0
+    for pkl_path in sorted(FAISS_DIR.glob("*/*/index.pkl")):
+        year = pkl_path.parent.name
+        if not YEAR_RE.match(year):
+            continue
+        label = f"{pkl_path.parent.parent.name}/{year}"
+        n = tag_index(pkl_path, year, args.dry_run)
+        total += n
+        print(f"  [{label}] {n} docs tagged" if n else f"  [{label}] up to date")
+    print(f"\nDone: {total} docs {'would be ' if args.dry_run else ''}tagged")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,9 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Load API key
-secrets_path = os.path.join(os.path.dirname(__file__), ".streamlit", "secrets.toml")
-if os.path.exists(secrets_path):
-    try:
-        import tomllib
-    except ImportError:
-        import tomli as tomllib
-    with open(secrets_path, "rb") as f:
-        secrets = tomllib.load(f)
-        if "OPENAI_API_KEY" in secrets:
-            os.environ["OPENAI_API_KEY"] = secrets["OPENAI_API_KEY"]
+# Load API key (환경변수에 있으면 secrets.toml은 읽지 않음)
+from utils import ensure_api_key
+ensure_api_key()
 
 from chains import get_vector_store, get_retriever_chain
 
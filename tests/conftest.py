@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 모듈(sqlite_docstore, ingest 등)을 패키지 설치 없이 import
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,42 @@
+"""admin_page: 로그 run에서 질문/답변 추출 (_SCHEMA_HINT가 결과를 바꾸지 않는지)"""
+from itertools import permutations
+
+import pytest
+
+pytest.importorskip("streamlit")
+import admin_page as ap
+
+RUNS = [
+    {"inputs": {"question": "q-question"}, "outputs": {"output": "a-output"}},
+    {"inputs": {"input": "q-input", "question": "q-question"}, "outputs": {"answer": "a-answer", "output": "a-output"}},
+    {"inputs": {"query": "q-query"}, "outputs": "a-outputs-str"},
+    {"inputs": {"prompt": "q-prompt", "question": "q-question"}, "outputs": {"content": "a-content", "output": "a-output"}},
+    {"inputs": {}, "outputs": {}},
+]
+
+
+def _first(run, getters) -> str:
+    """힌트 없이 우선순위 순 첫 매치"""
+    return next((v for v in (get(run) for get in getters) if v), "")
+
+
+@pytest.mark.parametrize("order", list(permutations(range(len(RUNS)))))
+def test_extract_independent_of_record_order(order, monkeypatch):
+    monkeypatch.setitem(ap._SCHEMA_HINT, "q", 0)
+    monkeypatch.setitem(ap._SCHEMA_HINT, "a", 0)
+    for i in order:
+        run = RUNS[i]
+        assert ap._extract_question(run) == _first(run, ap._Q_GETTERS)
+        assert ap._extract_answer(run) == _first(run, ap._A_GETTERS)
+
+
+def test_hint_does_not_shadow_higher_priority(monkeypatch):
+    monkeypatch.setitem(ap._SCHEMA_HINT, "q", 0)
+    monkeypatch.setitem(ap._SCHEMA_HINT, "a", 0)
+    # question만 있는 run으로 힌트가 뒤쪽 후보로 옮겨진 뒤에도
+    assert ap._extract_question(RUNS[0]) == "q-question"
+    assert ap._extract_answer(RUNS[0]) == "a-output"
+    # input/answer가 함께 있는 run은 우선순위가 높은 쪽
+    assert ap._extract_question(RUNS[1]) == "q-input"
+    assert ap._extract_answer(RUNS[1]) == "a-answer"
+    assert ap._extract_question(RUNS[4]) == "" and ap._extract_answer(RUNS[4]) == ""
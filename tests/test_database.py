@@ -0,0 +1,149 @@
+"""backend.database: JSON → SQLite 이관과 세션/북마크 CRUD가 예전 JSON 저장소와 같은 결과를 내는지"""
+import importlib
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+MEMBER = "2020123456"
+
+
+def _iso(minutes_ago: float) -> str:
+    return (datetime.now() - timedelta(minutes=minutes_ago)).isoformat()
+
+
+def _open(tmp_path, monkeypatch):
+    """tmp_path를 DATA_DIR로 해서 모듈을 새로 import (import 시 스키마 생성 + JSON 이관)"""
+    monkeypatch.setenv("BACKEND_DATA_DIR", str(tmp_path))
+    import backend.database as db
+    db = importlib.reload(db)
+    assert db.DB_FILE == tmp_path / "app.db"
+    return db
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    mod = _open(tmp_path, monkeypatch)
+    yield mod
+    mod._local.conn.close()
+
+
+def _old_find_active(sessions, category, max_age_seconds=3600):
+    """예전 chat.py의 활성 세션 탐색 (updated_at 내림차순 목록에서 같은 카테고리 + 1시간 이내)"""
+    for s in sessions[:5]:
+        if s.get("category") == category:
+            try:
+                updated = datetime.fromisoformat(s.get("updated_at", ""))
+                if (datetime.now() - updated).total_seconds() < max_age_seconds:
+                    return s
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+def test_migrate_json(tmp_path, monkeypatch):
+    history = {
+        MEMBER: [
+            {"id": "s-old", "member_id": MEMBER, "title": "졸업요건", "category": "undergrad_rules",
+             "cohort": "2020", "messages": [{"role": "user", "content": "졸업 학점은?"}],
+             "created_at": _iso(300), "updated_at": _iso(200), "preview": "졸업 학점은?..."},
+            {"id": "s-new", "title": "휴학", "category": "regulations", "cohort": None,
+             "messages": [], "created_at": _iso(30), "updated_at": _iso(10)},
+        ],
+        "other": [{"title": "id 없음", "category": "regulations", "updated_at": _iso(5)}],
+    }
+    bookmarks = {MEMBER: [
+        {"id": "b1", "title": "제10조", "article": "10", "uri": "urn:khu:reg:x:2024-03-01:art10",
+         "category": "regulations", "created_at": _iso(60)},
+        {"id": "b2", "title": "제3조", "article": "3", "uri": None, "category": "grad_rules", "created_at": _iso(1)},
+    ]}
+    (tmp_path / "history.json").write_text(json.dumps(history, ensure_ascii=False), encoding="utf-8")
+    (tmp_path / "bookmarks.json").write_text(json.dumps(bookmarks, ensure_ascii=False), encoding="utf-8")
+
+    db = _open(tmp_path, monkeypatch)
+    try:
+        # 예전 get_user_history: updated_at 내림차순
+        expected = sorted(history[MEMBER], key=lambda x: x.get("updated_at", ""), reverse=True)
+        got = db.get_user_history(MEMBER)
+        assert [s["id"] for s in got] == [s["id"] for s in expected]
+        old = db.get_session(MEMBER, "s-old")
+        for key, value in history[MEMBER][0].items():
+            assert old[key] == value
+        new = db.get_session(MEMBER, "s-new")
+        assert new["member_id"] == MEMBER and new["preview"] == ""
+        # id 없는 세션은 새 id로, member_id는 JSON 키에서
+        (other,) = db.get_user_history("other")
+        assert other["id"] and other["member_id"] == "other"
+        # 예전 get_user_bookmarks: 저장 순서 그대로
+        assert db.get_user_bookmarks(MEMBER) == [dict(b, member_id=MEMBER) for b in bookmarks[MEMBER]]
+
+        # 테이블이 비어 있지 않으면 다시 이관하지 않음 (원본 JSON은 그대로)
+        db._local.conn.close()
+        db = _open(tmp_path, monkeypatch)
+        assert len(db.get_user_history(MEMBER)) == 2
+        assert len(db.get_user_bookmarks(MEMBER)) == 2
+        assert (tmp_path / "history.json").exists()
+    finally:
+        db._local.conn.close()
+
+
+def test_session_crud(db):
+    assert db.get_user_history(MEMBER) == []
+    s1 = db.create_session(MEMBER, "첫 질문", "regulations", "2024")
+    assert set(s1) == {"id", "member_id", "title", "category", "cohort", "messages",
+                       "created_at", "updated_at", "preview"}
+    assert db.get_session(MEMBER, s1["id"]) == s1
+    s2 = db.create_session(MEMBER, "두번째", "grad_rules", session_id="fixed-id")
+    assert s2["id"] == "fixed-id"
+    assert [s["id"] for s in db.get_user_history(MEMBER)] == ["fixed-id", s1["id"]]
+
+    messages = [{"role": "user", "content": "가" * 60}, {"role": "assistant", "content": "답"}]
+    updated = db.update_session(MEMBER, s1["id"], messages)
+    assert updated["messages"] == messages
+    assert updated["preview"] == "가" * 50 + "..."
+    assert updated["title"] == "첫 질문"  # title 미지정이면 유지
+    assert updated["updated_at"] > s1["updated_at"]
+    assert db.update_session(MEMBER, s1["id"], messages, title="새 제목")["title"] == "새 제목"
+    # 갱신된 세션이 목록 맨 앞으로 (캐시도 무효화)
+    assert [s["id"] for s in db.get_user_history(MEMBER)] == [s1["id"], "fixed-id"]
+    # 다른 사용자 / 없는 세션
+    assert db.update_session("someone", s1["id"], messages) is None
+    assert db.get_session("someone", s1["id"]) is None
+    assert db.update_session(MEMBER, "missing", messages) is None
+
+    assert db.delete_session(MEMBER, s1["id"]) is True
+    assert db.delete_session(MEMBER, s1["id"]) is False
+    assert db.delete_session("someone", "fixed-id") is False
+    assert [s["id"] for s in db.get_user_history(MEMBER)] == ["fixed-id"]
+
+
+def test_bookmark_crud(db):
+    b1 = db.add_bookmark(MEMBER, "제10조", "10", "urn:khu:reg:x:2024-03-01:art10", "regulations")
+    b2 = db.add_bookmark(MEMBER, "제3조", None, None, "grad_rules")
+    assert db.get_user_bookmarks(MEMBER) == [b1, b2]
+    assert db.delete_bookmark("someone", b1["id"]) is False
+    assert db.delete_bookmark(MEMBER, b1["id"]) is True
+    assert db.delete_bookmark(MEMBER, b1["id"]) is False
+    assert db.get_user_bookmarks(MEMBER) == [b2]
+
+
+def _set_updated(db, session_id: str, iso: str):
+    with db._connect() as conn:
+        conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (iso, session_id))
+    db._bump_history(MEMBER)
+
+
+@pytest.mark.parametrize("ages, category, expected", [
+    ({"a": ("regulations", 10), "b": ("regulations", 30)}, "regulations", "a"),
+    ({"a": ("regulations", 90), "b": ("grad_rules", 5)}, "regulations", None),   # 1시간 지남
+    ({"a": ("grad_rules", 5), "b": ("regulations", 50)}, "regulations", "b"),
+    ({"a": ("grad_rules", 5)}, "regulations", None),                            # 같은 카테고리 없음
+])
+def test_find_active_session_matches_json(db, ages, category, expected):
+    for sid, (cat, minutes_ago) in ages.items():
+        db.create_session(MEMBER, sid, cat, session_id=sid)
+        _set_updated(db, sid, _iso(minutes_ago))
+    old = _old_find_active(db.get_user_history(MEMBER), category)
+    new = db.find_active_session(MEMBER, category)
+    assert (old and old["id"]) == (new and new["id"]) == expected
+    assert db.find_active_session("someone", category) is None
@@ -0,0 +1,68 @@
+"""ingest/rdf_export: 스트리밍 Turtle(emit_meta_ttl)이 Graph 변환(chunk_meta_to_rdf)과 같은 그래프인지"""
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("rdflib")
+from rdflib.compare import isomorphic, graph_diff
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "ingest"))
+import rdf_export as rx
+
+SAMPLE_META = json.loads((Path(rx.__file__).parent / "meta.json").read_text(encoding="utf-8"))
+
+METAS = [
+    SAMPLE_META,
+    {
+        "uri": "urn:khu:reg:UGR:2023-03-01:art12:cl2",
+        "clauseUri": "https://kg.khu.ac.kr/reg/UGR-2023-03-01#art12-cl2",
+        "articleUri": "https://kg.khu.ac.kr/reg/UGR-2023-03-01#art12",
+        "category": "undergrad_rules", "program": "컴퓨터공학과", "cohort": 2023,
+        "article": "12", "clause": 2, "effectiveFrom": "2023-03-01", "effectiveUntil": "2024-02-29",
+        "overrides": ["https://kg.khu.ac.kr/reg/UGR-2022-03-01#art12"], "cites": ["urn:khu:reg:REG:2020-01-01:art3", 7],
+        "hasExceptionFor": ["https://kg.khu.ac.kr/id/transfer", "편입생"],
+        "label": '제12조 "졸업"\n2항', "source": "docs\\undergrad.pdf", "page": "15", "md5": "d41d8cd98f00b204",
+    },
+    {"uri": "urn:khu:reg:ACA:2025-01-01:art1", "category": "academic_system", "page": "iv", "weight": 0.5},
+]
+
+
+def _emitted_graph(metas, inject_samples=False):
+    fw = io.StringIO()
+    rx.write_prefixes(fw)
+    emitted = set()
+    for m in metas:
+        subj = rx.emit_meta_ttl(fw, m)
+        if inject_samples:
+            rx.emit_sample_ttl(fw, subj, emitted=emitted)
+    g = rx.new_graph()
+    g.parse(data=fw.getvalue(), format="turtle")
+    return g
+
+
+def _assert_same(expected, got):
+    if not isomorphic(expected, got):
+        _, only_expected, only_got = graph_diff(expected, got)
+        pytest.fail(f"only in chunk_meta_to_rdf: {sorted(only_expected)}\nonly in emit_meta_ttl: {sorted(only_got)}")
+
+
+@pytest.mark.parametrize("meta", METAS, ids=["meta.json", "full", "urn-only"])
+def test_emit_meta_ttl_matches_graph(meta):
+    expected = rx.new_graph()
+    rx.chunk_meta_to_rdf(meta, expected)
+    _assert_same(expected, _emitted_graph([meta]))
+
+
+def test_emit_sample_ttl_matches_inject():
+    expected = rx.new_graph()
+    for m in METAS:
+        rx.inject_sample_relations(expected, rx.chunk_meta_to_rdf(m, expected))
+    _assert_same(expected, _emitted_graph(METAS, inject_samples=True))
+
+
+def test_emit_meta_ttl_requires_subject():
+    with pytest.raises(ValueError):
+        rx.emit_meta_ttl(io.StringIO(), {"category": "regulations"})
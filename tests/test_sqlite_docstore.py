@@ -0,0 +1,82 @@
+"""sqlite_docstore: index.pkl → docstore.sqlite 변환 / 로드 / 최신 여부"""
+import os
+import pickle
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain_core")
+from langchain_core.documents import Document
+
+import sqlite_docstore
+from sqlite_docstore import DB_NAME, ReadOnlyDocstoreError, convert, is_fresh, load
+
+DOCS = {
+    "a": Document(page_content="제1조(목적) 이 규정은 ...", metadata={"article": 1, "cohort_year": "2024"}),
+    "b": Document(page_content="제2조(정의) ...", metadata={"article": 2, "department": "컴퓨터공학과"}),
+    "orphan": Document(page_content="벡터 없는 문서", metadata={}),
+}
+INDEX_TO_ID = {0: "b", 1: "a"}
+
+
+@pytest.fixture
+def base(tmp_path):
+    # InMemoryDocstore 대신 _dict만 가진 객체 (convert는 _dict만 읽음)
+    docstore = SimpleNamespace(_dict=DOCS)
+    (tmp_path / "index.pkl").write_bytes(pickle.dumps((docstore, INDEX_TO_ID)))
+    return tmp_path
+
+
+def test_convert_load_roundtrip(base):
+    assert convert(base) == len(DOCS)
+    store, index_to_docstore_id = load(base)
+    assert index_to_docstore_id == INDEX_TO_ID
+    for doc_id, doc in DOCS.items():
+        got = store.search(doc_id)
+        assert got.page_content == doc.page_content
+        assert got.metadata == doc.metadata
+    assert store.search("missing") == "ID missing not found."
+
+
+def test_docmap_views(base):
+    convert(base)
+    store, _ = load(base)
+    m = store._dict
+    assert len(m) == len(DOCS)
+    assert list(m) == list(DOCS)  # 삽입 순서 유지
+    assert "a" in m and "missing" not in m
+    assert [(k, d.page_content) for k, d in m.items()] == [(k, d.page_content) for k, d in DOCS.items()]
+    assert [d.metadata for d in m.values()] == [d.metadata for d in DOCS.values()]
+
+
+def test_items_does_not_hold_lock(base):
+    convert(base)
+    store, _ = load(base)
+    # 순회 도중 같은 store로 키 조회 (공유 연결 락을 잡고 있으면 교착)
+    for doc_id, _ in store._dict.items():
+        assert store.search(doc_id).page_content == DOCS[doc_id].page_content
+
+
+def test_is_fresh(base):
+    assert not is_fresh(base)  # sqlite 없음
+    convert(base)
+    assert is_fresh(base)
+    pkl, db = base / "index.pkl", base / DB_NAME
+    # 인덱스를 다시 빌드해 index.pkl이 더 새로워짐
+    os.utime(pkl, (db.stat().st_mtime + 10, db.stat().st_mtime + 10))
+    assert not is_fresh(base)
+    convert(base)
+    os.utime(db, (pkl.stat().st_mtime + 1, pkl.stat().st_mtime + 1))
+    assert is_fresh(base)
+    pkl.unlink()  # sqlite만 배포한 경우
+    assert is_fresh(base)
+
+
+def test_read_only(base):
+    convert(base)
+    store, _ = load(base)
+    with pytest.raises(ReadOnlyDocstoreError, match="read-only"):
+        store.add({"c": Document(page_content="x")})
+    with pytest.raises(PermissionError):
+        store.delete(["a"])
+    assert sqlite_docstore.SqliteDocstore(base / DB_NAME).index_to_docstore_id() == INDEX_TO_ID
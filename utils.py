@@ -4,11 +4,12 @@
 #  - 메타데이터 정규화(스키마/프로그램/코호트/조·항/콘텐츠 타입)
 #  - URN/HTTP 영구 URI 생성
 #  - sourceFile/md5/페이지 정규화
+#  - OPENAI_API_KEY 로드(환경변수 우선, 없으면 .streamlit/secrets.toml)
 #
 # 사용처 예:
 #   from utils import attach_uri_and_schema, save_docs_to_jsonl, load_docs_from_jsonl
 #
-# 주의: 외부 의존성 없이 표준 라이브러리만 사용
+# 주의: 외부 의존성 없이 표준 라이브러리만 사용 (orjson은 설치돼 있으면 가속용으로만 사용)
 
 from __future__ import annotations
 
@@ -18,6 +19,11 @@ import json
 import hashlib
 from typing import Iterable, Optional, Tuple, Dict, Any
 
+try:
+    import orjson  # 선택: langsmith 의존성으로 보통 함께 설치됨
+except ImportError:
+    orjson = None
+
 # LangChain Document 호환 (langchain==0.3 계열 지원)
 try:
     from langchain.schema import Document as LCDocument  # type: ignore
@@ -45,42 +51,59 @@ _ARTICLE_RE = re.compile(r"(\d+)")  # "제15조" 등에서 숫자만 뽑기
 # ─────────────────────────────────────────────────────────────
 # JSONL 저장/로드
 # ─────────────────────────────────────────────────────────────
+def json_loads(s):
+    """orjson이 있으면 orjson, 없으면 표준 json (str/bytes 모두 허용)"""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def json_dumps_line(obj: Any) -> str:
+    """JSONL 한 줄 직렬화(비ASCII 유지). orjson이 처리 못 하는 타입이면 표준 json으로 폴백"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False)
+
+
 def save_docs_to_jsonl(docs: Iterable[LCDocument], jsonl_path: str) -> None:
     os.makedirs(os.path.dirname(jsonl_path), exist_ok=True)
     with open(jsonl_path, "w", encoding="utf-8", newline="\n") as jsonl_file:
         for doc in docs:
-            # LangChain Document(Pydantic) 우선 사용
-            try:
-                s = doc.json(ensure_ascii=False)  # type: ignore[attr-defined]
-            except Exception:
-                # 예비 경로: dict/model_dump 가능성
-                to_dict = getattr(doc, "dict", None) or getattr(doc, "model_dump", None)
-                if callable(to_dict):
-                    s = json.dumps(to_dict(), ensure_ascii=False)
-                else:
-                    s = json.dumps(
-                        {
-                            "page_content": getattr(doc, "page_content", str(doc)),
-                            "metadata": getattr(doc, "metadata", {}),
-                        },
-                        ensure_ascii=False,
-                    )
-            jsonl_file.write(s + "\n")
+            # LangChain Document(Pydantic v2 → v1) / dict / 기타 순으로 dict화
+            to_dict = getattr(doc, "model_dump", None) or getattr(doc, "dict", None)
+            if isinstance(doc, dict):
+                obj = doc  # load_docs_from_jsonl로 읽은 과거 레코드
+            elif callable(to_dict):
+                obj = to_dict()
+            else:
+                obj = {
+                    "page_content": getattr(doc, "page_content", str(doc)),
+                    "metadata": getattr(doc, "metadata", {}),
+                }
+            jsonl_file.write(json_dumps_line(obj) + "\n")
 
 
 def load_docs_from_jsonl(jsonl_path: str):
     items = []
     if not os.path.exists(jsonl_path):
         return items
-    with open(jsonl_path, "r", encoding="utf-8") as f:
+    with open(jsonl_path, "rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            items.append(json.loads(line))
+            items.append(json_loads(line))
     return items
 
 
+def tag_cohort_year(docs: Iterable[LCDocument], year: str) -> list:
+    """연도별 인덱스용 사본 (통합 인덱스에 들어가는 원본 docs는 태그 없이 유지)"""
+    return [LCDocument(page_content=d.page_content, metadata={**d.metadata, "_cohort_year": year}) for d in docs]
+
+
 # ─────────────────────────────────────────────────────────────
 # 메타 정규화/URI 유틸
 # ─────────────────────────────────────────────────────────────
@@ -234,3 +257,27 @@ def attach_uri_and_schema(meta: Dict[str, Any], page_content: str) -> Dict[str,
     m["clauseUri"] = clause_http
 
     return m
+
+
+# ─────────────────────────────────────────────────────────────
+# API 키 (진단/스크립트용)
+# ─────────────────────────────────────────────────────────────
+SECRETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".streamlit", "secrets.toml")
+
+
+def ensure_api_key(name: str = "OPENAI_API_KEY") -> Optional[str]:
+    """환경변수에 이미 있으면 그대로 반환(파일 I/O·tomllib import 없음), 없을 때만 secrets.toml에서 읽어 설정"""
+    key = os.environ.get(name)
+    if key:
+        return key
+    if not os.path.exists(SECRETS_PATH):
+        return None
+    try:
+        import tomllib
+    except ImportError:
+        import tomli as tomllib
+    with open(SECRETS_PATH, "rb") as f:
+        key = tomllib.load(f).get(name)
+    if key:
+        os.environ[name] = key
+    return key